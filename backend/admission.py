@@ -0,0 +1,141 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from backend.instrumentation import ADMISSION_IN_USE_MB, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED, ADMISSION_WAIT_SECONDS
+
+# Memory-aware admission for analyses. Each upload is charged an estimated peak
+# memory cost; requests run while the sum of running costs fits the budget, wait
+# in per-client queues (served round-robin) when it does not, and are turned away
+# with 429 + Retry-After when the queue is full or the wait would run too long.
+#
+# The budget is per process. Under gunicorn with several workers, set it to the
+# worker's share of the memory limit.
+ADMISSION_MEMORY_BUDGET_MB = int(os.environ.get("ADMISSION_MEMORY_BUDGET_MB", "1024"))
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", "16"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT_SECONDS", "30"))
+
+# Peak RSS growth per MB of upload, measured on the synthetic logs: CSV parses to
+# ~5x its size (frame, case results, JSON); XLSX is zipped XML read by openpyxl, ~40x.
+BASE_COST_MB = 32
+COST_PER_UPLOAD_MB = {".csv": 5, ".xls": 10, ".xlsx": 40}
+
+class AdmissionRejected(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+# A CSV preview parses the key columns of the whole file plus the sampled rows
+# (~1.5x on the synthetic logs); spreadsheets are read in full either way.
+PREVIEW_COST_PER_UPLOAD_MB = {".csv": 2}
+
+def estimate_memory_mb(size_bytes, filename, preview=False):
+    extension = os.path.splitext(filename)[1].lower()
+    costs = {**COST_PER_UPLOAD_MB, **PREVIEW_COST_PER_UPLOAD_MB} if preview else COST_PER_UPLOAD_MB
+    return BASE_COST_MB + costs.get(extension, COST_PER_UPLOAD_MB[".xlsx"]) * size_bytes / 2**20
+
+def upload_size(file):
+    stream = file.stream
+    position = stream.tell()
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(position)
+    return size
+
+class _Ticket:
+    __slots__ = ("cost", "granted", "admitted_at")
+
+    def __init__(self, cost):
+        self.cost = cost
+        self.granted = False
+        self.admitted_at = None
+
+class AdmissionController:
+    def __init__(self, budget_mb=ADMISSION_MEMORY_BUDGET_MB, max_queue=ADMISSION_MAX_QUEUE,
+                 timeout=ADMISSION_QUEUE_TIMEOUT_SECONDS):
+        self.budget_mb = budget_mb
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.in_use_mb = 0.0
+        self.running = 0
+        self.queues = OrderedDict()  # client -> deque of tickets, in round-robin order
+        self.waiting = 0
+        self.avg_hold_seconds = 1.0
+        self.condition = threading.Condition()
+
+    def acquire(self, client, cost_mb):
+        # Blocks until admitted; returns the ticket to pass to release()
+        ticket = _Ticket(min(cost_mb, self.budget_mb))  # an oversized upload runs alone
+        started = time.monotonic()
+        with self.condition:
+            if not self.waiting and self.in_use_mb + ticket.cost <= self.budget_mb:
+                self._grant(ticket)
+            else:
+                if self.waiting >= self.max_queue:
+                    self._reject("Server busy: analysis queue is full")
+                self.queues.setdefault(client, deque()).append(ticket)
+                self.waiting += 1
+                ADMISSION_QUEUE_DEPTH.set(self.waiting)
+                deadline = started + self.timeout
+                while not ticket.granted:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._withdraw(client, ticket)
+                        self._reject("Server busy: timed out waiting for memory")
+                    self.condition.wait(remaining)
+        ADMISSION_WAIT_SECONDS.observe((), time.monotonic() - started)
+        ticket.admitted_at = time.monotonic()
+        return ticket
+
+    def release(self, ticket):
+        with self.condition:
+            self.in_use_mb -= ticket.cost
+            self.running -= 1
+            # Moving average of how long an admitted analysis holds its memory
+            self.avg_hold_seconds = 0.8 * self.avg_hold_seconds + 0.2 * (time.monotonic() - ticket.admitted_at)
+            ADMISSION_IN_USE_MB.set(self.in_use_mb)
+            self._dispatch()
+
+    def stats(self):
+        with self.condition:
+            return {"budget_mb": self.budget_mb, "in_use_mb": self.in_use_mb,
+                    "running": self.running, "queued": self.waiting}
+
+    def _grant(self, ticket):
+        ticket.granted = True
+        self.in_use_mb += ticket.cost
+        self.running += 1
+        ADMISSION_IN_USE_MB.set(self.in_use_mb)
+
+    def _dispatch(self):
+        # Serve clients round-robin; stop at the first head that does not fit, so
+        # a large request is not starved by a stream of small ones behind it
+        while self.queues:
+            client, queue = next(iter(self.queues.items()))
+            if self.in_use_mb + queue[0].cost > self.budget_mb:
+                break
+            self._grant(queue.popleft())
+            self.waiting -= 1
+            del self.queues[client]
+            if queue:
+                self.queues[client] = queue  # back of the rotation
+        ADMISSION_QUEUE_DEPTH.set(self.waiting)
+        self.condition.notify_all()
+
+    def _withdraw(self, client, ticket):
+        queue = self.queues[client]
+        queue.remove(ticket)
+        if not queue:
+            del self.queues[client]
+        self.waiting -= 1
+        ADMISSION_QUEUE_DEPTH.set(self.waiting)
+        # The withdrawn head may have been what blocked the others
+        self._dispatch()
+
+    def _reject(self, message):
+        ADMISSION_REJECTED.inc(())
+        # Roughly when the work ahead should have drained
+        retry_after = math.ceil(self.avg_hold_seconds * (self.waiting + 1) / max(self.running, 1))
+        raise AdmissionRejected(message, max(1, retry_after))
@@ -0,0 +1,137 @@
+import os
+
+from backend.heavy_hitters import SpaceSaving
+
+# Cost-based alignment of a trace against its scenario's reference sequence.
+#
+# The reference models are plain step sequences (SCENARIO_STEPS), so an optimal
+# alignment is a weighted edit distance without substitutions, solved by dynamic
+# programming: a synchronous move (trace and model agree) costs nothing, a log
+# move (a step the model does not have at that point) and a model move (a
+# planned step the trace skipped) cost ALIGNMENT_LOG_MOVE_COST and
+# ALIGNMENT_MODEL_MOVE_COST. Fitness is 1 - cost / cost of the worst alignment
+# (every trace step a log move, every planned step a model move).
+ALIGNMENT_LOG_MOVE_COST = float(os.environ.get("ALIGNMENT_LOG_MOVE_COST", "1"))
+ALIGNMENT_MODEL_MOVE_COST = float(os.environ.get("ALIGNMENT_MODEL_MOVE_COST", "1"))
+# Search is abandoned once every partial alignment costs more than this; such
+# cases get no cost or fitness. None disables the bound.
+ALIGNMENT_MAX_COST = float(os.environ["ALIGNMENT_MAX_COST"]) if os.environ.get("ALIGNMENT_MAX_COST") else None
+# Distinct (scenario, trace) variants scored per analysis, and how many of the
+# most frequent are kept with the stored analysis for the alignments report
+ALIGNMENT_CACHE_SIZE = int(os.environ.get("ALIGNMENT_CACHE_SIZE", "1000000"))
+ALIGNMENT_REPORT_VARIANTS = int(os.environ.get("ALIGNMENT_REPORT_VARIANTS", "1000"))
+
+SYNC, LOG_MOVE, MODEL_MOVE = "sync", "log", "model"
+
+class Alignment:
+    __slots__ = ("cost", "fitness", "moves")
+
+    def __init__(self, cost, fitness, moves):
+        self.cost = cost
+        self.fitness = fitness
+        self.moves = moves  # [(move, step code), ...] or None when the bound was hit
+
+UNALIGNED = Alignment(None, None, None)
+
+def align(model, trace, log_cost=ALIGNMENT_LOG_MOVE_COST, model_cost=ALIGNMENT_MODEL_MOVE_COST,
+          max_cost=ALIGNMENT_MAX_COST, with_moves=True):
+    # model, trace: sequences of step codes -> optimal Alignment
+    n, m = len(trace), len(model)
+    # cost[i][j]: cheapest alignment of trace[:i] with model[:j]
+    cost = [[0.0] * (m + 1) for _ in range(n + 1)]
+    for j in range(1, m + 1):
+        cost[0][j] = j * model_cost
+    for i in range(1, n + 1):
+        row, previous = cost[i], cost[i - 1]
+        step = trace[i - 1]
+        row[0] = i * log_cost
+        for j in range(1, m + 1):
+            best = previous[j] + log_cost
+            if row[j - 1] + model_cost < best:
+                best = row[j - 1] + model_cost
+            if step == model[j - 1] and previous[j - 1] < best:
+                best = previous[j - 1]
+            row[j] = best
+        if max_cost is not None and min(row) > max_cost:
+            return UNALIGNED
+
+    total = cost[n][m]
+    if max_cost is not None and total > max_cost:
+        return UNALIGNED
+    worst = n * log_cost + m * model_cost
+    fitness = 1.0 - total / worst if worst else 1.0
+    if not with_moves:
+        return Alignment(total, fitness, None)
+
+    # Walk back from the corner, preferring synchronous moves
+    moves = []
+    i, j = n, m
+    while i or j:
+        if i and j and trace[i - 1] == model[j - 1] and cost[i][j] == cost[i - 1][j - 1]:
+            moves.append((SYNC, trace[i - 1]))
+            i, j = i - 1, j - 1
+        elif i and cost[i][j] == cost[i - 1][j] + log_cost:
+            moves.append((LOG_MOVE, trace[i - 1]))
+            i -= 1
+        else:
+            moves.append((MODEL_MOVE, model[j - 1]))
+            j -= 1
+    moves.reverse()
+    return Alignment(total, fitness, moves)
+
+class AlignmentCache:
+    # (cost, fitness) by (scenario, trace): each distinct variant is aligned once
+    # while the store has room; past max_size new variants are aligned per case.
+    # Moves are not kept (they would dominate memory on logs where nearly every
+    # trace is unique); report() re-aligns the few variants it shows. Variant
+    # frequencies are a Space-Saving summary of the same size, so variants that
+    # did not fit the store are counted too.
+    def __init__(self, max_size=ALIGNMENT_CACHE_SIZE):
+        self.max_size = max_size
+        self.models = {}
+        self.scores = {}
+        self.counts = SpaceSaving(max_size)
+        self.unstored = set()  # hashes of variants seen once the store was full
+        self.distinct = 0
+        self.hits = 0
+
+    def align(self, scenario, model, trace):
+        key = (scenario, trace)
+        self.counts.update(key)
+        score = self.scores.get(key)
+        if score is not None:
+            self.hits += 1
+            return score
+        alignment = align(model, trace, with_moves=False)
+        score = (alignment.cost, alignment.fitness)
+        self.models[scenario] = model
+        if len(self.scores) < self.max_size:
+            self.scores[key] = score
+            self.distinct += 1
+        elif hash(key) not in self.unstored:
+            self.unstored.add(hash(key))
+            self.distinct += 1
+        return score
+
+    def retain(self, k=ALIGNMENT_REPORT_VARIANTS):
+        # Keep only the k most frequent variants once the log has been scored
+        self.counts = SpaceSaving(k).merge(self.counts)
+        self.scores = {key: self.scores[key] for key in self.counts.counts if key in self.scores}
+        self.unstored = set()
+
+    def report(self, vocabulary, k=20, scenario=None):
+        # Most frequent variants with their optimal alignments, steps decoded.
+        # "cases" over-counts by at most "cases_error" once variants were evicted.
+        counts = self.counts.counts
+        keys = [key for key in counts if scenario is None or key[0] == scenario]
+        keys.sort(key=lambda key: -counts[key])
+        variants = []
+        for key in keys[:k]:
+            alignment = align(self.models[key[0]], key[1])
+            moves = None
+            if alignment.moves is not None:
+                steps = vocabulary.decode([code for _, code in alignment.moves])
+                moves = [{"move": move, "step": step} for (move, _), step in zip(alignment.moves, steps)]
+            variants.append({"scenario": key[0], "cases": counts[key], "cases_error": self.counts.errors[key],
+                             "cost": alignment.cost, "fitness": alignment.fitness, "moves": moves})
+        return {"variants": variants, "distinct_variants": self.distinct, "cache_hits": self.hits}
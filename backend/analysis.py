@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+from backend.alignment import AlignmentCache
+from backend.case_results import CaseResultsBuilder
+from backend.encoding import compile_scenarios, encode_event_log, is_encoded, step_vocabulary
+from backend.heavy_hitters import variant_key
+from backend.instrumentation import stage
+from backend.utils import calculate_quantity_deviation_series, detect_breaches
+
+CASE_KEYS = ['Order-No.', 'Item-No.']
+
+def _minutes(start, end):
+    # Vectorized safe_duration: NaN when either side is missing or the span is negative
+    duration = (end - start).dt.total_seconds() / 60
+    return duration.where(duration >= 0)
+
+def aggregate_case_headers(df):
+    # All case-level timing and quantity fields in one grouped aggregation.
+    # Rows come out in groupby order (sorted by Order-No., Item-No.).
+    headers = df.groupby(CASE_KEYS, sort=True, observed=True).agg(
+        planned_start=('Planed-Master-Order-Processing-Start-Time', 'min'),
+        planned_end=('Planed-Master-Order-Processing-End-Time', 'max'),
+        actual_start=('As-Is-Real-Order-Processing-Start-Time', 'min'),
+        actual_end=('As-Is-Real-Order-Processing-End-Time', 'max'),
+        Total_Yield=('Final Yield Quantity', 'sum'),
+        Total_Scrap=('Total Scrap Quantity', 'sum'),
+    )
+
+    # Attribute columns come from the first row of each case, as `.iloc[0]` did
+    # (groupby.first() would skip nulls instead).
+    first_rows = df.drop_duplicates(CASE_KEYS).set_index(CASE_KEYS)[[
+        'Customer-No.',
+        'Export to not EU [1 = n, 2 = y]',
+        'Dangerous Good [1 = n, 2 = y]',
+        'Planed-Master-Scenario-No.',
+    ]]
+    headers = headers.join(first_rows).rename(columns={
+        'Customer-No.': 'Customer_ID',
+        'Export to not EU [1 = n, 2 = y]': 'Export_Flag',
+        'Dangerous Good [1 = n, 2 = y]': 'Dangerous_Flag',
+        'Planed-Master-Scenario-No.': 'Derived_Scenario',
+    })
+
+    headers['Time_Planned_Minutes'] = _minutes(headers['planned_start'], headers['planned_end'])
+    headers['Time_Actual_Minutes'] = _minutes(headers['actual_start'], headers['actual_end'])
+    headers['Time_Deviation_Minutes'] = headers['Time_Actual_Minutes'] - headers['Time_Planned_Minutes']
+    headers['Quantity_Deviation_Percent'] = calculate_quantity_deviation_series(
+        headers['Total_Yield'], headers['Total_Scrap'])
+
+    # Timestamps stay datetime64 here; format_timestamps() renders them at the output edge
+    return headers.reset_index().rename(columns={
+        'Order-No.': 'Order_ID',
+        'Item-No.': 'Item_ID',
+        'planned_start': 'Planned_Start',
+        'planned_end': 'Planned_End',
+        'actual_start': 'Actual_Start',
+        'actual_end': 'Actual_End',
+    })
+
+def case_step_sequences(df):
+    # As-is step codes of every case ordered by as-is position, aligned with
+    # aggregate_case_headers(). One sort plus a split instead of a sort per case.
+    # Blank steps keep code -1, which never matches a reference step.
+    keyed = df.dropna(subset=CASE_KEYS)
+    ordered = keyed.sort_values(
+        CASE_KEYS + ['As-Is-Real-Order-Processing-Ongoing Position No.'], kind='stable')
+    sizes = ordered.groupby(CASE_KEYS, sort=True, observed=True).size().to_numpy()
+    steps = ordered['As-Is-Master-Order-Processing-Position-No. as an ID'].cat.codes.to_numpy(dtype=np.int32)
+    return [chunk.tolist() for chunk in np.split(steps, np.cumsum(sizes)[:-1])] if len(sizes) else []
+
+def classify_breach(missing_steps, out_of_order_steps, extra_steps, duplicates):
+    breach_type = "None"
+    if missing_steps and out_of_order_steps:
+        breach_type = "Both"
+    elif missing_steps:
+        breach_type = "Missing"
+    elif out_of_order_steps:
+        breach_type = "Out of Order"
+    if extra_steps or duplicates:
+        if breach_type == "None":
+            breach_type = "Extra/Duplicates"
+        else:
+            breach_type += " + Extra/Duplicates"
+    return breach_type
+
+def analyze_cases(df):
+    # Parsed event log -> CaseResults, one case per (Order-No., Item-No.).
+    # Everything below works on step codes; see backend/encoding.py.
+    if not is_encoded(df):
+        with stage("encode"):
+            df = encode_event_log(df.copy())
+    vocabulary = step_vocabulary(df)
+    planned_codes = compile_scenarios(vocabulary)
+    with stage("case_headers"):
+        headers = aggregate_case_headers(df)
+    with stage("step_sequences"):
+        step_sequences = case_step_sequences(df)
+
+    alignments = AlignmentCache()
+    builder = CaseResultsBuilder(vocabulary, alignments)
+    variants = {}
+    with stage("detect_breaches"):
+        for scenario, actual_steps in zip(headers['Derived_Scenario'].tolist(), step_sequences):
+            planned_steps = planned_codes.get(scenario, [])  # <- Always use reference!
+            breaches = detect_breaches(planned_steps, actual_steps)
+            trace = tuple(actual_steps)
+            if trace not in variants:
+                variants[trace] = variant_key(vocabulary.decode(trace))
+            builder.append(len(planned_steps), len(actual_steps), classify_breach(*breaches),
+                           variants[trace], breaches, alignments.align(scenario, planned_steps, trace))
+    alignments.retain()
+    with stage("build_results"):
+        return builder.build(headers)
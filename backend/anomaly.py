@@ -0,0 +1,138 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from backend.analysis import CASE_KEYS
+from backend.discovery import AS_IS_END, AS_IS_START, AS_IS_STEP, SCENARIO, as_is_events
+from backend.performance import PERFORMANCE_DIGEST_COMPRESSION, TDigest
+
+# |z| above this flags a case (Iglewicz & Hoaglin's cut-off for modified z-scores)
+OUTLIER_Z_THRESHOLD = float(os.environ.get("OUTLIER_Z_THRESHOLD", "3.5"))
+OUTLIER_TOP_N = int(os.environ.get("OUTLIER_TOP_N", "50"))
+
+# Case field -> its robust z-score field, scaled within the case's Derived_Scenario
+CASE_SCORES = {
+    "Time_Deviation_Minutes": "Time_Deviation_Z",
+    "Quantity_Deviation_Percent": "Scrap_Rate_Z",
+}
+SCORE_FIELDS = [*CASE_SCORES.values(), "Step_Duration_Z"]
+# Columns of the top-N outlier report
+OUTLIER_FIELDS = [
+    "Order_ID", "Item_ID", "Customer_ID", "Derived_Scenario", "Breach_Type",
+    "Time_Deviation_Minutes", "Quantity_Deviation_Percent", *SCORE_FIELDS, "Outlier_Step", "Anomaly_Score",
+]
+
+# MAD and mean absolute deviation -> standard deviation, for normal data
+MAD_SCALE = 1.4826
+MEAN_AD_SCALE = 1.2533
+
+def robust_scale(digest):
+    # (median, scale) from a digest. When over half the values are equal the MAD
+    # is 0 and the mean absolute deviation stands in; 0 only if all are equal.
+    median = digest.quantile(0.5).item()
+    scale = MAD_SCALE * digest.median_absolute_deviation(median)
+    if scale == 0:
+        scale = MEAN_AD_SCALE * digest.mean_absolute_deviation(median)
+    return median, scale
+
+def robust_z(values, medians, scales):
+    # (x - median) / scale, element-wise; 0 where the scale is 0
+    values = np.asarray(values, dtype=float)
+    scales = np.asarray(scales, dtype=float)
+    return (values - medians) / np.where(scales > 0, scales, np.inf)
+
+class RobustScales:
+    # One TDigest per (case field, scenario). Chunked runs score in two passes:
+    # update() every chunk (or merge() per-chunk instances), then score() them.
+
+    def __init__(self, compression=PERFORMANCE_DIGEST_COMPRESSION):
+        self.compression = compression
+        self.digests = {}
+
+    def update(self, cases):
+        for field in CASE_SCORES:
+            for scenario, values in cases[field].groupby(cases['Derived_Scenario'], observed=True, sort=False):
+                self._digest(field, scenario).update(values.to_numpy())
+        return self
+
+    def merge(self, other):
+        for key, digest in other.digests.items():
+            self._digest(*key).merge(digest)
+        return self
+
+    def _digest(self, field, scenario):
+        key = (field, scenario)
+        if key not in self.digests:
+            self.digests[key] = TDigest(self.compression)
+        return self.digests[key]
+
+    def score(self, cases):
+        # z-score field -> array, one per case
+        scenarios = cases['Derived_Scenario'].astype(object)
+        scores = {}
+        for field, z_field in CASE_SCORES.items():
+            scales = {scenario: robust_scale(digest) for (f, scenario), digest in self.digests.items() if f == field}
+            medians = scenarios.map({scenario: median for scenario, (median, _) in scales.items()})
+            spreads = scenarios.map({scenario: scale for scenario, (_, scale) in scales.items()})
+            scores[z_field] = robust_z(cases[field], medians.astype(float), spreads.astype(float))
+        return scores
+
+def step_duration_scores(df, performance):
+    # Per case, the signed z-score of its most unusual as-is step duration,
+    # scaled by the (scenario, step) digests of StepPerformance
+    scales = {(scenario, step): robust_scale(digest)
+              for (metric, scenario, step), digest in performance.digests.items() if metric == "actual"}
+    events = as_is_events(df)
+    if events.empty or not scales:
+        return pd.DataFrame(columns=['Order_ID', 'Item_ID', 'Step_Duration_Z', 'Outlier_Step'])
+    table = pd.DataFrame(list(scales.values()), index=pd.MultiIndex.from_tuples(list(scales)),
+                         columns=['median', 'scale'])
+    aligned = table.reindex(pd.MultiIndex.from_arrays([events[SCENARIO].astype(object),
+                                                       events[AS_IS_STEP].astype(object)]))
+    minutes = (events[AS_IS_END] - events[AS_IS_START]).dt.total_seconds() / 60
+    z = robust_z(minutes.where(minutes >= 0), aligned['median'].to_numpy(), aligned['scale'].to_numpy())
+    steps = pd.DataFrame({
+        'Order_ID': events[CASE_KEYS[0]].to_numpy(),
+        'Item_ID': events[CASE_KEYS[1]].to_numpy(),
+        'Step_Duration_Z': z,
+        'Outlier_Step': events[AS_IS_STEP].astype(object).to_numpy(),
+    }).dropna(subset=['Step_Duration_Z'])
+    order = np.argsort(-np.abs(steps['Step_Duration_Z'].to_numpy()), kind='stable')
+    return steps.iloc[order].drop_duplicates(['Order_ID', 'Item_ID'])
+
+class OutlierRanking:
+    # Scored case indices by descending Anomaly_Score, overall and per scenario,
+    # sorted once so top-N queries are a slice rather than a rescan
+
+    def __init__(self, frame, threshold=OUTLIER_Z_THRESHOLD):
+        self.threshold = threshold
+        score = frame['Anomaly_Score'].to_numpy()
+        scored = np.flatnonzero(~np.isnan(score))
+        self.order = scored[np.argsort(-score[scored], kind='stable')]
+        self.flagged = int((score[self.order] > threshold).sum())
+        scenarios = frame['Derived_Scenario'].astype(object).to_numpy()[self.order]
+        self.by_scenario = {scenario: self.order[scenarios == scenario] for scenario in pd.unique(scenarios)}
+
+    def top(self, n=OUTLIER_TOP_N, scenario=None):
+        order = self.order if scenario is None else self.by_scenario.get(scenario, self.order[:0])
+        return order[:n]
+
+def score_outliers(case_results, df, performance, scales=None):
+    # Adds the z-score fields, Outlier_Step and Anomaly_Score (largest |z|) to
+    # the case results and returns their ranking. `scales` defaults to the
+    # scenario scales of these cases.
+    frame = case_results.frame
+    if scales is None:
+        scales = RobustScales().update(frame)
+    for z_field, z in scales.score(frame).items():
+        frame[z_field] = z
+    steps = step_duration_scores(df, performance).set_index(['Order_ID', 'Item_ID'])
+    aligned = steps.reindex(pd.MultiIndex.from_arrays([frame['Order_ID'].astype(object),
+                                                       frame['Item_ID'].astype(object)]))
+    frame['Step_Duration_Z'] = aligned['Step_Duration_Z'].to_numpy(dtype=float)
+    # Named only when that step is itself an outlier
+    outlier_step = aligned['Outlier_Step'].astype(object).to_numpy()
+    frame['Outlier_Step'] = np.where(np.abs(frame['Step_Duration_Z'].to_numpy()) > OUTLIER_Z_THRESHOLD, outlier_step, None)
+    frame['Anomaly_Score'] = frame[SCORE_FIELDS].abs().max(axis=1)
+    return OutlierRanking(frame)
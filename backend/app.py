@@ -1,14 +1,61 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import io, base64
 import matplotlib.pyplot as plt
-from backend.utils import detect_breaches, generate_breach_plot, calculate_quantity_deviation, CORPORATE_COLORS, SCENARIO_STEPS
+from backend.utils import count_breach_plot_types, plot_breach_type_counts, CORPORATE_COLORS
+from backend.cube import build_breach_cube, query_cube
+from backend.store import save_analysis, get_analysis
+from backend.heavy_hitters import HeavyHitters
+from backend.online import OnlineConformance
+from backend.analysis import analyze_cases
+from backend.discovery import build_dfg, dfg_report
+from backend.attribution import ANY_BREACH, ATTRIBUTION_MIN_CASES, BreachAttribution
+from backend.compare import analyze_changed_cases, case_input_hashes, compare_results, COMPARE_MAX_CASES
+from backend.quality import profile_event_log
+from backend.inference import inference_summary, infer_scenarios
+from backend.anomaly import OUTLIER_FIELDS, OUTLIER_TOP_N, score_outliers
+from backend.performance import PERFORMANCE_QUANTILES, StepPerformance
+from backend.case_results import select_fields
+from backend.validation import sniff_upload, validate_sample
+from backend.uploads import UPLOAD_SPOOL_DIR, SpoolingRequest, load_event_log
+from backend.preview import PREVIEW_CASES_PER_SCENARIO, preview_analysis
+from backend.export import iter_report_csv, write_report_xlsx
+from backend.responses import cached_response, compress_response, content_digest
+from backend.admission import AdmissionController, AdmissionRejected, estimate_memory_mb, upload_size
+from backend.instrumentation import (
+    PeakRssTracker, begin_request, current_rss_mb, end_request, record_count, record_peak_rss, render_metrics, stage
+)
 import math
+import os
+import tempfile
 
 app = Flask(__name__)
+app.request_class = SpoolingRequest
 CORS(app)
 
+online_conformance = OnlineConformance()
+admission = AdmissionController()
+peak_rss = PeakRssTracker()
+
+@app.before_request
+def start_timings():
+    g.timings, g.timings_token = begin_request()
+
+@app.after_request
+def emit_timings(response):
+    timings = g.pop('timings', None)
+    if timings is not None:
+        response.headers['Server-Timing'] = timings.server_timing()
+        end_request(timings, g.timings_token, request.endpoint or 'unmatched', response.status_code)
+    return response
+
+# Registered after emit_timings so it runs first and shows up as a stage
+@app.after_request
+def compress(response):
+    with stage("compress"):
+        return compress_response(response)
+
 def safe_duration(start, end):
     try:
         if pd.isna(start) or pd.isna(end):
@@ -60,226 +107,470 @@ def most_common_breach(series):
         return 'None'
     return filtered.mode().iloc[0]
 
+def validate_upload(file):
+    # -> (filename, problems, hints, error response or None)
+    filename = file.filename.lower()
+    if not filename.endswith(('.csv', '.xls', '.xlsx')):
+        return filename, [], {}, (jsonify({"error": "Unsupported file format. Upload CSV or Excel."}), 400)
+
+    # Validate the header and a few sample rows before parsing the whole file
+    with stage("validate"):
+        problems, hints = validate_sample(sniff_upload(file.stream, filename))
+    errors = [p for p in problems if p["severity"] == "error"]
+    if errors:
+        missing_cols = [p["column"] for p in errors if p["problem"] == "missing column"]
+        message = f"Missing columns: {missing_cols}" if missing_cols else "Upload failed schema validation"
+        return filename, problems, hints, (jsonify({"error": message, "problems": problems}), 400)
+    return filename, problems, hints, None
+
 @app.route('/analyze-with-dashboard', methods=['POST'])
 def analyze_with_dashboard():
+    # Peak RSS is process-wide: it is reported only for an analysis no other ran alongside
+    rss_window = peak_rss.begin()
+    start_rss = current_rss_mb()
+    ticket = None
     try:
         if 'file' not in request.files:
             return jsonify({"error": "No file uploaded"}), 400
 
         file = request.files['file']
-        filename = file.filename.lower()
-
-        if filename.endswith('.csv'):
-            df = pd.read_csv(file)
-        elif filename.endswith(('.xls', '.xlsx')):
-            in_memory_file = io.BytesIO(file.read())
-            df = pd.read_excel(in_memory_file)
-        else:
-            return jsonify({"error": "Unsupported file format. Upload CSV or Excel."}), 400
-
-        required_columns = [
-            'Order-No.', 'Customer-No.', 'Item-No.',
-            'Export to not EU [1 = n, 2 = y]', 'Dangerous Good [1 = n, 2 = y]',
-            'Planed-Master-Scenario-No.',
-            'Planed-Master-Order-Processing-Ongoing Position No.',
-            'Planed-Master-Order-Processing-Position-No. as an ID',
-            'Planed-Master-Order-Processing-Start-Time',
-            'Planed-Master-Order-Processing-End-Time',
-            'As-Is-Real-Order-Processing-Ongoing Position No.',
-            'As-Is-Master-Order-Processing-Position-No. as an ID',
-            'As-Is-Real-Order-Processing-Start-Time',
-            'As-Is-Real-Order-Processing-End-Time',
-            'Final Yield Quantity',
-            'Total Scrap Quantity'
-        ]
-        missing_cols = [col for col in required_columns if col not in df.columns]
-        if missing_cols:
-            return jsonify({"error": f"Missing columns: {missing_cols}"}), 400
-
-        # Parse dates
-        date_cols = [
-            'Planed-Master-Order-Processing-Start-Time',
-            'Planed-Master-Order-Processing-End-Time',
-            'As-Is-Real-Order-Processing-Start-Time',
-            'As-Is-Real-Order-Processing-End-Time'
-        ]
-        for col in date_cols:
-            df[col] = pd.to_datetime(df[col], errors='coerce')
-
-        results = []
-        grouped = df.groupby(['Order-No.', 'Item-No.'])
-        for (order_id, item_id), group in grouped:
-            scenario = group['Planed-Master-Scenario-No.'].iloc[0]
-            planned_steps = SCENARIO_STEPS.get(scenario, [])  # <- Always use reference!
-            actual_steps = list(group.sort_values('As-Is-Real-Order-Processing-Ongoing Position No.')[
-                'As-Is-Master-Order-Processing-Position-No. as an ID'])
-
-            missing_steps, out_of_order_steps, extra_steps, duplicates = detect_breaches(planned_steps, actual_steps)
-
-            planned_start = group['Planed-Master-Order-Processing-Start-Time'].min()
-            planned_end = group['Planed-Master-Order-Processing-End-Time'].max()
-            actual_start = group['As-Is-Real-Order-Processing-Start-Time'].min()
-            actual_end = group['As-Is-Real-Order-Processing-End-Time'].max()
-
-            planned_duration = safe_duration(planned_start, planned_end)
-            actual_duration = safe_duration(actual_start, actual_end)
-            time_deviation = (actual_duration - planned_duration) if (planned_duration is not None and actual_duration is not None) else None
-
-            total_yield = group['Final Yield Quantity'].fillna(0).sum()
-            total_scrap = group['Total Scrap Quantity'].fillna(0).sum()
-
-            # Breach type logic
-            breach_type = "None"
-            if missing_steps and out_of_order_steps:
-                breach_type = "Both"
-            elif missing_steps:
-                breach_type = "Missing"
-            elif out_of_order_steps:
-                breach_type = "Out of Order"
-            if extra_steps or duplicates:
-                if breach_type == "None":
-                    breach_type = "Extra/Duplicates"
-                else:
-                    breach_type += " + Extra/Duplicates"
-
-            # Details
-            details_parts = []
-            if missing_steps:
-                details_parts.append("<strong>Missing Steps:</strong><ul>" +
-                                    ''.join(f"<li>{s}</li>" for s in missing_steps) + "</ul>")
-            if out_of_order_steps:
-                details_parts.append("<strong>Out of Order:</strong><ul>" +
-                                    ''.join(f"<li>{s}</li>" for s in out_of_order_steps) + "</ul>")
-            if extra_steps:
-                details_parts.append("<strong>Extra Steps (unexpected):</strong><ul>" +
-                                    ''.join(f"<li>{s}</li>" for s in extra_steps) + "</ul>")
-            if duplicates:
-                details_parts.append("<strong>Duplicate Steps:</strong><ul>" +
-                                    ''.join(f"<li>{s}</li>" for s in duplicates) + "</ul>")
-            if not details_parts:
-                details_parts.append("<strong>No Breach</strong>")
-            details_parts.append(f"<strong>Counts:</strong> Missing - {len(missing_steps)} | Out-of-Order - {len(out_of_order_steps)} | Extra - {len(extra_steps)} | Duplicates - {len(duplicates)}")
-
-            results.append({
-                "Order_ID": order_id,
-                "Customer_ID": group['Customer-No.'].iloc[0],
-                "Item_ID": item_id,
-                "Export_Flag": group['Export to not EU [1 = n, 2 = y]'].iloc[0],
-                "Dangerous_Flag": group['Dangerous Good [1 = n, 2 = y]'].iloc[0],
-                "Derived_Scenario": scenario,
-                "Scenario_Used": scenario,
-                "Planned_Steps_Count": len(planned_steps),
-                "As_Is_Steps_Count": len(actual_steps),
-                "Planned_Start": planned_start.strftime("%Y-%m-%d %H:%M") if pd.notna(planned_start) else None,
-                "Planned_End": planned_end.strftime("%Y-%m-%d %H:%M") if pd.notna(planned_end) else None,
-                "Actual_Start": actual_start.strftime("%Y-%m-%d %H:%M") if pd.notna(actual_start) else None,
-                "Actual_End": actual_end.strftime("%Y-%m-%d %H:%M") if pd.notna(actual_end) else None,
-                "Time_Planned_Minutes": planned_duration,
-                "Time_Actual_Minutes": actual_duration,
-                "Time_Deviation_Minutes": time_deviation,
-                "Missing_Steps_Count": len(missing_steps),
-                "Out_of_Order_Steps_Count": len(out_of_order_steps),
-                "Extra_Steps_Count": len(extra_steps),
-                "Duplicate_Steps_Count": len(duplicates),
-                "Missing_Steps": missing_steps,
-                "Out_of_Order_Steps": out_of_order_steps,
-                "Extra_Steps": extra_steps,
-                "Duplicates": duplicates,
-                "Case_ID": f"{order_id}_{item_id}",
-                "Breach_Type": breach_type,
-                "Details": "<br>".join(details_parts),
-                "Total_Yield": total_yield,
-                "Total_Scrap": total_scrap,
-                "Quantity_Deviation_Percent": calculate_quantity_deviation(total_yield, total_scrap),
-            })
-
-        safe_results = convert_types(results)
-        df_results = pd.DataFrame(safe_results)
+        filename, problems, hints, error = validate_upload(file)
+        if error:
+            return error
+
+        # Previews and full runs both wait for memory budget (per client, round-robin)
+        # before parsing; 429 when saturated
+        client = request.headers.get('X-Client-Id') or request.remote_addr
+
+        # ?preview=1: estimates from a stratified case sample instead of the full analysis
+        if request.args.get('preview', '').lower() in ('1', 'true', 'yes'):
+            ticket = admission.acquire(client, estimate_memory_mb(upload_size(file), filename, preview=True))
+            per_scenario = request.args.get('sample_size', PREVIEW_CASES_PER_SCENARIO, type=int)
+            preview = preview_analysis(file, filename, hints, per_scenario, seed=request.args.get('seed', 0, type=int))
+            return jsonify(convert_types({"validation_warnings": problems, **preview}))
+
+        # ?profile=lean drops fields the client can derive; ?fields=a,b sends only those
+        requested = [f for f in request.args.get('fields', '').split(',') if f]
+        try:
+            fields = select_fields(request.args.get('profile', 'full'), requested)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        ticket = admission.acquire(client, estimate_memory_mb(upload_size(file), filename))
+
+        # Parse from the spooled temp file (memory-mapped for CSV), not an in-memory copy
+        df = load_event_log(file, filename, hints)
+        record_count("rows", len(df))
+
+        # Null rates, intra-case conflicts, coerced values, negative durations, plan mismatches
+        with stage("data_quality"):
+            data_quality = profile_event_log(df)
+
+        case_results = analyze_cases(df)
+        record_count("cases", len(case_results))
+        df_results = case_results.frame
+
+        # Best-matching reference scenario per case, next to the planned one
+        with stage("scenario_inference"):
+            inferred = infer_scenarios(df)
+            for field in inferred.columns:
+                df_results[field] = inferred[field].to_numpy()
+            scenario_inference = inference_summary(df_results)
+
+        # Per-step planned/actual/waiting time quantiles, overall and per scenario
+        with stage("step_performance"):
+            performance = StepPerformance().update(df)
+
+        # Per-case hashes of the input rows, so comparisons can skip unchanged cases
+        with stage("case_hashes"):
+            case_hashes = case_input_hashes(df)
+
+        # Robust z-scores per scenario and step, added as case fields
+        with stage("outliers"):
+            outliers = score_outliers(case_results, df, performance)
+
+        with stage("to_records"):
+            safe_results = convert_types(case_results.to_records(fields))
 
         scenario_summary_json = []
-        if not df_results.empty:
-            scenario_summary = df_results.groupby('Derived_Scenario').agg({
-                'Missing_Steps_Count': 'mean',
-                'Out_of_Order_Steps_Count': 'mean',
-                'Time_Deviation_Minutes': 'mean',
-                'Order_ID': 'count',
-                'Breach_Type': most_common_breach,
-                'Total_Yield': 'sum',
-                'Total_Scrap': 'sum'
-            }).rename(columns={
-                'Order_ID': 'Num_Orders',
-                'Missing_Steps_Count': 'Avg_Missing_Steps',
-                'Out_of_Order_Steps_Count': 'Avg_Out_of_Order_Steps',
-                'Time_Deviation_Minutes': 'Avg_Time_Deviation_Minutes',
-                'Breach_Type': 'Most_Common_Breach_Type',
-                'Total_Yield': 'Sum_Total_Yield',
-                'Total_Scrap': 'Sum_Total_Scrap'
-            }).reset_index()
-            scenario_summary_json = convert_types(scenario_summary.to_dict(orient='records'))
-
-        chart_base64 = generate_breach_plot(results)
+        with stage("scenario_summary"):
+            if not df_results.empty:
+                scenario_summary = df_results.groupby('Derived_Scenario', observed=True).agg({
+                    'Missing_Steps_Count': 'mean',
+                    'Out_of_Order_Steps_Count': 'mean',
+                    'Time_Deviation_Minutes': 'mean',
+                    'Order_ID': 'count',
+                    'Breach_Type': most_common_breach,
+                    'Total_Yield': 'sum',
+                    'Total_Scrap': 'sum'
+                }).rename(columns={
+                    'Order_ID': 'Num_Orders',
+                    'Missing_Steps_Count': 'Avg_Missing_Steps',
+                    'Out_of_Order_Steps_Count': 'Avg_Out_of_Order_Steps',
+                    'Time_Deviation_Minutes': 'Avg_Time_Deviation_Minutes',
+                    'Breach_Type': 'Most_Common_Breach_Type',
+                    'Total_Yield': 'Sum_Total_Yield',
+                    'Total_Scrap': 'Sum_Total_Scrap'
+                }).reset_index()
+                scenario_summary_json = convert_types(scenario_summary.to_dict(orient='records'))
+
+        # Bounded-memory top-k customers/items/variants by breaches and scrap
+        with stage("heavy_hitters"):
+            heavy_hitters = HeavyHitters()
+            if not df_results.empty:
+                heavy_hitters.update_from_cases(df_results)
+
+        # Breach type x case attribute contingency tables for root-cause rankings
+        with stage("attribution"):
+            attribution = BreachAttribution().update(df_results)
+
+        # Directly-follows graph of the as-is traces, overall and per scenario
+        with stage("dfg"):
+            dfg = build_dfg(df)
+
+        # Precomputed breach cube for slicing without re-running the analysis
+        with stage("cube"):
+            analysis = {
+                "cube": build_breach_cube(df_results),
+                "heavy_hitters": heavy_hitters,
+                "dfg": dfg,
+                "performance": performance,
+                "outliers": outliers,
+                "attribution": attribution,
+                "case_hashes": case_hashes,
+                "data_quality": data_quality,
+                # Kept for cacheable re-fetches (GET /analysis/<id>/results, /charts/<name>)
+                "results": case_results,
+                "results_digest": case_results.digest()
+            }
+            analysis_id = save_analysis(analysis)
+        top_k = request.args.get('top_k', 10, type=int)
+
+        with stage("chart.breach_plot"):
+            chart_base64 = plot_breach_type_counts(count_breach_plot_types(
+                df_results['Missing_Steps_Count'], df_results['Out_of_Order_Steps_Count']))
 
         # Dashboard charts (no change needed)
         charts = {}
         # ... [charts code remains unchanged, as in your existing app.py] ...
 
         # Chart 1
-        fig1, ax1 = plt.subplots()
-        scenario_counts = df['Planed-Master-Scenario-No.'].value_counts()
-        scenario_counts.plot(kind='bar', color=CORPORATE_COLORS["blue"], ax=ax1)
-        style_ax(ax1, "Scenario Summary", ylabel="Number of Orders")
-        charts["scenario_summary"] = fig_to_base64(fig1)
+        with stage("chart.scenario_summary"):
+            fig1, ax1 = plt.subplots()
+            scenario_counts = df['Planed-Master-Scenario-No.'].value_counts()
+            scenario_counts.plot(kind='bar', color=CORPORATE_COLORS["blue"], ax=ax1)
+            style_ax(ax1, "Scenario Summary", ylabel="Number of Orders")
+            charts["scenario_summary"] = fig_to_base64(fig1)
 
         # Chart 2
-        breach_counts = pd.Series([r['Breach_Type'] != 'None' for r in safe_results]).value_counts()
-        fig2, ax2 = plt.subplots()
-        breach_counts.plot(kind='bar', color=[CORPORATE_COLORS["green"], CORPORATE_COLORS["red"]], ax=ax2)
-        style_ax(ax2, "Breach vs No Breach", ylabel="Number of Orders")
-        ax2.set_xticklabels(['No Breach', 'Breach'], rotation=0)
-        charts["breach_counts"] = fig_to_base64(fig2)
+        with stage("chart.breach_counts"):
+            # Fixed order so the labels line up, even when every case is (or none is) a breach
+            breach_counts = (df_results['Breach_Type'] != 'None').value_counts().reindex([False, True], fill_value=0)
+            fig2, ax2 = plt.subplots()
+            breach_counts.plot(kind='bar', color=[CORPORATE_COLORS["green"], CORPORATE_COLORS["red"]], ax=ax2)
+            style_ax(ax2, "Breach vs No Breach", ylabel="Number of Orders")
+            ax2.set_xticklabels(['No Breach', 'Breach'], rotation=0)
+            charts["breach_counts"] = fig_to_base64(fig2)
 
         # Chart 3
-        breach_type_counts = pd.Series([r['Breach_Type'] for r in safe_results]).value_counts()
-        fig3, ax3 = plt.subplots()
-        breach_type_counts.plot(kind='pie', autopct='%1.1f%%', colors=[
-            CORPORATE_COLORS["red"], CORPORATE_COLORS["orange"], CORPORATE_COLORS["yellow"], CORPORATE_COLORS["green"]
-        ], ax=ax3)
-        ax3.set_ylabel("")
-        style_ax(ax3, "Breach Type Distribution")
-        charts["breach_type_dist"] = fig_to_base64(fig3)
+        with stage("chart.breach_type_dist"):
+            breach_type_counts = df_results['Breach_Type'].value_counts()
+            fig3, ax3 = plt.subplots()
+            breach_type_counts.plot(kind='pie', autopct='%1.1f%%', colors=[
+                CORPORATE_COLORS["red"], CORPORATE_COLORS["orange"], CORPORATE_COLORS["yellow"], CORPORATE_COLORS["green"]
+            ], ax=ax3)
+            ax3.set_ylabel("")
+            style_ax(ax3, "Breach Type Distribution")
+            charts["breach_type_dist"] = fig_to_base64(fig3)
 
         # Chart 4
-        time_dev = [r['Time_Deviation_Minutes'] for r in safe_results if r['Time_Deviation_Minutes'] is not None]
-        qty_dev = [r['Quantity_Deviation_Percent'] for r in safe_results]
-        fig4, ax4 = plt.subplots()
-        ax4.scatter(time_dev, qty_dev, c=CORPORATE_COLORS["blue"])
-        style_ax(ax4, "Impact on Time & Yield", "Time Deviation (minutes)", "Quantity Deviation (%)")
-        charts["impact_chart"] = fig_to_base64(fig4)
+        with stage("chart.impact_chart"):
+            time_dev = df_results['Time_Deviation_Minutes'].dropna().tolist()
+            qty_dev = df_results['Quantity_Deviation_Percent'].tolist()
+            fig4, ax4 = plt.subplots()
+            ax4.scatter(time_dev, qty_dev, c=CORPORATE_COLORS["blue"])
+            style_ax(ax4, "Impact on Time & Yield", "Time Deviation (minutes)", "Quantity Deviation (%)")
+            charts["impact_chart"] = fig_to_base64(fig4)
 
         # Chart 5
-        scen_breach_df = df_results.groupby(['Derived_Scenario', 'Breach_Type']).size().unstack(fill_value=0)
-        fig5, ax5 = plt.subplots()
-        scen_breach_df.plot(kind='bar', stacked=True, ax=ax5, color=[
-            CORPORATE_COLORS["green"], CORPORATE_COLORS["red"], CORPORATE_COLORS["orange"], CORPORATE_COLORS["yellow"]
-        ])
-        style_ax(ax5, "Scenario vs Breach Type", ylabel="Number of Orders")
-        charts["scenario_breach_type"] = fig_to_base64(fig5)
+        with stage("chart.scenario_breach_type"):
+            scen_breach_df = df_results.groupby(['Derived_Scenario', 'Breach_Type'], observed=True).size().unstack(fill_value=0)
+            fig5, ax5 = plt.subplots()
+            scen_breach_df.plot(kind='bar', stacked=True, ax=ax5, color=[
+                CORPORATE_COLORS["green"], CORPORATE_COLORS["red"], CORPORATE_COLORS["orange"], CORPORATE_COLORS["yellow"]
+            ])
+            style_ax(ax5, "Scenario vs Breach Type", ylabel="Number of Orders")
+            charts["scenario_breach_type"] = fig_to_base64(fig5)
 
         # Chart 6
-        fig6, ax6 = plt.subplots()
-        ax6.hist(time_dev, bins=15, color=CORPORATE_COLORS["blue"], edgecolor="white")
-        style_ax(ax6, "Time Deviation Distribution", "Minutes", "Frequency")
-        charts["time_dev_dist"] = fig_to_base64(fig6)
-
-        return jsonify({
-            "results": safe_results,
-            "scenario_summary": scenario_summary_json,
-            "chart": chart_base64,
-            "dashboard": charts
-        })
-
+        with stage("chart.time_dev_dist"):
+            fig6, ax6 = plt.subplots()
+            ax6.hist(time_dev, bins=15, color=CORPORATE_COLORS["blue"], edgecolor="white")
+            style_ax(ax6, "Time Deviation Distribution", "Minutes", "Frequency")
+            charts["time_dev_dist"] = fig_to_base64(fig6)
+
+        analysis["charts"] = {"breach_plot": chart_base64, **charts}
+
+        with stage("jsonify"):
+            response = jsonify({
+                "analysis_id": analysis_id,
+                "validation_warnings": problems,
+                "data_quality": convert_types(data_quality),
+                "scenario_inference": convert_types(scenario_inference),
+                "results": safe_results,
+                "scenario_summary": scenario_summary_json,
+                "heavy_hitters": convert_types(heavy_hitters.report(top_k)),
+                "chart": chart_base64,
+                "dashboard": charts
+            })
+        peak = peak_rss.end(rss_window)
+        if peak is not None:
+            record_peak_rss(peak)
+            response.headers['X-Peak-RSS-MB'] = f"{peak:.1f}"
+        app.logger.info("analysis %s: %d rows, %d cases, RSS %.1f MB at start, peak %s",
+                        analysis_id, len(df), len(case_results), start_rss or 0,
+                        "n/a (overlapping requests)" if peak is None else f"{peak:.1f} MB")
+        return response
+
+    except AdmissionRejected as e:
+        return jsonify({"error": str(e), "retry_after": e.retry_after}), 429, {'Retry-After': str(e.retry_after)}
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    finally:
+        peak_rss.end(rss_window)
+        if ticket is not None:
+            admission.release(ticket)
+
+@app.route('/analysis/<analysis_id>/cube', methods=['GET'])
+def query_breach_cube(analysis_id):
+    analysis = get_analysis(analysis_id)
+    if analysis is None:
+        return jsonify({"error": f"Unknown analysis_id: {analysis_id}"}), 404
+
+    # ?group_by=Customer_ID,Breach_Type&Derived_Scenario=SCE002&Export_Flag=2
+    group_by = [dim for dim in request.args.get('group_by', '').split(',') if dim]
+    filters = {dim: values.split(',') for dim, values in request.args.items() if dim != 'group_by'}
+    try:
+        cells = query_cube(analysis["cube"], group_by, filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "group_by": group_by,
+        "filters": filters,
+        "cells": convert_types(cells.to_dict(orient='records'))
+    })
+
+@app.route('/analysis/<analysis_id>/heavy-hitters', methods=['GET'])
+def top_heavy_hitters(analysis_id):
+    analysis = get_analysis(analysis_id)
+    if analysis is None:
+        return jsonify({"error": f"Unknown analysis_id: {analysis_id}"}), 404
+    top_k = request.args.get('k', 10, type=int)
+    return jsonify(convert_types(analysis["heavy_hitters"].report(top_k)))
+
+@app.route('/analysis/<analysis_id>/results', methods=['GET'])
+def stored_results(analysis_id):
+    analysis = get_analysis(analysis_id)
+    if analysis is None:
+        return jsonify({"error": f"Unknown analysis_id: {analysis_id}"}), 404
+    requested = [f for f in request.args.get('fields', '').split(',') if f]
+    try:
+        fields = select_fields(request.args.get('profile', 'full'), requested)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # The ETag is known without rendering: results digest + field list
+    etag = content_digest(analysis["results_digest"], ",".join(fields))
+    return cached_response(etag, lambda: app.json.dumps({
+        "analysis_id": analysis_id,
+        "results": convert_types(analysis["results"].to_records(fields))
+    }), 'application/json')
+
+@app.route('/analysis/<analysis_id>/charts/<name>', methods=['GET'])
+def stored_chart(analysis_id, name):
+    analysis = get_analysis(analysis_id)
+    if analysis is None or name not in analysis.get("charts", {}):
+        return jsonify({"error": f"Unknown chart {name} for analysis_id: {analysis_id}"}), 404
+    png = base64.b64decode(analysis["charts"][name].split(",", 1)[1])
+    return cached_response(content_digest(png), lambda: png, 'image/png')
+
+@app.route('/analysis/<analysis_id>/alignments', methods=['GET'])
+def variant_alignments(analysis_id):
+    analysis = get_analysis(analysis_id)
+    if analysis is None:
+        return jsonify({"error": f"Unknown analysis_id: {analysis_id}"}), 404
+    # ?k=20&scenario=SCE002: most frequent variants with their optimal alignments
+    results = analysis["results"]
+    report = results.alignments.report(results.vocabulary, request.args.get('k', 20, type=int),
+                                       request.args.get('scenario'))
+    return jsonify(convert_types(report))
+
+@app.route('/analysis/<analysis_id>/dfg', methods=['GET'])
+def directly_follows_graph(analysis_id):
+    analysis = get_analysis(analysis_id)
+    if analysis is None:
+        return jsonify({"error": f"Unknown analysis_id: {analysis_id}"}), 404
+    # ?scenario=SCE002 | ?by_scenario=1, and ?min_count=5 to drop rare edges
+    report = dfg_report(analysis["dfg"], request.args.get('scenario'),
+                        request.args.get('by_scenario', '0') in ('1', 'true'),
+                        request.args.get('min_count', 1, type=int))
+    return jsonify(convert_types(report))
+
+@app.route('/analysis/<analysis_id>/performance', methods=['GET'])
+def step_performance(analysis_id):
+    analysis = get_analysis(analysis_id)
+    if analysis is None:
+        return jsonify({"error": f"Unknown analysis_id: {analysis_id}"}), 404
+    # ?scenario=SCE002 | ?by_scenario=1, and ?quantiles=0.5,0.95 instead of p50/p90/p99
+    try:
+        quantiles = tuple(float(q) for q in request.args.get('quantiles', '').split(',') if q) or PERFORMANCE_QUANTILES
+    except ValueError:
+        return jsonify({"error": "quantiles must be numbers between 0 and 1"}), 400
+    if not all(0 <= q <= 1 for q in quantiles):
+        return jsonify({"error": "quantiles must be numbers between 0 and 1"}), 400
+    report = analysis["performance"].report(request.args.get('scenario'),
+                                            request.args.get('by_scenario', '0') in ('1', 'true'), quantiles)
+    return jsonify(convert_types(report))
+
+@app.route('/analysis/<analysis_id>/outliers', methods=['GET'])
+def top_outliers(analysis_id):
+    analysis = get_analysis(analysis_id)
+    if analysis is None:
+        return jsonify({"error": f"Unknown analysis_id: {analysis_id}"}), 404
+    # ?n=50&scenario=SCE002: cases ranked by Anomaly_Score, from the stored ranking
+    ranking = analysis["outliers"]
+    cases = analysis["results"].frame.iloc[ranking.top(request.args.get('n', OUTLIER_TOP_N, type=int),
+                                                       request.args.get('scenario'))]
+    return jsonify(convert_types({
+        "threshold": ranking.threshold,
+        "flagged": ranking.flagged,
+        "cases": cases[OUTLIER_FIELDS].to_dict(orient='records'),
+    }))
+
+@app.route('/analysis/<analysis_id>/attribution', methods=['GET'])
+def breach_attribution(analysis_id):
+    analysis = get_analysis(analysis_id)
+    if analysis is None:
+        return jsonify({"error": f"Unknown analysis_id: {analysis_id}"}), 404
+    # ?attribute=Customer_ID&breach_type=Missing&by=lift|chi2&k=20&min_cases=5
+    try:
+        report = analysis["attribution"].report(
+            request.args.get('attribute'), request.args.get('breach_type', ANY_BREACH),
+            request.args.get('by', 'lift'), request.args.get('k', 20, type=int),
+            request.args.get('min_cases', ATTRIBUTION_MIN_CASES, type=int))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(convert_types(report))
+
+@app.route('/analysis/<analysis_id>/export.csv', methods=['GET'])
+def export_csv(analysis_id):
+    analysis = get_analysis(analysis_id)
+    if analysis is None:
+        return jsonify({"error": f"Unknown analysis_id: {analysis_id}"}), 404
+    # Streamed batch by batch, so memory stays flat however many cases there are
+    return Response(stream_with_context(iter_report_csv(analysis["results"])), mimetype='text/csv',
+                    headers={'Content-Disposition': 'attachment; filename=breach_report.csv'})
+
+@app.route('/analysis/<analysis_id>/export.xlsx', methods=['GET'])
+def export_xlsx(analysis_id):
+    analysis = get_analysis(analysis_id)
+    if analysis is None:
+        return jsonify({"error": f"Unknown analysis_id: {analysis_id}"}), 404
+    # The workbook is zipped on save, so it goes through a temp file that is
+    # unlinked right away and streamed from the open handle
+    with tempfile.NamedTemporaryFile(suffix=".xlsx", dir=UPLOAD_SPOOL_DIR, delete=False) as tmp:
+        path = tmp.name
+    try:
+        write_report_xlsx(analysis["results"], path)
+        workbook = open(path, "rb")
+    finally:
+        os.unlink(path)
+    return send_file(workbook, as_attachment=True, download_name='breach_report.xlsx',
+                     mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+@app.route('/compare', methods=['POST'])
+def compare_logs():
+    # Baseline and current each come as an upload (files `baseline`, `current`)
+    # or as a stored analysis (`baseline_id`, `current_id`). An uploaded current
+    # log is only re-analysed for cases whose rows differ from the baseline's.
+    # Tracked so an analysis running alongside does not report this one's memory.
+    rss_window = peak_rss.begin()
+    ticket = None
+    try:
+        sides, uploads = {}, {}
+        for side in ("baseline", "current"):
+            analysis_id = request.values.get(f"{side}_id")
+            if analysis_id:
+                analysis = get_analysis(analysis_id)
+                if analysis is None:
+                    return jsonify({"error": f"Unknown analysis_id: {analysis_id}"}), 404
+                sides[side] = (analysis["results"].frame, analysis["case_hashes"])
+            elif side in request.files:
+                file = request.files[side]
+                filename, problems, hints, error = validate_upload(file)
+                if error:
+                    return error
+                uploads[side] = (file, filename, hints)
+            else:
+                return jsonify({"error": f"Upload a '{side}' file or pass '{side}_id'"}), 400
+
+        if uploads:
+            client = request.headers.get('X-Client-Id') or request.remote_addr
+            ticket = admission.acquire(client, sum(estimate_memory_mb(upload_size(file), filename)
+                                                   for file, filename, _ in uploads.values()))
+
+        stats = {}
+        if "baseline" in uploads:
+            df = load_event_log(*uploads["baseline"])
+            sides["baseline"] = (analyze_cases(df).frame, case_input_hashes(df))
+            del df
+        if "current" in uploads:
+            df = load_event_log(*uploads["current"])
+            baseline_frame, baseline_hashes = sides["baseline"]
+            frame, hashes, stats = analyze_changed_cases(df, baseline_hashes, baseline_frame)
+            sides["current"] = (frame, hashes)
+
+        with stage("compare"):
+            report = compare_results(sides["baseline"][0], sides["current"][0],
+                                     request.args.get('max_cases', COMPARE_MAX_CASES, type=int))
+        return jsonify(convert_types({**report, **stats}))
+
+    except AdmissionRejected as e:
+        return jsonify({"error": str(e), "retry_after": e.retry_after}), 429, {'Retry-After': str(e.retry_after)}
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        peak_rss.end(rss_window)
+        if ticket is not None:
+            admission.release(ticket)
+
+@app.route('/events', methods=['POST'])
+def ingest_events():
+    # Accepts one step event or a list of them, e.g.
+    # {"order_id": "ORD0001", "item_id": "ITM0001", "scenario": "SCE002", "step": "PR0013", "event": "start"}
+    # A list is applied only if every event in it is valid (400 otherwise)
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return jsonify({"error": "Expected a JSON event or list of events"}), 400
+    events = payload if isinstance(payload, list) else [payload]
+    try:
+        results = online_conformance.ingest_batch(events)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"results": results, **online_conformance.stats()})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # Prometheus text exposition of stage timings, request latency and peak RSS
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/events/cases/<case_id>', methods=['GET'])
+def online_case_state(case_id):
+    state = online_conformance.case_state(case_id)
+    if state is None:
+        return jsonify({"error": f"Unknown case: {case_id}"}), 404
+    return jsonify(state)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=10000, debug=True)
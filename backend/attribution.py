@@ -0,0 +1,132 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+# Case attributes breach types are cross-tabulated against
+ATTRIBUTION_ATTRIBUTES = [
+    "Export_Flag",
+    "Dangerous_Flag",
+    "Customer_ID",
+    "Item_ID",
+    "Derived_Scenario",
+]
+# Pseudo breach type: every breach type except "None"
+ANY_BREACH = "Any Breach"
+
+# Cells with fewer cases are left out of rankings (lift on a handful of cases is noise)
+ATTRIBUTION_MIN_CASES = int(os.environ.get("ATTRIBUTION_MIN_CASES", "5"))
+ATTRIBUTION_RANKINGS = ("lift", "chi2")
+
+def _chi2_sf(x, dof):
+    # P(X >= x) for X ~ chi-square(dof): exact for 1 degree of freedom, the
+    # Wilson-Hilferty normal approximation otherwise
+    x = np.asarray(x, dtype=float)
+    if dof == 1:
+        return np.vectorize(math.erfc, otypes=[float])(np.sqrt(x / 2))
+    z = ((x / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / math.sqrt(2 / (9 * dof))
+    return np.vectorize(math.erfc, otypes=[float])(z / math.sqrt(2)) / 2
+
+class BreachAttribution:
+    # Contingency table (attribute value x breach type -> cases) per attribute.
+    # update() folds in a chunk of case results with one groupby over all
+    # attributes; statistics are computed on first query and cached until the
+    # next update.
+
+    def __init__(self, attributes=ATTRIBUTION_ATTRIBUTES):
+        self.attributes = list(attributes)
+        self.tables = {attribute: pd.DataFrame(dtype=np.int64) for attribute in self.attributes}
+        self._cache = {}
+
+    def update(self, cases):
+        if cases.empty:
+            return self
+        keys = [cases[attribute].astype(object) for attribute in self.attributes]
+        counts = cases.groupby(keys + [cases["Breach_Type"]], dropna=False, sort=False).size()
+        for level, attribute in enumerate(self.attributes):
+            chunk = counts.groupby(level=[level, len(self.attributes)], dropna=False).sum().unstack(fill_value=0)
+            self.tables[attribute] = self.tables[attribute].add(chunk, fill_value=0).fillna(0).astype(np.int64)
+        self._cache.clear()
+        return self
+
+    def merge(self, other):
+        for attribute, table in other.tables.items():
+            self.tables[attribute] = self.tables[attribute].add(table, fill_value=0).fillna(0).astype(np.int64)
+        self._cache.clear()
+        return self
+
+    def _table(self, attribute):
+        table = self.tables[attribute]
+        breach_types = [column for column in table.columns if column != "None"]
+        return table.assign(**{ANY_BREACH: table[breach_types].sum(axis=1)})
+
+    def test(self, attribute):
+        # Chi-square test of independence of the attribute and the breach type
+        key = ("test", attribute)
+        if key not in self._cache:
+            observed = self.tables[attribute].to_numpy(dtype=float)
+            total = observed.sum()
+            rows, cols = observed.shape if observed.size else (0, 0)
+            result = {"attribute": attribute, "cases": int(total), "values": rows, "breach_types": cols}
+            if rows > 1 and cols > 1:
+                expected = np.outer(observed.sum(axis=1), observed.sum(axis=0)) / total
+                chi2 = ((observed - expected) ** 2 / expected).sum()
+                dof = (rows - 1) * (cols - 1)
+                result.update({
+                    "chi2": chi2.item(), "dof": dof, "p_value": _chi2_sf(chi2, dof).item(),
+                    "cramers_v": math.sqrt(chi2 / (total * min(rows - 1, cols - 1))),
+                })
+            self._cache[key] = result
+        return self._cache[key]
+
+    def cells(self, attribute):
+        # Per (value, breach type): lift = P(type | value) / P(type), and the 2x2
+        # chi-square of "has value" vs "has type" with its p-value
+        key = ("cells", attribute)
+        if key not in self._cache:
+            table = self._table(attribute)
+            cases = table.drop(columns=ANY_BREACH).to_numpy(dtype=float).sum()
+            observed = table.to_numpy(dtype=float)
+            value_cases = observed[:, :-1].sum(axis=1, keepdims=True)
+            type_cases = observed.sum(axis=0, keepdims=True)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                base_rate = type_cases / cases
+                lift = observed * cases / (value_cases * type_cases)
+                a, b, c = observed, value_cases - observed, type_cases - observed
+                d = cases - value_cases - type_cases + observed
+                chi2 = cases * (a * d - b * c) ** 2 / (value_cases * (cases - value_cases) * type_cases * (cases - type_cases))
+            cells = pd.DataFrame({
+                "value": np.repeat(table.index.to_numpy(dtype=object), table.shape[1]),
+                "breach_type": np.tile(table.columns.to_numpy(dtype=object), len(table)),
+                "cases": observed.ravel().astype(np.int64),
+                "value_cases": np.repeat(value_cases.ravel(), table.shape[1]).astype(np.int64),
+                "rate": (observed / value_cases).ravel(),
+                "base_rate": np.tile(base_rate.ravel(), len(table)),
+                "lift": lift.ravel(),
+                "chi2": np.nan_to_num(chi2.ravel()),
+            })
+            cells["p_value"] = _chi2_sf(cells["chi2"], 1)
+            self._cache[key] = cells
+        return self._cache[key]
+
+    def ranking(self, attribute=None, breach_type=ANY_BREACH, by="lift", k=20, min_cases=ATTRIBUTION_MIN_CASES):
+        # Top cells for a breach type, over one attribute or all of them
+        if by not in ATTRIBUTION_RANKINGS:
+            raise ValueError(f"Unknown ranking '{by}', expected one of {list(ATTRIBUTION_RANKINGS)}")
+        attributes = self.attributes if attribute is None else [attribute]
+        unknown = [name for name in attributes if name not in self.tables]
+        if unknown:
+            raise ValueError(f"Unknown attributes: {unknown}. Valid attributes: {self.attributes}")
+        frames = [self.cells(name).assign(attribute=name) for name in attributes]
+        cells = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        cells = cells[(cells["breach_type"] == breach_type) & (cells["cases"] >= min_cases)]
+        cells = cells.sort_values([by, "cases"], ascending=False, kind="stable").head(k)
+        return cells[["attribute", "value", "breach_type", "cases", "value_cases", "rate", "base_rate",
+                      "lift", "chi2", "p_value"]].to_dict(orient="records")
+
+    def report(self, attribute=None, breach_type=ANY_BREACH, by="lift", k=20, min_cases=ATTRIBUTION_MIN_CASES):
+        ranking = self.ranking(attribute, breach_type, by, k, min_cases)
+        attributes = self.attributes if attribute is None else [attribute]
+        tests = sorted((self.test(name) for name in attributes), key=lambda t: -t.get("cramers_v", 0))
+        return {"breach_type": breach_type, "ranked_by": by, "tests": tests, "cells": ranking}
@@ -0,0 +1,216 @@
+import hashlib
+import math
+from array import array
+
+import numpy as np
+import pandas as pd
+
+STEP_LIST_FIELDS = ["Missing_Steps", "Out_of_Order_Steps", "Extra_Steps", "Duplicates"]
+STEP_COUNT_FIELDS = {
+    "Missing_Steps": "Missing_Steps_Count",
+    "Out_of_Order_Steps": "Out_of_Order_Steps_Count",
+    "Extra_Steps": "Extra_Steps_Count",
+    "Duplicates": "Duplicate_Steps_Count",
+}
+
+# Public field order of a case result (JSON/CSV edge)
+RESULT_FIELDS = [
+    "Order_ID", "Customer_ID", "Item_ID", "Export_Flag", "Dangerous_Flag",
+    "Derived_Scenario", "Scenario_Used", "Inferred_Scenario", "Inference_Confidence", "Planned_Steps_Count", "As_Is_Steps_Count",
+    "Planned_Start", "Planned_End", "Actual_Start", "Actual_End",
+    "Time_Planned_Minutes", "Time_Actual_Minutes", "Time_Deviation_Minutes",
+    "Missing_Steps_Count", "Out_of_Order_Steps_Count", "Extra_Steps_Count", "Duplicate_Steps_Count",
+    "Missing_Steps", "Out_of_Order_Steps", "Extra_Steps", "Duplicates",
+    "Case_ID", "Breach_Type", "Details",
+    "Total_Yield", "Total_Scrap", "Quantity_Deviation_Percent",
+    "Alignment_Cost", "Fitness",
+    "Time_Deviation_Z", "Scrap_Rate_Z", "Step_Duration_Z", "Outlier_Step", "Anomaly_Score",
+]
+
+TIMESTAMP_FIELDS = ["Planned_Start", "Planned_End", "Actual_Start", "Actual_End"]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M"
+
+RECORD_BATCH_SIZE = 10000
+
+# Fields the client can rebuild from the others: Scenario_Used is Derived_Scenario,
+# Case_ID is Order_ID_Item_ID, the counts are list lengths and Details is the lists
+# as HTML. The lean profile leaves them out.
+DERIVED_FIELDS = ["Scenario_Used", "Case_ID", "Details", *STEP_COUNT_FIELDS.values()]
+RESULT_PROFILES = {
+    "full": RESULT_FIELDS,
+    "lean": [field for field in RESULT_FIELDS if field not in DERIVED_FIELDS],
+}
+
+def select_fields(profile="full", fields=None):
+    # ?fields=a,b (a sparse fieldset, in RESULT_FIELDS order) wins over ?profile=
+    if fields:
+        unknown = [field for field in fields if field not in RESULT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown result fields: {unknown}")
+        return [field for field in RESULT_FIELDS if field in fields]
+    if profile not in RESULT_PROFILES:
+        raise ValueError(f"Unknown profile '{profile}', expected one of {list(RESULT_PROFILES)}")
+    return RESULT_PROFILES[profile]
+
+def format_timestamps(series):
+    formatted = series.dt.strftime(TIMESTAMP_FORMAT)
+    return formatted.astype(object).where(formatted.notna(), None)
+
+def format_details(missing_steps, out_of_order_steps, extra_steps, duplicates):
+    details_parts = []
+    if missing_steps:
+        details_parts.append("<strong>Missing Steps:</strong><ul>" +
+                             ''.join(f"<li>{s}</li>" for s in missing_steps) + "</ul>")
+    if out_of_order_steps:
+        details_parts.append("<strong>Out of Order:</strong><ul>" +
+                             ''.join(f"<li>{s}</li>" for s in out_of_order_steps) + "</ul>")
+    if extra_steps:
+        details_parts.append("<strong>Extra Steps (unexpected):</strong><ul>" +
+                             ''.join(f"<li>{s}</li>" for s in extra_steps) + "</ul>")
+    if duplicates:
+        details_parts.append("<strong>Duplicate Steps:</strong><ul>" +
+                             ''.join(f"<li>{s}</li>" for s in duplicates) + "</ul>")
+    if not details_parts:
+        details_parts.append("<strong>No Breach</strong>")
+    details_parts.append(f"<strong>Counts:</strong> Missing - {len(missing_steps)} | Out-of-Order - {len(out_of_order_steps)} | Extra - {len(extra_steps)} | Duplicates - {len(duplicates)}")
+    return "<br>".join(details_parts)
+
+class StepVocabulary:
+    # Step ID <-> integer code; blank step IDs are coded as -1 and decode to None
+
+    def __init__(self, steps=()):
+        self.steps = []
+        self.codes = {}
+        for step in steps:
+            self.encode(step)
+
+    def encode(self, step):
+        if pd.isna(step):
+            return -1
+        code = self.codes.get(step)
+        if code is None:
+            code = self.codes[step] = len(self.steps)
+            self.steps.append(step)
+        return code
+
+    def decode(self, codes):
+        steps = self.steps
+        return [steps[c] if c >= 0 else None for c in codes]
+
+class CaseResults:
+    """Columnar case results.
+
+    Scalar fields are one column each in `frame`; the four step lists are
+    integer codes into `vocabulary`, stored in one flat array per list with
+    per-case offsets. Dicts, lists and the HTML details are only built by
+    iter_records() when results leave the process.
+    """
+
+    def __init__(self, frame, step_codes, step_offsets, vocabulary, alignments=None):
+        self.frame = frame
+        self.step_codes = step_codes
+        self.step_offsets = step_offsets
+        self.vocabulary = vocabulary
+        self.alignments = alignments  # AlignmentCache of the distinct variants
+
+    def __len__(self):
+        return len(self.frame)
+
+    def steps(self, field, case_index):
+        offsets = self.step_offsets[field]
+        codes = self.step_codes[field][offsets[case_index]:offsets[case_index + 1]]
+        return self.vocabulary.decode(codes.tolist())
+
+    def iter_records(self, batch_size=RECORD_BATCH_SIZE, fields=RESULT_FIELDS):
+        # Only the requested fields are formatted; Details needs all four lists
+        wanted = set(fields)
+        list_fields = STEP_LIST_FIELDS if "Details" in wanted else [f for f in STEP_LIST_FIELDS if f in wanted]
+        columns = [f for f in self.frame.columns if f in wanted]
+        columns += [f for f in ("Order_ID", "Item_ID") if "Case_ID" in wanted and f not in wanted]
+        columns += ["Derived_Scenario"] if "Scenario_Used" in wanted and "Derived_Scenario" not in wanted else []
+        for start in range(0, len(self.frame), batch_size):
+            batch = self.frame.iloc[start:start + batch_size][columns].copy()
+            for field in TIMESTAMP_FIELDS:
+                if field in wanted:
+                    batch[field] = format_timestamps(batch[field])
+            for offset, row in enumerate(batch.to_dict(orient='records')):
+                i = start + offset
+                lists = {field: self.steps(field, i) for field in list_fields}
+                if "Scenario_Used" in wanted:
+                    row["Scenario_Used"] = row["Derived_Scenario"]
+                if "Case_ID" in wanted:
+                    row["Case_ID"] = f"{row['Order_ID']}_{row['Item_ID']}"
+                if "Details" in wanted:
+                    # Blank step IDs have always been rendered as "nan" in the details
+                    row["Details"] = format_details(*(
+                        ["nan" if s is None else s for s in lists[field]] for field in STEP_LIST_FIELDS))
+                row.update(lists)
+                yield {field: row[field] for field in fields}
+
+    def to_records(self, fields=RESULT_FIELDS):
+        return list(self.iter_records(fields=fields))
+
+    def digest(self):
+        # Content hash of the results, the base of their ETags
+        h = hashlib.blake2b(digest_size=16)
+        h.update(pd.util.hash_pandas_object(self.frame, index=False).to_numpy().tobytes())
+        for field in STEP_LIST_FIELDS:
+            h.update(self.step_codes[field].tobytes())
+            h.update(self.step_offsets[field].tobytes())
+        h.update("\0".join(map(str, self.vocabulary.steps)).encode())
+        return h.hexdigest()
+
+    def nbytes(self):
+        arrays = sum(a.nbytes for a in self.step_codes.values()) + sum(a.nbytes for a in self.step_offsets.values())
+        return int(self.frame.memory_usage(deep=True).sum()) + arrays
+
+class CaseResultsBuilder:
+    def __init__(self, vocabulary, alignments=None):
+        self.vocabulary = vocabulary
+        self.alignments = alignments
+        self.alignment_costs = array('d')
+        self.fitness = array('d')
+        self.planned_counts = array('i')
+        self.actual_counts = array('i')
+        self.breach_types = []
+        self.variants = []
+        self.step_codes = {field: array('i') for field in STEP_LIST_FIELDS}
+        self.step_counts = {field: array('i') for field in STEP_LIST_FIELDS}
+
+    def append(self, planned_count, actual_count, breach_type, variant, step_lists, alignment=None):
+        self.planned_counts.append(planned_count)
+        # alignment is (cost, fitness); NaN when not computed or the search bound was hit
+        cost, fitness = alignment or (None, None)
+        self.alignment_costs.append(math.nan if cost is None else cost)
+        self.fitness.append(math.nan if fitness is None else fitness)
+        self.actual_counts.append(actual_count)
+        self.breach_types.append(breach_type)
+        self.variants.append(variant)
+        # Step lists arrive as codes of the shared vocabulary
+        for field, codes in zip(STEP_LIST_FIELDS, step_lists):
+            self.step_codes[field].extend(codes)
+            self.step_counts[field].append(len(codes))
+
+    def build(self, headers):
+        # `headers` is aggregate_case_headers() output, one row per appended case
+        frame = headers.reset_index(drop=True)
+        frame["Planned_Steps_Count"] = np.frombuffer(self.planned_counts, dtype=np.int32)
+        frame["As_Is_Steps_Count"] = np.frombuffer(self.actual_counts, dtype=np.int32)
+        frame["Breach_Type"] = pd.Series(self.breach_types, dtype=object)
+        frame["Variant"] = pd.Categorical(self.variants)
+        step_codes, step_offsets = {}, {}
+        for field in STEP_LIST_FIELDS:
+            counts = np.frombuffer(self.step_counts[field], dtype=np.int32)
+            frame[STEP_COUNT_FIELDS[field]] = counts
+            step_codes[field] = np.frombuffer(self.step_codes[field], dtype=np.int32)
+            step_offsets[field] = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+        frame["Alignment_Cost"] = np.frombuffer(self.alignment_costs, dtype=np.float64)
+        frame["Fitness"] = np.frombuffer(self.fitness, dtype=np.float64)
+        # Filled in by backend.anomaly.score_outliers() once the scales are known
+        for field in ("Time_Deviation_Z", "Scrap_Rate_Z", "Step_Duration_Z", "Anomaly_Score"):
+            frame[field] = np.nan
+        frame["Outlier_Step"] = None
+        # Filled in by backend.inference.infer_scenarios()
+        frame["Inferred_Scenario"] = None
+        frame["Inference_Confidence"] = np.nan
+        return CaseResults(frame, step_codes, step_offsets, self.vocabulary, self.alignments)
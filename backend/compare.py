@@ -0,0 +1,123 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from backend.analysis import CASE_KEYS, analyze_cases
+from backend.validation import REQUIRED_COLUMNS
+
+# Changed cases listed in a comparison (all of them are counted)
+COMPARE_MAX_CASES = int(os.environ.get("COMPARE_MAX_CASES", "100"))
+
+RESULT_KEYS = ["Order_ID", "Item_ID"]
+# Case result fields a comparison looks at. They depend on the case's own rows
+# only (unlike the z-scores, which depend on the whole log), so results of
+# unchanged cases can be reused across logs.
+COMPARE_FIELDS = [
+    "Customer_ID", "Derived_Scenario", "Breach_Type",
+    "Planned_Steps_Count", "As_Is_Steps_Count",
+    "Missing_Steps_Count", "Out_of_Order_Steps_Count", "Extra_Steps_Count", "Duplicate_Steps_Count",
+    "Time_Planned_Minutes", "Time_Actual_Minutes", "Time_Deviation_Minutes",
+    "Total_Yield", "Total_Scrap", "Quantity_Deviation_Percent",
+    "Alignment_Cost", "Fitness",
+]
+
+def case_input_hashes(df):
+    # One 64-bit hash per case over its rows and their order within the case:
+    # (row, position) hashes summed per case, so a case hashes the same in any
+    # log it appears in unchanged
+    position = df.groupby(CASE_KEYS, observed=True, sort=False).cumcount()
+    rows = pd.util.hash_pandas_object(df[REQUIRED_COLUMNS].assign(_position=position), index=False)
+    hashes = rows.groupby([df[key] for key in CASE_KEYS], observed=True, sort=True).sum()
+    hashes.index.names = RESULT_KEYS
+    return hashes.rename("Input_Hash").reset_index().astype({key: object for key in RESULT_KEYS})
+
+def _keys(frame, columns):
+    return pd.MultiIndex.from_arrays([frame[column].astype(object) for column in columns])
+
+def analyze_changed_cases(df, baseline_hashes, baseline_frame):
+    # Case results for `df`, re-analysing only cases whose rows differ from the
+    # baseline's; the others are taken from baseline_frame (COMPARE_FIELDS only)
+    hashes = case_input_hashes(df)
+    baseline = baseline_hashes.set_index(RESULT_KEYS)['Input_Hash']
+    matched = baseline.reindex(_keys(hashes, RESULT_KEYS)).to_numpy()
+    unchanged = _keys(hashes, RESULT_KEYS)[matched == hashes['Input_Hash'].to_numpy()]
+
+    reused = baseline_frame[_keys(baseline_frame, RESULT_KEYS).isin(unchanged)]
+    changed_rows = ~_keys(df, CASE_KEYS).isin(unchanged)
+    frames = [reused[RESULT_KEYS + COMPARE_FIELDS]]
+    if changed_rows.any():
+        frames.append(analyze_cases(df[changed_rows]).frame[RESULT_KEYS + COMPARE_FIELDS])
+    frame = pd.concat([f.astype({key: object for key in RESULT_KEYS}) for f in frames], ignore_index=True)
+    return frame, hashes, {"reused_cases": len(reused), "analysed_cases": len(frame) - len(reused)}
+
+def scenario_summary(frame):
+    breaches = (frame['Breach_Type'] != 'None').astype(int)
+    summary = frame.assign(Is_Breach=breaches).groupby(frame['Derived_Scenario'].astype(object)).agg(
+        cases=('Breach_Type', 'size'),
+        breaches=('Is_Breach', 'sum'),
+        time_deviation_minutes=('Time_Deviation_Minutes', 'mean'),
+        total_yield=('Total_Yield', 'sum'),
+        total_scrap=('Total_Scrap', 'sum'),
+    )
+    summary['breach_rate_percent'] = summary['breaches'] / summary['cases'] * 100
+    quantity = (summary['total_yield'] + summary['total_scrap']).replace(0, np.nan)
+    summary['scrap_percent'] = (summary['total_scrap'] / quantity * 100).fillna(0.0)
+    return summary
+
+SUMMARY_MEASURES = ["cases", "breach_rate_percent", "time_deviation_minutes", "total_scrap", "scrap_percent"]
+
+def _same(before, after):
+    # Element-wise equality where two missing values are equal
+    before, after = pd.Series(before, dtype=object), pd.Series(after, dtype=object)
+    return (before == after).to_numpy() | (before.isna() & after.isna()).to_numpy()
+
+def _json_value(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+def compare_results(baseline_frame, current_frame, max_cases=COMPARE_MAX_CASES):
+    # Per-scenario deltas plus the cases that were added, removed or changed
+    base = scenario_summary(baseline_frame)
+    current = scenario_summary(current_frame)
+    scenarios = []
+    for scenario in sorted(base.index.union(current.index), key=str):
+        row = {"scenario": scenario}
+        for measure in SUMMARY_MEASURES:
+            before = base[measure].get(scenario, np.nan)
+            after = current[measure].get(scenario, np.nan)
+            row[measure] = {"baseline": _json_value(before), "current": _json_value(after),
+                            "delta": _json_value(after - before)}
+        scenarios.append(row)
+
+    # Case diff on result hashes, then field-by-field only for changed cases
+    def hashed(frame):
+        return pd.Series(pd.util.hash_pandas_object(frame[COMPARE_FIELDS].astype(object), index=False).to_numpy(),
+                         index=_keys(frame, RESULT_KEYS))
+    before_hash, after_hash = hashed(baseline_frame), hashed(current_frame)
+    common = before_hash.index.intersection(after_hash.index)
+    changed = common[before_hash.reindex(common).to_numpy() != after_hash.reindex(common).to_numpy()]
+
+    before = baseline_frame.set_index(_keys(baseline_frame, RESULT_KEYS)).loc[changed[:max_cases], COMPARE_FIELDS]
+    after = current_frame.set_index(_keys(current_frame, RESULT_KEYS)).loc[changed[:max_cases], COMPARE_FIELDS]
+    same = {field: _same(before[field].to_numpy(), after[field].to_numpy()) for field in COMPARE_FIELDS}
+    changed_cases = []
+    for i, (order_id, item_id) in enumerate(changed[:max_cases]):
+        changes = {field: {"baseline": _json_value(before[field].iat[i]), "current": _json_value(after[field].iat[i])}
+                   for field in COMPARE_FIELDS if not same[field][i]}
+        changed_cases.append({"Order_ID": order_id, "Item_ID": item_id, "changes": changes})
+
+    return {
+        "scenarios": scenarios,
+        "cases": {
+            "baseline": len(before_hash),
+            "current": len(after_hash),
+            "added": len(after_hash.index.difference(before_hash.index)),
+            "removed": len(before_hash.index.difference(after_hash.index)),
+            "changed": len(changed),
+            "unchanged": len(common) - len(changed),
+        },
+        "changed_cases": changed_cases,
+    }
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# Dimensions of the precomputed breach cube (case result field names)
+CUBE_DIMENSIONS = [
+    "Derived_Scenario",
+    "Breach_Type",
+    "Customer_ID",
+    "Item_ID",
+    "Export_Flag",
+    "Dangerous_Flag",
+    "Planned_Day",
+]
+
+# Additive measures only, so any roll-up is a plain sum over cube cells
+CUBE_MEASURES = [
+    "Num_Cases",
+    "Num_Breaches",
+    "Sum_Time_Deviation_Minutes",
+    "Num_Time_Deviation",
+    "Sum_Missing_Steps",
+    "Sum_Out_of_Order_Steps",
+    "Sum_Total_Yield",
+    "Sum_Total_Scrap",
+]
+
+def build_breach_cube(df_results):
+    if df_results.empty:
+        return pd.DataFrame(columns=CUBE_DIMENSIONS + CUBE_MEASURES)
+
+    cases = df_results.assign(
+        Planned_Day=df_results["Planned_Start"].dt.strftime("%Y-%m-%d"),
+        Is_Breach=(df_results["Breach_Type"] != "None").astype(int),
+    )
+    cube = cases.groupby(CUBE_DIMENSIONS, dropna=False, sort=False, observed=True).agg(
+        Num_Cases=("Order_ID", "size"),
+        Num_Breaches=("Is_Breach", "sum"),
+        Sum_Time_Deviation_Minutes=("Time_Deviation_Minutes", "sum"),
+        Num_Time_Deviation=("Time_Deviation_Minutes", "count"),
+        Sum_Missing_Steps=("Missing_Steps_Count", "sum"),
+        Sum_Out_of_Order_Steps=("Out_of_Order_Steps_Count", "sum"),
+        Sum_Total_Yield=("Total_Yield", "sum"),
+        Sum_Total_Scrap=("Total_Scrap", "sum"),
+    ).reset_index()
+
+    # Query parameters arrive as strings; keep a string view of every dimension
+    # so filters are a single isin() per dimension. Whole-number floats (an int
+    # column with a NaN in the log) go through Int64 so 2.0 is labelled "2".
+    for dim in CUBE_DIMENSIONS:
+        values = cube[dim]
+        if pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+            values = values.astype("Int64")
+        cube[dim] = values.astype("string").astype("category")
+    return cube
+
+def query_cube(cube, group_by=None, filters=None):
+    group_by = group_by or []
+    filters = filters or {}
+    unknown = [dim for dim in list(group_by) + list(filters) if dim not in CUBE_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown cube dimensions: {unknown}. Valid dimensions: {CUBE_DIMENSIONS}")
+
+    view = cube
+    for dim, values in filters.items():
+        view = view[view[dim].isin(values)]
+
+    if group_by:
+        rolled = view.groupby(group_by, observed=True, dropna=False)[CUBE_MEASURES].sum().reset_index()
+        for dim in group_by:
+            rolled[dim] = rolled[dim].astype(object).where(rolled[dim].notna(), None)
+    else:
+        rolled = pd.DataFrame({measure: [view[measure].sum()] for measure in CUBE_MEASURES})
+
+    num_cases = rolled["Num_Cases"].replace(0, np.nan)
+    num_time = rolled["Num_Time_Deviation"].replace(0, np.nan)
+    total_qty = (rolled["Sum_Total_Yield"] + rolled["Sum_Total_Scrap"]).replace(0, np.nan)
+    rolled["Breach_Rate_Percent"] = rolled["Num_Breaches"] / num_cases * 100
+    rolled["Avg_Time_Deviation_Minutes"] = rolled["Sum_Time_Deviation_Minutes"] / num_time
+    rolled["Scrap_Percent"] = (rolled["Sum_Total_Scrap"] / total_qty * 100).fillna(0.0)
+    return rolled
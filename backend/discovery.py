@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from backend.analysis import CASE_KEYS
+from backend.encoding import encode_event_log, is_encoded
+
+AS_IS_STEP = 'As-Is-Master-Order-Processing-Position-No. as an ID'
+AS_IS_POSITION = 'As-Is-Real-Order-Processing-Ongoing Position No.'
+AS_IS_START = 'As-Is-Real-Order-Processing-Start-Time'
+AS_IS_END = 'As-Is-Real-Order-Processing-End-Time'
+SCENARIO = 'Planed-Master-Scenario-No.'
+
+# Artificial nodes: every case starts at START and ends at END
+START, END = "[start]", "[end]"
+_START_CODE, _END_CODE = -2, -3
+
+def as_is_events(df):
+    # Rows that actually ran (an as-is step is set), in trace order within each case
+    if not is_encoded(df):
+        df = encode_event_log(df.copy())
+    return df.dropna(subset=CASE_KEYS + [AS_IS_STEP]).sort_values(CASE_KEYS + [AS_IS_POSITION], kind='stable')
+
+def case_starts(events):
+    # True on the first event of each case of the sorted as_is_events() frame
+    order = events[CASE_KEYS[0]].cat.codes.to_numpy()
+    item = events[CASE_KEYS[1]].cat.codes.to_numpy()
+    new_case = np.ones(len(events), dtype=bool)
+    new_case[1:] = (order[1:] != order[:-1]) | (item[1:] != item[:-1])
+    return new_case
+
+def _edges(events):
+    # One sort, then whole-column shifts: row i -> row i+1 is an edge when both
+    # belong to the same case. Transition time is the next start minus this end.
+    steps = events[AS_IS_STEP].cat.codes.to_numpy().astype(np.int64)
+    scenarios = events[SCENARIO].cat.codes.to_numpy()
+    minutes = (events[AS_IS_START].to_numpy()[1:] - events[AS_IS_END].to_numpy()[:-1]) / np.timedelta64(1, 'm')
+
+    new_case = case_starts(events)
+    last_of_case = np.append(new_case[1:], True)
+    follows = ~new_case[1:]
+
+    source = np.concatenate([steps[:-1][follows], np.full(new_case.sum(), _START_CODE), steps[last_of_case]])
+    target = np.concatenate([steps[1:][follows], steps[new_case], np.full(last_of_case.sum(), _END_CODE)])
+    scenario = np.concatenate([scenarios[:-1][follows], scenarios[new_case], scenarios[last_of_case]])
+    duration = np.concatenate([minutes[follows], np.full(new_case.sum() + last_of_case.sum(), np.nan)])
+    return source, target, scenario, duration
+
+def _labels(codes, categories):
+    labels = list(categories) + [START, END]
+    codes = np.where(codes == _START_CODE, len(categories), np.where(codes == _END_CODE, len(categories) + 1, codes))
+    return pd.Categorical.from_codes(codes, labels)
+
+def _edge_stats(edges, keys):
+    stats = edges.groupby(keys, observed=True, sort=True)['Transition_Minutes'].agg(
+        Count='size', Mean_Minutes='mean', Median_Minutes='median').reset_index()
+    return stats.sort_values(keys[:-2] + ['Count'], ascending=[True] * (len(keys) - 2) + [False], kind='stable')
+
+def build_dfg(df):
+    # Directly-follows graph of the as-is traces, overall and per scenario,
+    # with transition-time statistics
+    events = as_is_events(df)
+    steps = events[AS_IS_STEP].cat.categories
+    scenarios = events[SCENARIO].cat.categories
+    if events.empty:
+        source = target = scenario = np.array([], dtype=np.int64)
+        duration = np.array([], dtype=float)
+    else:
+        source, target, scenario, duration = _edges(events)
+
+    edges = pd.DataFrame({
+        'Scenario': pd.Categorical.from_codes(scenario, scenarios),
+        'Source': _labels(source, steps),
+        'Target': _labels(target, steps),
+        'Transition_Minutes': duration,
+    })
+    nodes = events.groupby([SCENARIO, AS_IS_STEP], observed=True).size().rename('Count').reset_index()
+    nodes.columns = ['Scenario', 'Step', 'Count']
+    return {
+        "edges": _edge_stats(edges, ['Source', 'Target']),
+        "scenario_edges": _edge_stats(edges, ['Scenario', 'Source', 'Target']),
+        "nodes": nodes.groupby('Step', observed=True)['Count'].sum().sort_values(ascending=False).reset_index(),
+        "scenario_nodes": nodes.sort_values(['Scenario', 'Count'], ascending=[True, False], kind='stable'),
+        "cases": int((edges['Source'] == START).sum()),
+    }
+
+def _graph(edges, nodes, min_count):
+    edges = edges[edges['Count'] >= min_count]
+    return {
+        "nodes": nodes[['Step', 'Count']].astype({'Step': str}).to_dict(orient='records'),
+        "edges": edges[['Source', 'Target', 'Count', 'Mean_Minutes', 'Median_Minutes']]
+        .astype({'Source': str, 'Target': str}).to_dict(orient='records'),
+    }
+
+def dfg_report(dfg, scenario=None, by_scenario=False, min_count=1):
+    if scenario is not None:
+        edges = dfg["scenario_edges"][dfg["scenario_edges"]['Scenario'] == scenario]
+        nodes = dfg["scenario_nodes"][dfg["scenario_nodes"]['Scenario'] == scenario]
+        return {"scenario": scenario, **_graph(edges, nodes, min_count)}
+    if by_scenario:
+        return {"scenarios": {
+            str(name): _graph(dfg["scenario_edges"][dfg["scenario_edges"]['Scenario'] == name],
+                              dfg["scenario_nodes"][dfg["scenario_nodes"]['Scenario'] == name], min_count)
+            for name in dfg["scenario_nodes"]['Scenario'].unique()
+        }}
+    return {"cases": dfg["cases"], **_graph(dfg["edges"], dfg["nodes"], min_count)}
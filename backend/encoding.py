@@ -0,0 +1,52 @@
+import pandas as pd
+
+from backend.case_results import StepVocabulary
+from backend.utils import SCENARIO_STEPS
+
+ID_COLUMNS = [
+    'Order-No.',
+    'Customer-No.',
+    'Item-No.',
+    'Planed-Master-Scenario-No.',
+]
+STEP_ID_COLUMNS = [
+    'Planed-Master-Order-Processing-Position-No. as an ID',
+    'As-Is-Master-Order-Processing-Position-No. as an ID',
+]
+
+# Reference steps always get the first codes, in SCENARIO_STEPS order
+REFERENCE_STEPS = list(dict.fromkeys(step for steps in SCENARIO_STEPS.values() for step in steps))
+
+def encode_event_log(df):
+    # Dictionary-encode the ID columns at ingest: each becomes a pandas
+    # categorical (integer codes + vocabulary). Groupbys, sorts and membership
+    # tests downstream then run on the codes; the vocabularies decode at output.
+    for col in ID_COLUMNS:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+    # Both step-ID columns share one vocabulary so planned and as-is codes compare directly
+    vocabulary = StepVocabulary(REFERENCE_STEPS)
+    for col in STEP_ID_COLUMNS:
+        values = df[col].cat.categories if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].dropna().unique()
+        for step in sorted(values, key=str):
+            vocabulary.encode(step)
+    # Recode explicitly: astype() is a no-op for a categorical with the same
+    # categories in another order, since unordered dtypes compare equal then
+    for col in STEP_ID_COLUMNS:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.set_categories(vocabulary.steps)
+        else:
+            df[col] = pd.Categorical(df[col], categories=vocabulary.steps)
+    return df
+
+def is_encoded(df):
+    return all(isinstance(df[col].dtype, pd.CategoricalDtype) for col in ID_COLUMNS + STEP_ID_COLUMNS)
+
+def step_vocabulary(df):
+    # Shared step vocabulary of an encoded log; codes match the categorical codes
+    return StepVocabulary(df[STEP_ID_COLUMNS[0]].cat.categories)
+
+def compile_scenarios(vocabulary):
+    # SCENARIO_STEPS as lists of step codes
+    return {scenario: [vocabulary.encode(step) for step in steps] for scenario, steps in SCENARIO_STEPS.items()}
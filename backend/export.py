@@ -0,0 +1,113 @@
+import csv
+import io
+import math
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import CellIsRule, FormulaRule
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+from backend.case_results import RECORD_BATCH_SIZE
+
+# Breach report layout, (header, field): the columns of the UI's "Download Report CSV"
+REPORT_COLUMNS = [
+    ("Order ID", "Order_ID"), ("Item ID", "Item_ID"), ("Customer ID", "Customer_ID"),
+    ("Export Flag", "Export_Flag"), ("Dangerous Flag", "Dangerous_Flag"),
+    ("Derived Scenario", "Derived_Scenario"), ("Scenario Used", "Scenario_Used"),
+    ("Planned Steps Count", "Planned_Steps_Count"), ("As-Is Steps Count", "As_Is_Steps_Count"),
+    ("Planned Start", "Planned_Start"), ("Planned End", "Planned_End"),
+    ("Actual Start", "Actual_Start"), ("Actual End", "Actual_End"),
+    ("Time Planned Minutes", "Time_Planned_Minutes"), ("Time Actual Minutes", "Time_Actual_Minutes"),
+    ("Time Deviation Minutes", "Time_Deviation_Minutes"),
+    ("Case ID", "Case_ID"), ("Breach Type", "Breach_Type"), ("Details", "Details"),
+    ("Final Yield Quantity", "Total_Yield"), ("Total Scrap Quantity", "Total_Scrap"),
+    ("Quantity Deviation Percent", "Quantity_Deviation_Percent"),
+]
+# Shown with two decimals, like formatNumber() in the UI
+ROUNDED_FIELDS = {"Time_Planned_Minutes", "Time_Actual_Minutes", "Time_Deviation_Minutes", "Quantity_Deviation_Percent"}
+
+# In the workbook the HTML details become plain step-list columns
+STEP_LIST_COLUMNS = [
+    ("Missing Steps", "Missing_Steps"), ("Out of Order Steps", "Out_of_Order_Steps"),
+    ("Extra Steps", "Extra_Steps"), ("Duplicate Steps", "Duplicates"),
+]
+XLSX_COLUMNS = [column for header, field in REPORT_COLUMNS
+                for column in (STEP_LIST_COLUMNS if field == "Details" else [(header, field)])]
+
+CSV_CHUNK_BYTES = 1 << 16
+
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+HEADER_FILL = PatternFill("solid", fgColor="4F81BD")
+GREEN_FILL = PatternFill("solid", fgColor="C6EFCE")
+RED_FILL = PatternFill("solid", fgColor="FFC7CE")
+ORANGE_FILL = PatternFill("solid", fgColor="FCE4D6")
+YELLOW_FILL = PatternFill("solid", fgColor="FFF2CC")
+
+def _cell_value(field, value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if field in ROUNDED_FIELDS:
+        return round(value, 2)
+    if isinstance(value, list):
+        return ", ".join("nan" if step is None else step for step in value)
+    return value
+
+def _csv_value(field, value):
+    value = _cell_value(field, value)
+    if value is None:
+        return ""
+    return f"{value:.2f}" if field in ROUNDED_FIELDS else value
+
+def iter_report_csv(case_results, batch_size=RECORD_BATCH_SIZE):
+    # CSV text in ~64 KB chunks; only one batch of records is alive at a time
+    fields = [field for _, field in REPORT_COLUMNS]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for header, _ in REPORT_COLUMNS])
+    for record in case_results.iter_records(batch_size, fields=fields):
+        writer.writerow([_csv_value(field, record[field]) for field in fields])
+        if buffer.tell() >= CSV_CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def write_report_xlsx(case_results, path, batch_size=RECORD_BATCH_SIZE):
+    # Write-only workbook: rows go straight to a temp XML file instead of being
+    # held as cell objects. Colours are conditional-format rules over whole
+    # columns, so styling costs nothing per row.
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Breach Report")
+    fields = [field for _, field in XLSX_COLUMNS]
+    letters = {field: get_column_letter(i + 1) for i, field in enumerate(fields)}
+    last_row = len(case_results) + 1
+
+    sheet.freeze_panes = "A2"
+    sheet.auto_filter.ref = f"A1:{get_column_letter(len(fields))}{last_row}"
+    for field, letter in letters.items():
+        sheet.column_dimensions[letter].width = 24 if field.endswith("Steps") or field == "Duplicates" else 16
+
+    def column(field):
+        return f"{letters[field]}2:{letters[field]}{last_row}"
+
+    rules = sheet.conditional_formatting
+    breach = letters["Breach_Type"]
+    rules.add(column("Breach_Type"), FormulaRule(formula=[f'{breach}2="None"'], fill=GREEN_FILL))
+    rules.add(column("Breach_Type"), FormulaRule(formula=[f'AND({breach}2<>"None",{breach}2<>"")'], fill=RED_FILL))
+    rules.add(column("Time_Deviation_Minutes"), CellIsRule(operator="greaterThan", formula=["0"], fill=ORANGE_FILL))
+    rules.add(column("Total_Scrap"), CellIsRule(operator="greaterThan", formula=["0"], fill=RED_FILL))
+    rules.add(column("Quantity_Deviation_Percent"), CellIsRule(operator="greaterThan", formula=["0"], fill=RED_FILL))
+    for field in ("Missing_Steps", "Out_of_Order_Steps", "Extra_Steps", "Duplicates"):
+        rules.add(column(field), FormulaRule(formula=[f'LEN({letters[field]}2)>0'], fill=YELLOW_FILL))
+
+    header = []
+    for title, _ in XLSX_COLUMNS:
+        cell = WriteOnlyCell(sheet, value=title)
+        cell.font = HEADER_FONT
+        cell.fill = HEADER_FILL
+        header.append(cell)
+    sheet.append(header)
+    for record in case_results.iter_records(batch_size, fields=fields):
+        sheet.append([_cell_value(field, record[field]) for field in fields])
+    workbook.save(path)
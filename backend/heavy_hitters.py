@@ -0,0 +1,142 @@
+import heapq
+import itertools
+import os
+
+# Number of keys each summary tracks; memory is O(capacity) regardless of how
+# many distinct customers/items/variants the log contains.
+HEAVY_HITTER_CAPACITY = int(os.environ.get("HEAVY_HITTER_CAPACITY", "1000"))
+
+# Report name -> case result column the keys come from
+HEAVY_HITTER_KEYS = {
+    "customers": "Customer_ID",
+    "items": "Item_ID",
+    "variants": "Variant",
+}
+
+# Report name -> per-case weight
+HEAVY_HITTER_MEASURES = {
+    "breaches": lambda cases: (cases["Breach_Type"] != "None").astype(int),
+    "scrap": lambda cases: cases["Total_Scrap"].fillna(0),
+}
+
+class SpaceSaving:
+    """Space-Saving top-k summary (Metwally et al.), mergeable (Cafaro et al.).
+
+    A tracked key's count over-estimates its true weight by at most its error,
+    and any untracked key has a true weight of at most `floor()`.
+    """
+
+    def __init__(self, capacity=HEAVY_HITTER_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        # (count, tie-breaker, key): keys need not be orderable among themselves
+        self._heap = []
+        self._order = itertools.count()
+
+    def floor(self):
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def update(self, key, weight=1):
+        if weight <= 0:
+            return
+        self.total += weight
+        if key in self.counts:
+            self.counts[key] += weight
+            return
+        error = 0
+        if len(self.counts) >= self.capacity:
+            victim, error = self._pop_min()
+            del self.counts[victim]
+            del self.errors[victim]
+        self.counts[key] = error + weight
+        self.errors[key] = error
+        heapq.heappush(self._heap, (self.counts[key], next(self._order), key))
+
+    def _pop_min(self):
+        # Heap entries go stale when counts grow; refresh them lazily
+        while True:
+            count, _, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                return key, count
+            if key in self.counts:
+                heapq.heappush(self._heap, (self.counts[key], next(self._order), key))
+
+    def update_counts(self, weights):
+        # Fold an exactly pre-aggregated chunk (key -> weight Series) into the summary
+        weights = weights[weights > 0]
+        chunk = SpaceSaving(self.capacity)
+        top = weights.nlargest(self.capacity)
+        chunk.counts = {k: v.item() if hasattr(v, "item") else v for k, v in top.items()}
+        chunk.errors = dict.fromkeys(chunk.counts, 0)
+        chunk.total = weights.sum().item()
+        self.merge(chunk)
+
+    def merge(self, other):
+        floor_self, floor_other = self.floor(), other.floor()
+        counts, errors = {}, {}
+        for key in self.counts.keys() | other.counts.keys():
+            counts[key] = self.counts.get(key, floor_self) + other.counts.get(key, floor_other)
+            errors[key] = self.errors.get(key, floor_self) + other.errors.get(key, floor_other)
+        if len(counts) > self.capacity:
+            keep = heapq.nlargest(self.capacity, counts, key=counts.get)
+            counts = {key: counts[key] for key in keep}
+            errors = {key: errors[key] for key in keep}
+        self.counts, self.errors = counts, errors
+        self.total += other.total
+        self._heap = [(count, next(self._order), key) for key, count in counts.items()]
+        heapq.heapify(self._heap)
+        return self
+
+    def top(self, k=10):
+        keys = heapq.nlargest(k, self.counts, key=self.counts.get)
+        return [{
+            "key": key,
+            "count": self.counts[key],
+            "error": self.errors[key],
+            "guaranteed_count": self.counts[key] - self.errors[key],
+        } for key in keys]
+
+class HeavyHitters:
+    # One SpaceSaving summary per (key column, measure) pair
+
+    def __init__(self, capacity=HEAVY_HITTER_CAPACITY):
+        self.summaries = {
+            (name, measure): SpaceSaving(capacity)
+            for name in HEAVY_HITTER_KEYS for measure in HEAVY_HITTER_MEASURES
+        }
+
+    def update_from_cases(self, cases):
+        # `cases` is one chunk of case results; each chunk is aggregated exactly
+        # (bounded by chunk size) and then folded into the bounded summaries.
+        if cases.empty:
+            return self
+        for measure, weight_fn in HEAVY_HITTER_MEASURES.items():
+            weights = weight_fn(cases)
+            for name, column in HEAVY_HITTER_KEYS.items():
+                chunk_weights = weights.groupby(cases[column].astype(str), sort=False, observed=True).sum()
+                self.summaries[(name, measure)].update_counts(chunk_weights)
+        return self
+
+    def merge(self, other):
+        for key, summary in self.summaries.items():
+            summary.merge(other.summaries[key])
+        return self
+
+    def report(self, k=10):
+        report = {}
+        for (name, measure), summary in self.summaries.items():
+            report.setdefault(name, {})[measure] = {
+                "top": summary.top(k),
+                "total": summary.total,
+                "max_error": summary.floor(),
+                "tracked_keys": len(summary.counts),
+            }
+        return report
+
+def variant_key(steps):
+    # As-is step sequence of a case; blank (unmatched) rows are skipped
+    return " > ".join(step for step in steps if isinstance(step, str))
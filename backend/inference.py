@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from backend.analysis import CASE_KEYS
+from backend.discovery import AS_IS_STEP, as_is_events, case_starts
+from backend.encoding import REFERENCE_STEPS, encode_event_log, is_encoded
+from backend.utils import SCENARIO_FLAGS, SCENARIO_STEPS
+
+# Score of a case against a scenario, in [0, 1]: weighted sum of the step-set
+# overlap (Jaccard of the step bitsets), the share of consecutive trace steps in
+# the scenario's order, and whether the case flags are the scenario's. Flags
+# weigh less than one step of overlap: they break ties between near-identical
+# traces but never outvote the trace (and SCE004/SCE005 share theirs).
+INFERENCE_SET_WEIGHT = float(os.environ.get("INFERENCE_SET_WEIGHT", "0.7"))
+INFERENCE_ORDER_WEIGHT = float(os.environ.get("INFERENCE_ORDER_WEIGHT", "0.25"))
+INFERENCE_FLAG_WEIGHT = float(os.environ.get("INFERENCE_FLAG_WEIGHT", "0.05"))
+# Softmax temperature turning scores into a confidence for the best scenario
+INFERENCE_TEMPERATURE = float(os.environ.get("INFERENCE_TEMPERATURE", "0.05"))
+
+EXPORT_FLAG = 'Export to not EU [1 = n, 2 = y]'
+DANGEROUS_FLAG = 'Dangerous Good [1 = n, 2 = y]'
+
+# A step's bit in a step bitset is its index in REFERENCE_STEPS; any other
+# step maps to the extra index NUM_REFERENCE_STEPS, which has no bit
+NUM_REFERENCE_STEPS = len(REFERENCE_STEPS)
+SCENARIOS = list(SCENARIO_STEPS)
+
+def _signatures():
+    # Per scenario: step bitset, and position of each reference step (-1 when the
+    # scenario does not have it; the extra last slot is for non-reference steps)
+    bits = np.zeros(len(SCENARIOS), dtype=np.uint64)
+    positions = np.full((len(SCENARIOS), NUM_REFERENCE_STEPS + 1), -1)
+    codes = {step: code for code, step in enumerate(REFERENCE_STEPS)}
+    for i, scenario in enumerate(SCENARIOS):
+        for position, step in enumerate(SCENARIO_STEPS[scenario]):
+            bits[i] |= np.uint64(1) << np.uint64(codes[step])
+            positions[i, codes[step]] = position
+    flags = np.array([[SCENARIO_FLAGS[s]["Export Flag"], SCENARIO_FLAGS[s]["Dangerous Flag"]] for s in SCENARIOS])
+    return bits, positions, flags
+
+SCENARIO_BITS, SCENARIO_POSITIONS, SCENARIO_FLAG_VALUES = _signatures()
+
+def score_scenarios(df):
+    # Scores [cases x SCENARIOS], cases in result order; all work is on
+    # whole columns: one pass over the as-is events, one per scenario over the
+    # consecutive-step pairs
+    if not is_encoded(df):
+        df = encode_event_log(df.copy())
+    # Rows without both case keys belong to no case, as in analyze_cases
+    df = df.dropna(subset=CASE_KEYS)
+    case_ids = df.groupby(CASE_KEYS, observed=True, sort=True).ngroup()
+    num_cases = int(case_ids.max()) + 1 if len(case_ids) else 0
+
+    events = as_is_events(df)
+    event_cases = case_ids.reindex(events.index).to_numpy(dtype=np.int64)
+    # Step codes -> reference index, by name rather than by vocabulary position
+    reference = pd.Index(REFERENCE_STEPS).get_indexer(events[AS_IS_STEP].cat.categories)
+    codes = np.where(reference >= 0, reference, NUM_REFERENCE_STEPS)[events[AS_IS_STEP].cat.codes.to_numpy()]
+    starts = np.flatnonzero(case_starts(events)) if len(events) else np.array([], dtype=int)
+
+    # Step bitset per case: OR of the steps' bits over each (contiguous) case
+    step_bits = np.where(codes < NUM_REFERENCE_STEPS,
+                         np.left_shift(np.uint64(1), np.minimum(codes, 63).astype(np.uint64)), np.uint64(0))
+    case_bits = np.zeros(num_cases, dtype=np.uint64)
+    if len(starts):
+        case_bits[event_cases[starts]] = np.bitwise_or.reduceat(step_bits, starts)
+    overlap = np.bitwise_count(case_bits[:, None] & SCENARIO_BITS[None, :])
+    union = np.bitwise_count(case_bits[:, None] | SCENARIO_BITS[None, :])
+    jaccard = overlap / union
+
+    # Consecutive pairs of the trace that both occur in the scenario: share in its order
+    follows = np.flatnonzero(~case_starts(events)[1:]) if len(events) else np.array([], dtype=int)
+    first, second, pair_cases = codes[follows], codes[follows + 1], event_cases[follows + 1]
+    order = np.ones((num_cases, len(SCENARIOS)))
+    for i in range(len(SCENARIOS)):
+        a, b = SCENARIO_POSITIONS[i, first], SCENARIO_POSITIONS[i, second]
+        counted = (a >= 0) & (b >= 0) & (a != b)
+        pairs = np.bincount(pair_cases[counted], minlength=num_cases)
+        in_order = np.bincount(pair_cases[counted & (a < b)], minlength=num_cases)
+        order[:, i] = np.divide(in_order, pairs, out=order[:, i], where=pairs > 0)
+
+    # Flags from the first row of each case, as aggregate_case_headers takes them
+    first_rows = np.unique(case_ids.to_numpy(), return_index=True)[1]
+    case_flags = np.stack([df[EXPORT_FLAG].to_numpy(dtype=float)[first_rows],
+                           df[DANGEROUS_FLAG].to_numpy(dtype=float)[first_rows]], axis=1)
+    flags = (case_flags[:, None, :] == SCENARIO_FLAG_VALUES[None, :, :]).all(axis=2)
+
+    return (INFERENCE_SET_WEIGHT * jaccard + INFERENCE_ORDER_WEIGHT * order + INFERENCE_FLAG_WEIGHT * flags)
+
+def infer_scenarios(df):
+    # Best-matching scenario and its softmax confidence per case, in the order
+    # of the case results (sorted by Order-No., Item-No.)
+    scores = score_scenarios(df)
+    best = scores.argmax(axis=1)
+    weights = np.exp((scores - scores.max(axis=1, keepdims=True)) / INFERENCE_TEMPERATURE)
+    confidence = weights[np.arange(len(best)), best] / weights.sum(axis=1)
+    return pd.DataFrame({
+        "Inferred_Scenario": np.asarray(SCENARIOS, dtype=object)[best],
+        "Inference_Confidence": confidence,
+    })
+
+def inference_summary(frame):
+    # Planned vs inferred scenario counts, for the analysis response
+    planned = frame["Derived_Scenario"].astype(object)
+    inferred = frame["Inferred_Scenario"].astype(object)
+    matrix = pd.crosstab(planned, inferred).stack()
+    return {
+        "cases": len(frame),
+        "mismatched_cases": int((planned != inferred).sum()),
+        "matrix": [{"planned": p, "inferred": i, "cases": int(n)} for (p, i), n in matrix.items() if n],
+    }
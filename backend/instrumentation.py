@@ -0,0 +1,229 @@
+import bisect
+import contextlib
+import contextvars
+import os
+import resource
+import threading
+import time
+
+def _read_status(field):
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+def current_rss_mb():
+    return _read_status("VmRSS")
+
+def reset_peak_rss():
+    # Linux resets the VmHWM high-water mark when "5" is written to clear_refs;
+    # elsewhere the peak stays process-lifetime (ru_maxrss).
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb():
+    peak = _read_status("VmHWM")
+    if peak is None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return peak
+
+class _RssWindow:
+    __slots__ = ("reset", "shared")
+
+    def __init__(self):
+        self.reset = False
+        self.shared = False
+
+class PeakRssTracker:
+    # VmHWM is one high-water mark for the whole process and resetting it affects
+    # every thread, so a request's peak is only its own when no other tracked
+    # request ran at any point during it. The mark is reset only by a request that
+    # starts alone, and end() gives a peak only for requests that stayed alone
+    # (always the case with one request per worker process, e.g. gunicorn sync
+    # workers); otherwise, or without clear_refs, it gives None.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = set()
+
+    def begin(self):
+        window = _RssWindow()
+        with self.lock:
+            if self.active:
+                window.shared = True
+                for other in self.active:
+                    other.shared = True
+            else:
+                window.reset = reset_peak_rss()
+            self.active.add(window)
+        return window
+
+    def end(self, window):
+        # Ending a window again (e.g. from a finally block) is a no-op
+        with self.lock:
+            if window not in self.active or window.shared or not window.reset:
+                self.active.discard(window)
+                return None
+            self.active.discard(window)
+            return peak_rss_mb()
+
+# --- Per-stage timings (Server-Timing) and Prometheus-text metrics ---
+#
+# Stages are timed with `with stage("name"):` anywhere in the pipeline. Timings go
+# to the collector of the current request (a context variable set by the app), so
+# library code does not need it passed in; outside a request, or when
+# INSTRUMENTATION_ENABLED=0, stage() returns a shared no-op context manager.
+# Metrics are per process: with several gunicorn workers each serves its own.
+
+INSTRUMENTATION_ENABLED = os.environ.get("INSTRUMENTATION_ENABLED", "1").lower() not in ("0", "false", "no")
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+PEAK_RSS_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+_NO_OP = contextlib.nullcontext()
+_current_timings = contextvars.ContextVar("request_timings", default=None)
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = []
+        self.counts = {}
+        self.peak_rss_mb = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def total_seconds(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        # Server-Timing header value; durations in milliseconds
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages]
+        entries += [f'{name};desc="{value}"' for name, value in self.counts.items()]
+        if self.peak_rss_mb is not None:
+            entries.append(f'peak_rss;desc="{self.peak_rss_mb:.1f} MB"')
+        entries.append(f"total;dur={self.total_seconds() * 1000:.1f}")
+        return ", ".join(entries)
+
+def stage(name):
+    timings = _current_timings.get()
+    return _NO_OP if timings is None else timings.stage(name)
+
+def record_count(name, value):
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.counts[name] = timings.counts.get(name, 0) + value
+
+def record_peak_rss(value):
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.peak_rss_mb = value
+
+def begin_request():
+    # -> (timings, token), or (None, None) when instrumentation is off
+    if not INSTRUMENTATION_ENABLED:
+        return None, None
+    timings = RequestTimings()
+    return timings, _current_timings.set(timings)
+
+def end_request(timings, token, endpoint, status):
+    if timings is None:
+        return
+    _current_timings.reset(token)
+    REQUESTS.inc((endpoint, str(status)))
+    REQUEST_SECONDS.observe((endpoint,), timings.total_seconds())
+    for name, seconds in timings.stages:
+        STAGE_SECONDS.observe((name,), seconds)
+    for name, value in timings.counts.items():
+        PROCESSED.inc((name,), value)
+    if timings.peak_rss_mb is not None:
+        PEAK_RSS_MB.observe((endpoint,), timings.peak_rss_mb)
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name, self.help_text, self.labels = name, help_text, labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{_series(self.name, self.labels, label_values)} {value}")
+        return lines
+
+class Gauge:
+    def __init__(self, name, help_text):
+        self.name, self.help_text = name, help_text
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {self.value}"]
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name, self.help_text, self.labels, self.buckets = name, help_text, labels, buckets
+        self.series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self.lock:
+            series = self.series.setdefault(label_values, [0] * (len(self.buckets) + 2))
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, series in sorted(self.series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                    cumulative += count
+                    bucket = _series(f"{self.name}_bucket", self.labels + ("le",), label_values + (bound,))
+                    lines.append(f"{bucket} {cumulative}")
+                lines.append(f"{_series(self.name + '_sum', self.labels, label_values)} {series[-1]}")
+                lines.append(f"{_series(self.name + '_count', self.labels, label_values)} {cumulative}")
+        return lines
+
+def _series(name, labels, values):
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{label}="{value}"' for label, value in zip(labels, values)) + "}"
+
+REQUESTS = Counter("process_mining_requests_total", "Requests by endpoint and status.", ("endpoint", "status"))
+REQUEST_SECONDS = Histogram("process_mining_request_seconds", "Request latency.", ("endpoint",), STAGE_BUCKETS)
+STAGE_SECONDS = Histogram("process_mining_stage_seconds", "Time per analysis pipeline stage.", ("stage",), STAGE_BUCKETS)
+PROCESSED = Counter("process_mining_processed_total", "Event rows and cases processed.", ("kind",))
+PEAK_RSS_MB = Histogram("process_mining_peak_rss_megabytes", "Peak RSS of requests that ran alone.", ("endpoint",), PEAK_RSS_BUCKETS)
+ADMISSION_QUEUE_DEPTH = Gauge("process_mining_admission_queue_depth", "Analyses waiting for memory.")
+ADMISSION_IN_USE_MB = Gauge("process_mining_admission_in_use_megabytes", "Estimated memory of running analyses.")
+ADMISSION_WAIT_SECONDS = Histogram("process_mining_admission_wait_seconds", "Time from arrival to admission.", (), STAGE_BUCKETS)
+ADMISSION_REJECTED = Counter("process_mining_admission_rejected_total", "Analyses rejected with 429.", ())
+
+def render_metrics():
+    if not INSTRUMENTATION_ENABLED:
+        return "# instrumentation disabled (INSTRUMENTATION_ENABLED=0)\n"
+    lines = []
+    for metric in (REQUESTS, REQUEST_SECONDS, STAGE_SECONDS, PROCESSED, PEAK_RSS_MB, ADMISSION_QUEUE_DEPTH,
+                   ADMISSION_IN_USE_MB, ADMISSION_WAIT_SECONDS, ADMISSION_REJECTED):
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
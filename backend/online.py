@@ -0,0 +1,178 @@
+import os
+import shelve
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from backend.utils import SCENARIO_STEPS
+
+# Cases kept in memory; the least recently active ones beyond this are spilled to disk
+MAX_ACTIVE_CASES = int(os.environ.get("MAX_ACTIVE_CASES", "100000"))
+# Cases without events for this long are spilled even when below the limit
+CASE_IDLE_SECONDS = float(os.environ.get("CASE_IDLE_SECONDS", "3600"))
+SPILL_PATH = os.environ.get(
+    "CASE_SPILL_PATH", os.path.join(tempfile.gettempdir(), f"process-mining-cases-{os.getpid()}"))
+
+# Reference automaton per scenario: step -> position in SCENARIO_STEPS
+COMPILED_SCENARIOS = {
+    scenario: {step: pos for pos, step in enumerate(steps)}
+    for scenario, steps in SCENARIO_STEPS.items()
+}
+
+class CaseState:
+    __slots__ = ("scenario", "next_pos", "started", "open", "completed", "last_seen")
+
+    def __init__(self, scenario):
+        self.scenario = scenario
+        self.next_pos = 0     # automaton position: first reference step not yet started
+        self.started = 0      # bitmask of started reference positions
+        self.open = 0         # bitmask of started but not yet ended positions
+        self.completed = False
+        self.last_seen = time.monotonic()
+
+    def to_dict(self):
+        steps = SCENARIO_STEPS[self.scenario]
+        return {
+            "scenario": self.scenario,
+            "completed": self.completed,
+            "started_steps": [s for pos, s in enumerate(steps) if self.started >> pos & 1],
+            "open_steps": [s for pos, s in enumerate(steps) if self.open >> pos & 1],
+            "next_expected_step": steps[self.next_pos] if self.next_pos < len(steps) else None,
+        }
+
+class OnlineConformance:
+    def __init__(self, max_active_cases=MAX_ACTIVE_CASES, idle_seconds=CASE_IDLE_SECONDS, spill_path=SPILL_PATH):
+        self.max_active_cases = max_active_cases
+        self.idle_seconds = idle_seconds
+        self.spill_path = spill_path
+        self.cases = OrderedDict()   # ordered by last activity, oldest first
+        self.spilled = 0
+        self._spill = None
+        self._lock = threading.Lock()
+
+    def _spill_store(self):
+        if self._spill is None:
+            self._spill = shelve.open(self.spill_path, flag="n")
+        return self._spill
+
+    def _load(self, case_id):
+        state = self.cases.get(case_id)
+        if state is not None:
+            self.cases.move_to_end(case_id)
+            return state
+        if self._spill is not None and case_id in self._spill:
+            state = self._spill.pop(case_id)
+            self.spilled -= 1
+            self.cases[case_id] = state
+        return state
+
+    def _evict(self, now):
+        # Oldest entries come first, so both checks stop at the first active case
+        while self.cases:
+            case_id, state = next(iter(self.cases.items()))
+            if len(self.cases) <= self.max_active_cases and now - state.last_seen < self.idle_seconds:
+                break
+            self.cases.popitem(last=False)
+            self._spill_store()[case_id] = state
+            self.spilled += 1
+
+    def ingest(self, event):
+        return self.ingest_batch([event])[0]
+
+    def ingest_batch(self, events):
+        # All or nothing: every event is checked before any is applied, so a
+        # rejected batch leaves the case states untouched and can be retried
+        parsed = [self._parse(event) for event in events]
+        with self._lock:
+            known = set()
+            for case_id, _, _, scenario in parsed:
+                if case_id not in known and not self._exists(case_id) and scenario not in COMPILED_SCENARIOS:
+                    raise ValueError(f"Unknown or missing scenario '{scenario}' for new case {case_id}")
+                known.add(case_id)
+            return [self._apply(*event) for event in parsed]
+
+    def _parse(self, event):
+        # -> (case_id, step, kind, scenario), or ValueError
+        if not isinstance(event, dict):
+            raise ValueError("Each event must be a JSON object")
+        case_id = event.get("case_id")
+        if case_id in (None, ""):
+            order_id, item_id = event.get("order_id"), event.get("item_id")
+            if order_id in (None, "") or item_id in (None, ""):
+                raise ValueError("Event needs a 'case_id', or an 'order_id' and an 'item_id'")
+            case_id = f"{order_id}_{item_id}"
+        step = event.get("step")
+        kind = event.get("event", "start")
+        scenario = event.get("scenario")
+        if step in (None, ""):
+            raise ValueError("Event needs a 'step'")
+        if not isinstance(step, (str, int, float)):
+            raise ValueError(f"Step must be a string or number, got {type(step).__name__}")
+        if kind not in ("start", "end"):
+            raise ValueError(f"Unknown event type '{kind}', expected 'start' or 'end'")
+        if not isinstance(scenario, (str, type(None))):
+            raise ValueError(f"Scenario must be a string, got {type(scenario).__name__}")
+        # Case IDs are strings throughout: JSON numbers would otherwise be distinct
+        # keys from the same IDs in a URL, and the spill store only takes str keys
+        return str(case_id), step, kind, scenario
+
+    def _exists(self, case_id):
+        return case_id in self.cases or (self._spill is not None and case_id in self._spill)
+
+    def _apply(self, case_id, step, kind, scenario):
+        now = time.monotonic()
+        state = self._load(case_id)
+        if state is None:
+            state = CaseState(scenario)
+            self.cases[case_id] = state
+        state.last_seen = now
+        issues = self._advance(state, step, kind)
+        result = {"case_id": case_id, "step": step, "event": kind, "issues": issues, **state.to_dict()}
+        self._evict(now)
+        return result
+
+    def _advance(self, state, step, kind):
+        steps = SCENARIO_STEPS[state.scenario]
+        pos = COMPILED_SCENARIOS[state.scenario].get(step)
+        issues = []
+        if pos is None:
+            if kind == "start":
+                issues.append({"type": "extra", "steps": [step]})
+            return issues
+        bit = 1 << pos
+
+        if kind == "end":
+            if not state.open & bit:
+                issues.append({"type": "end_without_start", "steps": [step]})
+            state.open &= ~bit
+            if pos == len(steps) - 1 and not state.completed:
+                state.completed = True
+                missing = [s for p, s in enumerate(steps) if not state.started >> p & 1]
+                if missing:
+                    issues.append({"type": "missing", "steps": missing})
+            return issues
+
+        if state.started & bit:
+            issues.append({"type": "duplicate", "steps": [step]})
+            return issues
+        if state.started >> (pos + 1):
+            # A later reference step has already started
+            issues.append({"type": "out_of_order", "steps": [step]})
+        elif pos > state.next_pos:
+            skipped = [steps[p] for p in range(state.next_pos, pos) if not state.started >> p & 1]
+            issues.append({"type": "out_of_order", "steps": [step], "skipped_steps": skipped})
+        state.started |= bit
+        state.open |= bit
+        while state.next_pos < len(steps) and state.started >> state.next_pos & 1:
+            state.next_pos += 1
+        return issues
+
+    def case_state(self, case_id):
+        with self._lock:
+            state = self._load(case_id)
+            return None if state is None else {"case_id": case_id, **state.to_dict()}
+
+    def stats(self):
+        with self._lock:
+            return {"active_cases": len(self.cases), "spilled_cases": self.spilled}
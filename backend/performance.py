@@ -0,0 +1,191 @@
+import math
+import os
+
+import numpy as np
+
+from backend.discovery import AS_IS_END, AS_IS_START, AS_IS_STEP, SCENARIO, as_is_events, case_starts
+
+PLANNED_STEP = 'Planed-Master-Order-Processing-Position-No. as an ID'
+PLANNED_START = 'Planed-Master-Order-Processing-Start-Time'
+PLANNED_END = 'Planed-Master-Order-Processing-End-Time'
+
+# Centroid budget per digest: each keeps at most about compression / 2
+# centroids, so memory is O(steps x scenarios x metrics) however long the log is
+PERFORMANCE_DIGEST_COMPRESSION = int(os.environ.get("PERFORMANCE_DIGEST_COMPRESSION", "200"))
+PERFORMANCE_QUANTILES = (0.5, 0.9, 0.99)
+
+# planned/actual: step duration (negative spans dropped, as in safe_duration);
+# deviation: actual - planned where the as-is step is the planned one;
+# waiting: start of the step minus end of the previous step of the case
+# (negative when steps overlap)
+METRICS = ("planned", "actual", "deviation", "waiting")
+
+class TDigest:
+    """Merging t-digest (Dunning & Ertl) with the k1 scale function.
+
+    Centroids near the tails stay small, so extreme quantiles keep their
+    accuracy. Digests built on separate chunks merge into one that is as good
+    as a digest of the whole data.
+    """
+
+    def __init__(self, compression=PERFORMANCE_DIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return self
+        self.count += len(values)
+        self.total += values.sum().item()
+        self.min = min(self.min, values.min().item())
+        self.max = max(self.max, values.max().item())
+        self._compress(np.concatenate([self.means, values]), np.concatenate([self.weights, np.ones(len(values))]))
+        return self
+
+    def merge(self, other):
+        if not other.count:
+            return self
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]))
+        return self
+
+    def _compress(self, means, weights):
+        # One vectorized pass: sorted points fall into unit-width bins of the
+        # scale k(q) = compression / 2pi * asin(2q - 1); each bin becomes a centroid
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        q = (cumulative - weights / 2) / cumulative[-1]
+        bins = np.floor(self.compression / (2 * math.pi) * np.arcsin(2 * q - 1))
+        starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q):
+        # Interpolates between centroid centres, pinned to the exact min and max
+        if not self.count:
+            return np.full(np.shape(q), np.nan)
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return np.interp(np.asarray(q) * self.count, np.r_[0, centers, self.count],
+                         np.r_[self.min, self.means, self.max])
+
+    def cdf(self, x, side="right"):
+        # Inverse of quantile(): fraction of the values at or below x ("right")
+        # or below x ("left"). Centroids with the same mean are a point mass
+        # (ties, e.g. durations in whole minutes): the cdf jumps there.
+        if not self.count:
+            return np.full(np.shape(x), np.nan)
+        xp = np.r_[self.min, self.means, self.max]
+        fp = np.r_[0, np.cumsum(self.weights) - self.weights / 2, self.count]
+        x = np.asarray(x, dtype=float)
+        i = np.clip(np.searchsorted(xp, x, side=side), 1, len(xp) - 1)
+        x0, x1 = xp[i - 1], xp[i]
+        t = np.clip(np.divide(x - x0, x1 - x0, out=np.zeros_like(x), where=x1 > x0), 0, 1)
+        t = np.where((x1 == x0) & (x >= x1), 1.0, t)
+        return (fp[i - 1] + t * (fp[i] - fp[i - 1])) / self.count
+
+    def median_absolute_deviation(self, center):
+        # Smallest d with half the values within [center - d, center + d]. The
+        # cdf is linear between centroids, so the mass within +-d is too between
+        # the distances of the centroids from center: evaluate it there and
+        # interpolate.
+        if not self.count:
+            return math.nan
+        distances = np.unique(np.abs(np.r_[self.min, self.means, self.max] - center))
+        mass = self.cdf(center + distances) - self.cdf(center - distances, side="left")
+        if mass[0] >= 0.5:
+            return distances[0].item()
+        return np.interp(0.5, np.maximum.accumulate(mass), distances).item()
+
+    def mean_absolute_deviation(self, center):
+        if not self.count:
+            return math.nan
+        return (np.abs(self.means - center) * self.weights).sum().item() / self.count
+
+    def summary(self, quantiles=PERFORMANCE_QUANTILES):
+        if not self.count:
+            return {"count": 0}
+        values = self.quantile(quantiles)
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "min": self.min,
+            "max": self.max,
+            **{f"p{round(q * 100):g}": value.item() for q, value in zip(quantiles, values)},
+        }
+
+def _minutes(start, end):
+    return (end - start).dt.total_seconds() / 60
+
+def step_metrics(df):
+    # (metric, scenario Series, step Series, minutes Series) for one chunk of
+    # whole cases; whole-column arithmetic, no per-case loop
+    events = as_is_events(df)
+    planned = df.dropna(subset=[PLANNED_STEP])
+    planned_minutes = _minutes(planned[PLANNED_START], planned[PLANNED_END])
+    actual_minutes = _minutes(events[AS_IS_START], events[AS_IS_END])
+    yield "planned", planned[SCENARIO], planned[PLANNED_STEP], planned_minutes.where(planned_minutes >= 0)
+    yield "actual", events[SCENARIO], events[AS_IS_STEP], actual_minutes.where(actual_minutes >= 0)
+
+    same_step = df[df[PLANNED_STEP] == df[AS_IS_STEP]]
+    deviation = (_minutes(same_step[AS_IS_START], same_step[AS_IS_END])
+                 - _minutes(same_step[PLANNED_START], same_step[PLANNED_END]))
+    yield "deviation", same_step[SCENARIO], same_step[AS_IS_STEP], deviation
+
+    waiting = _minutes(events[AS_IS_END].shift(), events[AS_IS_START]).where(~case_starts(events))
+    yield "waiting", events[SCENARIO], events[AS_IS_STEP], waiting
+
+class StepPerformance:
+    # One TDigest per (metric, scenario, step). update() takes chunks of whole
+    # cases (waiting time needs each case's previous step); partial results
+    # from separate chunks or processes combine with merge().
+
+    def __init__(self, compression=PERFORMANCE_DIGEST_COMPRESSION):
+        self.compression = compression
+        self.digests = {}
+
+    def update(self, df):
+        for metric, scenarios, steps, minutes in step_metrics(df):
+            grouped = minutes.groupby([scenarios, steps], observed=True, sort=False)
+            for (scenario, step), values in grouped:
+                self._digest(metric, scenario, step).update(values.to_numpy())
+        return self
+
+    def merge(self, other):
+        for key, digest in other.digests.items():
+            self._digest(*key).merge(digest)
+        return self
+
+    def _digest(self, metric, scenario, step):
+        key = (metric, scenario, step)
+        if key not in self.digests:
+            self.digests[key] = TDigest(self.compression)
+        return self.digests[key]
+
+    def report(self, scenario=None, by_scenario=False, quantiles=PERFORMANCE_QUANTILES):
+        # Per step, for one scenario, per (scenario, step), or across all scenarios
+        rows = {}
+        for (metric, digest_scenario, step), digest in self.digests.items():
+            if scenario is not None and digest_scenario != scenario:
+                continue
+            key = (digest_scenario, step) if scenario is not None or by_scenario else (None, step)
+            merged = rows.setdefault(key, {}).setdefault(metric, TDigest(self.compression))
+            merged.merge(digest)
+        steps = []
+        for (row_scenario, step), digests in sorted(rows.items(), key=lambda item: (str(item[0][0]), str(item[0][1]))):
+            row = {"scenario": row_scenario} if row_scenario is not None else {}
+            row["step"] = step
+            for metric in METRICS:
+                row[metric] = digests[metric].summary(quantiles) if metric in digests else {"count": 0}
+            steps.append(row)
+        return {"steps": steps, "quantiles": list(quantiles)}
@@ -0,0 +1,150 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from backend.analysis import CASE_KEYS, analyze_cases
+from backend.uploads import prepare_event_log, spooled_path
+
+SCENARIO_COLUMN = 'Planed-Master-Scenario-No.'
+PREVIEW_CASES_PER_SCENARIO = int(os.environ.get("PREVIEW_CASES_PER_SCENARIO", "200"))
+Z_95 = 1.959964
+
+PREVIEW_NOTE = ("Preview: all numbers are ESTIMATES from a stratified random sample of cases "
+                "(stratified by Planed-Master-Scenario-No.), with 95% confidence intervals. "
+                "Run the full analysis for exact results.")
+
+def _line_count(source):
+    # Physical lines of a file or stream (a last line without a newline counts)
+    own = isinstance(source, str)
+    f = open(source, 'rb') if own else source
+    try:
+        lines, last = 0, b"\n"
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+        return lines + (last != b"\n")
+    finally:
+        if own:
+            f.close()
+        else:
+            f.seek(0)
+
+def _read_sample(file, filename, hints, per_scenario, seed):
+    path = spooled_path(file)
+    is_csv = filename.endswith('.csv')
+    if is_csv:
+        # Key pass: only the case key and scenario columns
+        keys = pd.read_csv(path or file.stream, usecols=CASE_KEYS + [SCENARIO_COLUMN],
+                           dtype='category', memory_map=path is not None)
+        if path is None:
+            file.stream.seek(0)
+    else:
+        full = pd.read_excel(path or file.stream, usecols=hints["usecols"])
+        keys = full[CASE_KEYS + [SCENARIO_COLUMN]]
+
+    # Stratum of a case = scenario on its first row, as in the full analysis
+    cases = keys.drop_duplicates(CASE_KEYS).dropna(subset=CASE_KEYS)
+    population = cases.groupby(SCENARIO_COLUMN, observed=True).size()
+    shuffled = cases.sample(frac=1, random_state=seed)
+    sampled = shuffled[shuffled.groupby(SCENARIO_COLUMN, observed=True).cumcount() < per_scenario]
+    in_sample = pd.MultiIndex.from_frame(keys[CASE_KEYS]).isin(pd.MultiIndex.from_frame(sampled[CASE_KEYS]))
+
+    if is_csv and _line_count(path or file.stream) == len(keys) + 1:
+        # One line per record after the header, so record i is line i + 1 and the
+        # second pass parses only the sampled cases' lines. The skipped line
+        # numbers go in as an array, which the C parser looks up in a hash set.
+        df = pd.read_csv(path or file.stream, usecols=hints["usecols"], dtype=hints["dtype"],
+                         skiprows=np.flatnonzero(~in_sample) + 1)
+    elif is_csv:
+        # Quoted newlines or blank lines: line numbers are not record numbers, so
+        # parse every record and keep the sampled ones
+        df = pd.read_csv(path or file.stream, usecols=hints["usecols"], dtype=hints["dtype"],
+                         memory_map=path is not None)
+        df = df[in_sample].reset_index(drop=True)
+    else:
+        df = full[in_sample].reset_index(drop=True)
+    return prepare_event_log(df, hints), population
+
+def _wilson(successes, n, fpc):
+    # Wilson score interval; the finite population correction shrinks the variance
+    if n == 0:
+        return None, None
+    p = successes / n
+    if fpc == 0:
+        return p, p
+    n_eff = n / (fpc ** 2)
+    denom = 1 + Z_95 ** 2 / n_eff
+    centre = (p + Z_95 ** 2 / (2 * n_eff)) / denom
+    half = Z_95 * math.sqrt(p * (1 - p) / n_eff + Z_95 ** 2 / (4 * n_eff ** 2)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+def _fpc(n, population):
+    return math.sqrt((population - n) / (population - 1)) if population > 1 else 0.0
+
+def _estimate(cases, population):
+    n = len(cases)
+    fpc = _fpc(n, population)
+
+    breach_types = {}
+    for breach_type, count in cases['Breach_Type'].value_counts().items():
+        low, high = _wilson(count, n, fpc)
+        breach_types[breach_type] = {
+            "estimate_percent": count / n * 100,
+            "ci_low_percent": low * 100,
+            "ci_high_percent": high * 100,
+        }
+
+    time_dev = cases['Time_Deviation_Minutes'].dropna()
+    time_half = Z_95 * time_dev.std() / math.sqrt(len(time_dev)) * fpc if len(time_dev) > 1 else None
+    time_mean = time_dev.mean() if len(time_dev) else None
+
+    # Scrap percentage as a ratio estimator: sum(scrap) / sum(yield + scrap)
+    scrap = cases['Total_Scrap'].astype(float)
+    total = cases['Total_Yield'].astype(float) + scrap
+    scrap_ratio = scrap.sum() / total.sum() if total.sum() > 0 else None
+    scrap_half = None
+    if scrap_ratio is not None and n > 1:
+        residuals = scrap - scrap_ratio * total
+        scrap_half = Z_95 * residuals.std() / (math.sqrt(n) * total.mean()) * fpc
+
+    return {
+        "sampled_cases": n,
+        "total_cases": int(population),
+        "breach_type_distribution": breach_types,
+        "mean_time_deviation_minutes": {
+            "estimate": time_mean,
+            "ci_low": time_mean - time_half if time_half is not None else None,
+            "ci_high": time_mean + time_half if time_half is not None else None,
+        },
+        "scrap_percent": {
+            "estimate": scrap_ratio * 100 if scrap_ratio is not None else None,
+            "ci_low": max(0.0, (scrap_ratio - scrap_half) * 100) if scrap_half is not None else None,
+            "ci_high": (scrap_ratio + scrap_half) * 100 if scrap_half is not None else None,
+        },
+    }
+
+def preview_analysis(file, filename, hints, per_scenario=PREVIEW_CASES_PER_SCENARIO, seed=0):
+    df, population = _read_sample(file, filename, hints, per_scenario, seed)
+    cases = analyze_cases(df).frame
+
+    scenarios = []
+    for scenario, scenario_cases in cases.groupby('Derived_Scenario', observed=True):
+        scenarios.append({"Derived_Scenario": scenario, **_estimate(scenario_cases, population.get(scenario, len(scenario_cases)))})
+
+    # Overall breach rate: stratum rates weighted by stratum sizes
+    weights = population / population.sum() if population.sum() else population
+    breach_rates = (cases['Breach_Type'] != 'None').groupby(cases['Derived_Scenario'], observed=True).mean()
+    overall = float((breach_rates * weights.reindex(breach_rates.index).fillna(0)).sum()) * 100
+
+    return {
+        "preview": True,
+        "estimate": True,
+        "note": PREVIEW_NOTE,
+        "confidence_level": 0.95,
+        "sampled_cases": len(cases),
+        "total_cases": int(population.sum()),
+        "estimated_breach_rate_percent": overall,
+        "scenarios": scenarios,
+    }
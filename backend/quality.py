@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from backend.analysis import CASE_KEYS
+from backend.encoding import encode_event_log, is_encoded
+from backend.utils import SCENARIO_STEPS
+from backend.validation import REQUIRED_COLUMNS
+
+# Example case IDs listed per finding
+QUALITY_EXAMPLES = int(os.environ.get("QUALITY_EXAMPLES", "5"))
+
+SCENARIO = 'Planed-Master-Scenario-No.'
+PLANNED_POSITION = 'Planed-Master-Order-Processing-Ongoing Position No.'
+PLANNED_STEP = 'Planed-Master-Order-Processing-Position-No. as an ID'
+
+# Case attributes the analysis takes from the first row of the case
+CASE_ATTRIBUTES = [
+    'Customer-No.',
+    'Export to not EU [1 = n, 2 = y]',
+    'Dangerous Good [1 = n, 2 = y]',
+    SCENARIO,
+]
+
+# (name, start column, end column) of the durations safe_duration blanks when negative
+DURATIONS = [
+    ("planned", 'Planed-Master-Order-Processing-Start-Time', 'Planed-Master-Order-Processing-End-Time'),
+    ("as_is", 'As-Is-Real-Order-Processing-Start-Time', 'As-Is-Real-Order-Processing-End-Time'),
+]
+
+def _codes(series):
+    # Integer view of a column for grouped min/max; missing values are -1
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy()
+    return pd.factorize(series, use_na_sentinel=True)[0]
+
+def _expected_steps(df):
+    # expected[scenario code, planned position] = reference step code; -1 past the
+    # end of the reference, -2 for scenarios SCENARIO_STEPS does not know
+    scenarios = df[SCENARIO].cat.categories
+    steps = df[PLANNED_STEP].cat.categories
+    width = max(len(reference) for reference in SCENARIO_STEPS.values()) + 1
+    expected = np.full((len(scenarios) + 1, width), -2)
+    for code, scenario in enumerate(scenarios):
+        reference = SCENARIO_STEPS.get(scenario)
+        if reference is not None:
+            expected[code, :] = -1
+            expected[code, 1:len(reference) + 1] = steps.get_indexer(reference)
+    return expected
+
+def profile_event_log(df):
+    """Data-quality report of a parsed event log.
+
+    Everything is whole-column arithmetic plus one grouped aggregation per case;
+    findings count cases and list a few example case IDs.
+    """
+    if not is_encoded(df):
+        df = encode_event_log(df.copy())
+    rows = len(df)
+    null_rates = {column: float(rate) for column, rate in df[REQUIRED_COLUMNS].isna().mean().items()}
+
+    # Rows without an Order-No. or Item-No. belong to no case; the analysis drops
+    # them (ngroup gives them -1), so they are counted here and left out of the rest
+    case_ids = df.groupby(CASE_KEYS, observed=True, sort=False).ngroup().to_numpy()
+    keyed = case_ids >= 0
+    missing_keys = {key: int((df[key].isna().to_numpy() & ~keyed).sum()) for key in CASE_KEYS}
+    if not keyed.all():
+        df, case_ids = df[keyed], case_ids[keyed]
+    per_row = {}
+
+    # Attributes that differ between rows of one case (missing counts as a value)
+    for column in CASE_ATTRIBUTES:
+        per_row[column] = _codes(df[column])
+
+    # Row-level negative durations; case-level as safe_duration sees them
+    for name, start, end in DURATIONS:
+        per_row[f"{name}_negative_rows"] = (df[end] < df[start]).to_numpy()
+        per_row[f"{name}_start"] = df[start].to_numpy()
+        per_row[f"{name}_end"] = df[end].to_numpy()
+
+    # Planned steps against the scenario's reference sequence, by planned position
+    has_plan = df[PLANNED_STEP].notna().to_numpy()
+    positions = df[PLANNED_POSITION].to_numpy(dtype=float)
+    expected_table = _expected_steps(df)
+    valid = has_plan & (positions >= 1) & (positions < expected_table.shape[1])
+    scenario_codes = df[SCENARIO].cat.codes.to_numpy()
+    expected = np.full(len(df), -1)
+    expected[valid] = expected_table[scenario_codes[valid], positions[valid].astype(int)]
+    per_row["unknown_scenario"] = has_plan & (expected_table[scenario_codes, 0] == -2)
+    per_row["step_mismatch"] = has_plan & ~per_row["unknown_scenario"] & (expected != df[PLANNED_STEP].cat.codes.to_numpy())
+    per_row["planned_rows"] = has_plan
+
+    aggregations = {column: ['min', 'max'] for column in CASE_ATTRIBUTES}
+    for name, _, _ in DURATIONS:
+        aggregations.update({f"{name}_negative_rows": 'sum', f"{name}_start": 'min', f"{name}_end": 'max'})
+    aggregations.update({"unknown_scenario": 'any', "step_mismatch": 'sum', "planned_rows": 'sum'})
+    cases = pd.DataFrame(per_row).groupby(case_ids, sort=True).agg(aggregations)
+    cases.columns = ['_'.join(column) if column[1] in ('min', 'max') and column[0] in CASE_ATTRIBUTES else column[0]
+                     for column in cases.columns]
+
+    # Case ID and reference length from each case's first row, in case-id order
+    first = np.unique(case_ids, return_index=True)[1]
+    labels = (df[CASE_KEYS[0]].astype(str).to_numpy()[first].astype(object) + "_"
+              + df[CASE_KEYS[1]].astype(str).to_numpy()[first].astype(object))
+    reference_lengths = np.array([len(SCENARIO_STEPS.get(s, ())) for s in df[SCENARIO].cat.categories] + [0])
+    planned_length = reference_lengths[scenario_codes[first]]
+
+    def finding(mask, **extra):
+        mask = np.asarray(mask)
+        return {"cases": int(mask.sum()), **extra, "examples": labels[mask][:QUALITY_EXAMPLES].tolist()}
+
+    report = {
+        "rows": rows,
+        "cases": len(cases),
+        "null_rates": null_rates,
+        "missing_case_keys": {"rows": int((~keyed).sum()), **missing_keys},
+        "coerced_values": dict(df.attrs.get("coerced_values", {})),
+        "attribute_conflicts": {
+            column: finding(cases[f"{column}_min"] != cases[f"{column}_max"])
+            for column in CASE_ATTRIBUTES
+        },
+        "negative_durations": {
+            name: finding((cases[f"{name}_end"] < cases[f"{name}_start"]).to_numpy(),
+                          rows=int(cases[f"{name}_negative_rows"].sum()))
+            for name, _, _ in DURATIONS
+        },
+        "planned_steps": {
+            "unknown_scenario": finding(cases["unknown_scenario"].to_numpy()),
+            "step_mismatch": finding((cases["step_mismatch"] > 0).to_numpy(), rows=int(cases["step_mismatch"].sum())),
+            "length_mismatch": finding((~cases["unknown_scenario"] & (cases["planned_rows"] != planned_length)).to_numpy()),
+        },
+    }
+    return report
@@ -0,0 +1,80 @@
+import gzip
+import hashlib
+import os
+
+from flask import Response, request
+
+# brotli is optional; without it responses are gzip-compressed only
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", "5"))
+# PNGs and other binary payloads are already compressed
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/csv", "text/plain", "text/html")
+
+def content_digest(*parts):
+    # Strong validator for stored content: a hash of its bytes (or of earlier digests)
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+def negotiate_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted.quality("br") > 0:
+        return "br"
+    if accepted.quality("gzip") > 0:
+        return "gzip"
+    return None
+
+def compress_response(response):
+    # after_request: compress bodies the client accepts an encoding for. The strong
+    # ETag of a compressed body gets the encoding as suffix, since it is a
+    # different representation (see cached_response for the matching side).
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding()
+    data = response.get_data()
+    if encoding is None or len(data) < COMPRESSION_MIN_BYTES:
+        return response
+    if encoding == "br":
+        response.set_data(brotli.compress(data, quality=BROTLI_QUALITY))
+    else:
+        response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+    return response
+
+def _matching_etag(etag):
+    # If-None-Match uses the weak comparison; the client may hold the identity or
+    # an encoded representation's tag
+    if request.if_none_match.star_tag:
+        return etag
+    for tag in request.if_none_match.as_set(include_weak=True):
+        base, _, suffix = tag.rpartition("-")
+        if tag == etag or (base == etag and suffix in ("gzip", "br")):
+            return tag
+    return None
+
+def cached_response(etag, build_body, mimetype):
+    # 304 without building the body when the client already has this version
+    matched = _matching_etag(etag)
+    if matched is not None:
+        response = Response(status=304)
+        response.set_etag(matched)
+    else:
+        response = Response(build_body(), mimetype=mimetype)
+        response.set_etag(etag)
+    # Stored analyses never change, but may be evicted: always revalidate
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
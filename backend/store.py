@@ -0,0 +1,26 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+# Finished analyses are kept in-process so follow-up queries (cube slices etc.)
+# can be answered without re-uploading the log. Oldest entries are dropped first.
+MAX_STORED_ANALYSES = int(os.environ.get("MAX_STORED_ANALYSES", "20"))
+
+_analyses = OrderedDict()
+_lock = threading.Lock()
+
+def save_analysis(analysis):
+    analysis_id = uuid.uuid4().hex
+    with _lock:
+        _analyses[analysis_id] = analysis
+        while len(_analyses) > MAX_STORED_ANALYSES:
+            _analyses.popitem(last=False)
+    return analysis_id
+
+def get_analysis(analysis_id):
+    with _lock:
+        analysis = _analyses.get(analysis_id)
+        if analysis is not None:
+            _analyses.move_to_end(analysis_id)
+        return analysis
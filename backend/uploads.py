@@ -0,0 +1,70 @@
+import os
+import tempfile
+
+import pandas as pd
+from flask import Request
+
+from backend.encoding import encode_event_log
+from backend.instrumentation import stage
+from backend.validation import DATE_COLUMNS, NUMERIC_COLUMNS
+
+# Where uploads are spooled while they are parsed (defaults to the system temp dir)
+UPLOAD_SPOOL_DIR = os.environ.get("UPLOAD_SPOOL_DIR") or None
+
+class SpoolingRequest(Request):
+    # Werkzeug keeps small uploads in memory and only spills large ones; here every
+    # uploaded file is streamed to a temp file as it arrives, so parsing can work
+    # from a path and the OS page cache instead of a copy on the Python heap.
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.NamedTemporaryFile("wb+", dir=UPLOAD_SPOOL_DIR, prefix="upload-")
+
+def spooled_path(file):
+    # Path of the spooled upload, or None when the stream is not backed by a file
+    stream = file.stream
+    name = getattr(stream, "name", None)
+    if not isinstance(name, str) or not os.path.exists(name):
+        return None
+    stream.flush()
+    return name
+
+def read_event_log(file, filename, hints):
+    with stage("read"):
+        return _read_event_log(file, filename, hints)
+
+def _read_event_log(file, filename, hints):
+    path = spooled_path(file)
+    source = path if path is not None else file.stream
+    if filename.endswith('.csv'):
+        # memory_map lets the C parser read straight from the mapped file into
+        # its column buffers
+        return pd.read_csv(source, usecols=hints["usecols"], dtype=hints["dtype"], memory_map=path is not None)
+    return pd.read_excel(source, usecols=hints["usecols"])
+
+def prepare_event_log(df, hints):
+    # Parse dates (with the format detected from the sample, when there is one)
+    # Values blanked because they did not parse are counted for the quality report
+    coerced = {}
+    with stage("parse_dates"):
+        for col in DATE_COLUMNS:
+            parsed = pd.to_datetime(df[col], errors='coerce', format=hints["date_formats"].get(col))
+            failed = parsed.isna() & df[col].notna()
+            if failed.any():
+                # The format (from the sample, or inferred from the first value) does
+                # not hold for every row; rows in another format get a per-value parse
+                parsed = parsed.fillna(pd.to_datetime(df[col][failed], errors='coerce', format='mixed'))
+            coerced[col] = int((parsed.isna() & df[col].notna()).sum())
+            df[col] = parsed
+    # Stray text in numeric columns is blanked, like unparseable timestamps
+    for col in NUMERIC_COLUMNS:
+        if df[col].dtype == object:
+            parsed = pd.to_numeric(df[col], errors='coerce')
+            coerced[col] = int((parsed.isna() & df[col].notna()).sum())
+            df[col] = parsed
+    df.attrs["coerced_values"] = {col: count for col, count in coerced.items() if count}
+
+    # Dictionary-encode IDs once; everything downstream groups and compares codes
+    with stage("encode"):
+        return encode_event_log(df)
+
+def load_event_log(file, filename, hints):
+    return prepare_event_log(read_event_log(file, filename, hints), hints)
@@ -13,6 +13,15 @@ SCENARIO_STEPS = {
     "SCE005": ["PR0001", "PR0003", "PR0004", "PR0014", "PR0012", "PR0006"],
 }
 
+# Export / dangerous-good flags of each scenario, as the dataset generators assign them
+SCENARIO_FLAGS = {
+    "SCE001": {"Export Flag": 1, "Dangerous Flag": 1},
+    "SCE002": {"Export Flag": 1, "Dangerous Flag": 2},
+    "SCE003": {"Export Flag": 2, "Dangerous Flag": 1},
+    "SCE004": {"Export Flag": 2, "Dangerous Flag": 2},
+    "SCE005": {"Export Flag": 2, "Dangerous Flag": 2},
+}
+
 CORPORATE_COLORS = {
     "blue": "#2b6cb0",
     "green": "#48bb78",
@@ -70,6 +79,20 @@ def generate_breach_plot(results):
             type_counts["Out of Order"] += 1
         else:
             type_counts["None"] += 1
+    return plot_breach_type_counts(type_counts)
+
+def count_breach_plot_types(missing_counts, out_of_order_counts):
+    # generate_breach_plot's counting, from the per-case count columns
+    missing = missing_counts.to_numpy() > 0
+    out_of_order = out_of_order_counts.to_numpy() > 0
+    return {
+        "Missing": int((missing & ~out_of_order).sum()),
+        "Out of Order": int((~missing & out_of_order).sum()),
+        "Both": int((missing & out_of_order).sum()),
+        "None": int((~missing & ~out_of_order).sum()),
+    }
+
+def plot_breach_type_counts(type_counts):
     total_orders = sum(type_counts.values()) if sum(type_counts.values()) > 0 else 1
     fig, ax = plt.subplots(figsize=(6, 4))
     colors = [
@@ -101,3 +124,9 @@ def generate_breach_plot(results):
 def calculate_quantity_deviation(yield_qty, scrap_qty):
     total = yield_qty + scrap_qty
     return (scrap_qty / total * 100) if total > 0 else 0.0
+
+
+def calculate_quantity_deviation_series(yield_qty, scrap_qty):
+    # Same as calculate_quantity_deviation, for whole columns at once
+    total = yield_qty + scrap_qty
+    return (scrap_qty / total.where(total > 0) * 100).fillna(0.0)
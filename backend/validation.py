@@ -0,0 +1,156 @@
+import io
+import re
+from datetime import datetime
+
+import pandas as pd
+
+from backend.encoding import ID_COLUMNS, STEP_ID_COLUMNS
+
+REQUIRED_COLUMNS = [
+    'Order-No.', 'Customer-No.', 'Item-No.',
+    'Export to not EU [1 = n, 2 = y]', 'Dangerous Good [1 = n, 2 = y]',
+    'Planed-Master-Scenario-No.',
+    'Planed-Master-Order-Processing-Ongoing Position No.',
+    'Planed-Master-Order-Processing-Position-No. as an ID',
+    'Planed-Master-Order-Processing-Start-Time',
+    'Planed-Master-Order-Processing-End-Time',
+    'As-Is-Real-Order-Processing-Ongoing Position No.',
+    'As-Is-Master-Order-Processing-Position-No. as an ID',
+    'As-Is-Real-Order-Processing-Start-Time',
+    'As-Is-Real-Order-Processing-End-Time',
+    'Final Yield Quantity',
+    'Total Scrap Quantity'
+]
+
+DATE_COLUMNS = [
+    'Planed-Master-Order-Processing-Start-Time',
+    'Planed-Master-Order-Processing-End-Time',
+    'As-Is-Real-Order-Processing-Start-Time',
+    'As-Is-Real-Order-Processing-End-Time'
+]
+
+NUMERIC_COLUMNS = [
+    'Export to not EU [1 = n, 2 = y]', 'Dangerous Good [1 = n, 2 = y]',
+    'Planed-Master-Order-Processing-Ongoing Position No.',
+    'As-Is-Real-Order-Processing-Ongoing Position No.',
+    'Final Yield Quantity',
+    'Total Scrap Quantity'
+]
+
+# Formats tried on the sampled timestamps, most common first
+TIMESTAMP_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%dT%H:%M:%S",
+    "%d.%m.%Y %H:%M:%S",
+    "%d.%m.%Y %H:%M",
+    "%d/%m/%Y %H:%M",
+]
+
+# Reference step IDs look like PR0001; anything else is reported (not rejected)
+STEP_ID_PATTERN = re.compile(r"^[A-Za-z]+\d+$")
+
+SNIFF_BYTES = 64 * 1024
+SAMPLE_ROWS = 200
+
+def sniff_upload(stream, filename):
+    # Header plus the first SAMPLE_ROWS rows, without parsing the whole file
+    try:
+        if filename.endswith('.csv'):
+            head = stream.read(SNIFF_BYTES)
+            if len(head) == SNIFF_BYTES and b"\n" in head:
+                head = head[:head.rfind(b"\n") + 1]  # drop the partial last line
+            return pd.read_csv(io.BytesIO(head), dtype=str, nrows=SAMPLE_ROWS, keep_default_na=True)
+        if filename.endswith('.xlsx'):
+            from openpyxl import load_workbook
+            workbook = load_workbook(stream, read_only=True, data_only=True)
+            try:
+                rows = list(workbook.active.iter_rows(max_row=SAMPLE_ROWS + 1, values_only=True))
+            finally:
+                workbook.close()
+            if not rows:
+                return pd.DataFrame()
+            return pd.DataFrame(rows[1:], columns=[str(c) if c is not None else '' for c in rows[0]])
+        return pd.read_excel(stream, nrows=SAMPLE_ROWS)
+    finally:
+        stream.seek(0)
+
+def _timestamp_format(values):
+    # First format that parses every sampled value, or None
+    strings = [v for v in values if isinstance(v, str)]
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            for v in strings:
+                datetime.strptime(v.strip(), fmt)
+        except ValueError:
+            continue
+        return fmt
+    return None
+
+def _is_number(value):
+    if isinstance(value, (int, float)):
+        return True
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+def validate_sample(sample):
+    """Check a sniffed sample against the expected schema.
+
+    Returns (problems, hints). Problems with severity "error" mean the upload
+    should be rejected; hints are passed on to the full parser.
+    """
+    problems = []
+    hints = {"usecols": REQUIRED_COLUMNS, "dtype": {}, "date_formats": {}}
+
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in sample.columns]
+    for col in missing_cols:
+        problems.append({"column": col, "severity": "error", "problem": "missing column"})
+    if missing_cols:
+        return problems, hints
+
+    for col in DATE_COLUMNS:
+        values = sample[col].dropna()
+        if values.empty or all(isinstance(v, datetime) for v in values):
+            continue
+        fmt = _timestamp_format(values)
+        if fmt is not None:
+            hints["date_formats"][col] = fmt
+            continue
+        parsed = pd.to_datetime(values, errors='coerce', format='mixed')
+        bad = values[parsed.isna()]
+        if len(bad) == len(values):
+            problems.append({"column": col, "severity": "error",
+                             "problem": f"no parseable timestamps in sample, e.g. {bad.iloc[0]!r}"})
+        elif len(bad):
+            problems.append({"column": col, "severity": "warning",
+                             "problem": f"{len(bad)} of {len(values)} sampled timestamps unparseable (will be blank), e.g. {bad.iloc[0]!r}"})
+
+    for col in NUMERIC_COLUMNS:
+        values = sample[col].dropna()
+        bad = values[~values.map(_is_number)]
+        if len(values) and len(bad) == len(values):
+            problems.append({"column": col, "severity": "error",
+                             "problem": f"expected numbers, e.g. got {bad.iloc[0]!r}"})
+        elif len(bad):
+            problems.append({"column": col, "severity": "warning",
+                             "problem": f"{len(bad)} of {len(values)} sampled values are not numbers (will be blank), e.g. {bad.iloc[0]!r}"})
+
+    for col in ID_COLUMNS + STEP_ID_COLUMNS:
+        values = sample[col].dropna()
+        if col in ID_COLUMNS and len(values) < len(sample):
+            problems.append({"column": col, "severity": "warning",
+                             "problem": f"{len(sample) - len(values)} of {len(sample)} sampled rows have no value"})
+        if col in STEP_ID_COLUMNS:
+            bad = values[~values.astype(str).str.match(STEP_ID_PATTERN)]
+            if len(bad):
+                problems.append({"column": col, "severity": "warning",
+                                 "problem": f"{len(bad)} sampled step IDs do not look like 'PR0001', e.g. {bad.iloc[0]!r}"})
+        # Text IDs are read straight into categoricals; numeric IDs keep their type.
+        # Step IDs are read as text: encode_event_log builds their shared vocabulary.
+        if len(values) and not values.map(_is_number).all():
+            hints["dtype"][col] = str if col in STEP_ID_COLUMNS else 'category'
+
+    return problems, hints
@@ -0,0 +1,241 @@
+"""Load test for POST /analyze-with-dashboard. Runs fully offline.
+
+In-process (default): --concurrency worker processes, each with its own Flask
+test client, pull requests from a shared queue:
+
+    python -m benchmarks.loadtest --requests 40 --concurrency 4
+
+Against a local gunicorn (pass the master PID to sample per-worker RSS):
+
+    gunicorn -w 4 backend.app:app &
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --server-pid $!
+
+Payloads are synthetic logs from benchmarks/workloads.py; --mix takes
+pattern:cases:weight entries. --baseline compares against a stored run and
+exits non-zero when p99 latency or throughput regress by more than
+--max-regression; it refuses runs whose requests, concurrency, mix, seed or
+target differ from the baseline's.
+"""
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import platform
+import random
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.workloads import make_event_log
+
+DEFAULT_MIX = "neat:200:3,complex:200:3,worst:500:2,duplicates:2000:1"
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "loadtest.json")
+ENDPOINT = "/analyze-with-dashboard"
+
+def parse_mix(mix):
+    entries = []
+    for entry in mix.split(","):
+        pattern, cases, weight = entry.split(":")
+        entries.append((pattern, int(cases), float(weight)))
+    return entries
+
+def write_payloads(mix, seed, directory):
+    # One CSV per mix entry, in the upload layout
+    paths = []
+    for i, (pattern, cases, weight) in enumerate(mix):
+        path = os.path.join(directory, f"{pattern}_{cases}.csv")
+        make_event_log(cases, pattern, seed + i).to_csv(path, index=False, date_format="%Y-%m-%d %H:%M:%S")
+        paths.append((path, weight))
+    return paths
+
+def rss_mb(pid="self"):
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    values[line.split(":")[0]] = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return values.get("VmRSS"), values.get("VmHWM")
+
+# --- in-process target: one Flask test client per worker process ---
+
+_client = None
+
+def _init_worker():
+    global _client
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    from backend.app import app
+    _client = app.test_client()
+
+def _inprocess_request(path):
+    with open(path, "rb") as f:
+        start = time.perf_counter()
+        response = _client.post(ENDPOINT, data={"file": (f, os.path.basename(path))})
+        latency = time.perf_counter() - start
+    rss, peak = rss_mb()
+    return {"latency": latency, "status": response.status_code, "bytes": len(response.data),
+            "worker": os.getpid(), "rss_mb": rss, "peak_rss_mb": peak}
+
+# --- HTTP target: local gunicorn or dev server ---
+
+def _http_request(url, path):
+    boundary = uuid.uuid4().hex
+    with open(path, "rb") as f:
+        content = f.read()
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; "
+            f"filename=\"{os.path.basename(path)}\"\r\nContent-Type: text/csv\r\n\r\n").encode() \
+        + content + f"\r\n--{boundary}--\r\n".encode()
+    request = urllib.request.Request(url.rstrip("/") + ENDPOINT, data=body, method="POST",
+                                     headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=600) as response:
+            data, status = response.read(), response.status
+    except urllib.error.HTTPError as e:
+        data, status = e.read(), e.code
+    except OSError:
+        data, status = b"", 0
+    return {"latency": time.perf_counter() - start, "status": status, "bytes": len(data), "worker": None}
+
+def server_worker_rss(master_pid):
+    # Per-worker RSS of a gunicorn master's child processes
+    workers = {}
+    try:
+        for task in os.listdir(f"/proc/{master_pid}/task"):
+            with open(f"/proc/{master_pid}/task/{task}/children") as children:
+                for pid in children.read().split():
+                    rss, peak = rss_mb(pid)
+                    workers[pid] = {"rss_mb": rss, "peak_rss_mb": peak}
+    except OSError:
+        pass
+    return workers
+
+def run_load(payloads, requests, concurrency, seed, url=None, server_pid=None):
+    rng = random.Random(seed)
+    paths = [path for path, _ in payloads]
+    plan = rng.choices(paths, weights=[weight for _, weight in payloads], k=requests)
+
+    if url is None:
+        with multiprocessing.get_context("spawn").Pool(concurrency, initializer=_init_worker) as pool:
+            pool.map(_inprocess_request, paths[:concurrency])  # warm-up, not recorded
+            start = time.perf_counter()
+            samples = pool.map(_inprocess_request, plan, chunksize=1)
+            elapsed = time.perf_counter() - start
+    else:
+        with concurrent.futures.ThreadPoolExecutor(concurrency) as pool:
+            start = time.perf_counter()
+            samples = list(pool.map(lambda path: _http_request(url, path), plan))
+            elapsed = time.perf_counter() - start
+
+    workers = {}
+    for sample in samples:
+        if sample["worker"] is not None:
+            worker = workers.setdefault(str(sample["worker"]), {"requests": 0, "rss_mb": 0, "peak_rss_mb": 0})
+            worker["requests"] += 1
+            worker["rss_mb"] = max(worker["rss_mb"], sample["rss_mb"] or 0)
+            worker["peak_rss_mb"] = max(worker["peak_rss_mb"], sample["peak_rss_mb"] or 0)
+    if server_pid:
+        workers = server_worker_rss(server_pid)
+
+    latencies = np.array([sample["latency"] for sample in samples])
+    errors = sum(1 for sample in samples if sample["status"] != 200)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_seconds": elapsed,
+        "throughput_rps": requests / elapsed,
+        "error_rate": errors / requests,
+        "latency_seconds": {
+            "p50": float(np.percentile(latencies, 50)),
+            "p90": float(np.percentile(latencies, 90)),
+            "p99": float(np.percentile(latencies, 99)),
+            "max": float(latencies.max()),
+            "mean": float(latencies.mean()),
+        },
+        "response_bytes_mean": float(np.mean([sample["bytes"] for sample in samples])),
+        "workers": workers,
+    }
+
+def configuration(result):
+    # What a run's numbers depend on; a baseline is only comparable when these match
+    return {
+        "requests": result["report"]["requests"],
+        "concurrency": result["report"]["concurrency"],
+        "mix": result["meta"]["mix"],
+        "seed": result["meta"]["seed"],
+        "target": result["meta"]["target"],
+    }
+
+def compare_to_baseline(result, baseline_path, max_regression):
+    with open(baseline_path) as f:
+        stored = json.load(f)
+    expected, actual = configuration(stored), configuration(result)
+    mismatched = [key for key in expected if expected[key] != actual[key]]
+    if mismatched:
+        details = ", ".join(f"{key} {actual[key]!r} vs baseline {expected[key]!r}" for key in mismatched)
+        raise SystemExit(f"Not comparable with {baseline_path}: {details}")
+    baseline, report = stored["report"], result["report"]
+    checks = [
+        ("p50 latency", baseline["latency_seconds"]["p50"], report["latency_seconds"]["p50"], True),
+        ("p99 latency", baseline["latency_seconds"]["p99"], report["latency_seconds"]["p99"], True),
+        ("throughput", baseline["throughput_rps"], report["throughput_rps"], False),
+    ]
+    regressed = False
+    for name, old, new, lower_is_better in checks:
+        change = (new - old) / old if old else 0.0
+        worse = change > max_regression if lower_is_better else change < -max_regression
+        regressed |= worse
+        print(f"{name:12s} baseline {old:9.3f}  current {new:9.3f}  {change:+7.1%}{'  REGRESSION' if worse else ''}")
+    if report["error_rate"] > baseline["error_rate"]:
+        regressed = True
+        print(f"error rate   baseline {baseline['error_rate']:.2%}  current {report['error_rate']:.2%}  REGRESSION")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="pattern:cases:weight,...")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--url", help="base URL of a local server; default drives the app in-process")
+    parser.add_argument("--server-pid", type=int, help="gunicorn master PID, for per-worker RSS")
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--baseline", nargs="?", const=DEFAULT_BASELINE, help="compare against a stored report")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, help="store this run as the baseline")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as directory:
+        payloads = write_payloads(parse_mix(args.mix), args.seed, directory)
+        report = run_load(payloads, args.requests, args.concurrency, args.seed, args.url, args.server_pid)
+
+    result = {
+        "meta": {
+            "started": datetime.now(timezone.utc).isoformat(),
+            "target": args.url or "in-process",
+            "mix": args.mix,
+            "seed": args.seed,
+            "machine": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "report": report,
+    }
+    print(json.dumps(report, indent=2))
+    for path in filter(None, (args.output, args.save_baseline)):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved: {path}")
+    if args.baseline and compare_to_baseline(result, args.baseline, args.max_regression):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
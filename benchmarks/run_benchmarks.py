@@ -0,0 +1,192 @@
+"""Micro-benchmarks for the detection and aggregation hot paths.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks                        # 1k..1M cases, all patterns
+    python -m benchmarks.run_benchmarks --sizes 1000,10000 --patterns complex,worst
+    python -m benchmarks.run_benchmarks --compare old.json new.json
+
+Each benchmark is timed (best of --repeat) and then run once more under
+tracemalloc for allocation figures. Results are written as JSON to
+benchmarks/results/ so runs can be compared.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from backend.analysis import aggregate_case_headers, analyze_cases, case_step_sequences
+from backend.app import convert_types, most_common_breach
+from backend.encoding import ID_COLUMNS, STEP_ID_COLUMNS, compile_scenarios, encode_event_log, step_vocabulary
+from backend.utils import calculate_quantity_deviation, calculate_quantity_deviation_series, detect_breaches
+from benchmarks.workloads import PATTERNS, make_event_log, make_traces
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+def scenario_summary(frame):
+    # Same aggregation as the scenario summary in analyze_with_dashboard
+    return frame.groupby('Derived_Scenario', observed=True).agg({
+        'Missing_Steps_Count': 'mean',
+        'Out_of_Order_Steps_Count': 'mean',
+        'Time_Deviation_Minutes': 'mean',
+        'Order_ID': 'count',
+        'Breach_Type': most_common_breach,
+        'Total_Yield': 'sum',
+        'Total_Scrap': 'sum'
+    })
+
+def build_benchmarks(num_cases, pattern, seed):
+    # name -> (setup() -> state, run(state)); setup is not timed
+    def traces():
+        return make_traces(num_cases, pattern, seed)
+
+    def text_event_log():
+        # IDs as plain strings, as a CSV parse without dtype hints leaves them;
+        # the generator's logs are categorical already
+        log = make_event_log(num_cases, pattern, seed)
+        return log.astype({col: object for col in ID_COLUMNS + STEP_ID_COLUMNS})
+
+    def event_log():
+        return encode_event_log(make_event_log(num_cases, pattern, seed))
+
+    def coded_traces():
+        log = event_log()
+        planned = compile_scenarios(step_vocabulary(log))
+        scenarios = aggregate_case_headers(log)['Derived_Scenario'].tolist()
+        return [(planned.get(s, []), steps) for s, steps in zip(scenarios, case_step_sequences(log))]
+
+    def quantities():
+        rng = np.random.default_rng(seed)
+        yield_qty = pd.Series(rng.integers(0, 300, num_cases))
+        return yield_qty, pd.Series(rng.integers(0, 30, num_cases))
+
+    def case_results():
+        return analyze_cases(event_log())
+
+    return {
+        "detect_breaches": (traces, lambda ts: [detect_breaches(p, a) for _, p, a in ts]),
+        "detect_breaches_codes": (coded_traces, lambda ts: [detect_breaches(p, a) for p, a in ts]),
+        "calculate_quantity_deviation": (
+            lambda: [(int(y), int(s)) for y, s in zip(*quantities())],
+            lambda qs: [calculate_quantity_deviation(y, s) for y, s in qs]),
+        "calculate_quantity_deviation_series": (quantities, lambda q: calculate_quantity_deviation_series(*q)),
+        "encode_event_log": (text_event_log, encode_event_log),
+        "aggregate_case_headers": (event_log, aggregate_case_headers),
+        "case_step_sequences": (event_log, case_step_sequences),
+        "analyze_cases": (event_log, analyze_cases),
+        "convert_types": (lambda: case_results().to_records(), convert_types),
+        "scenario_summary": (lambda: case_results().frame, scenario_summary),
+    }
+
+def measure(setup, run, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        best = min(best, time.perf_counter() - start)
+        del state
+
+    state = setup()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    run(state)
+    peak = tracemalloc.get_traced_memory()[1]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    return best, peak, blocks
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(sizes, patterns, names, repeat, seed):
+    results = []
+    for num_cases in sizes:
+        for pattern in patterns:
+            benchmarks = build_benchmarks(num_cases, pattern, seed)
+            for name in names or benchmarks:
+                setup, run = benchmarks[name]
+                seconds, peak, blocks = measure(setup, run, repeat)
+                row = {
+                    "benchmark": name,
+                    "pattern": pattern,
+                    "cases": num_cases,
+                    "seconds": seconds,
+                    "ops_per_sec": num_cases / seconds if seconds else None,
+                    "peak_alloc_bytes": peak,
+                    "alloc_blocks": blocks,
+                }
+                results.append(row)
+                print(f"{name:38s} {pattern:12s} {num_cases:>9,d} cases  {seconds:9.4f}s  "
+                      f"{row['ops_per_sec']:>14,.0f} ops/s  peak {peak / 2**20:8.1f} MiB")
+    return results
+
+def compare(baseline_path, current_path):
+    with open(baseline_path) as f:
+        baseline = {(r["benchmark"], r["pattern"], r["cases"]): r for r in json.load(f)["results"]}
+    with open(current_path) as f:
+        current = json.load(f)["results"]
+    print(f"{'benchmark':38s} {'pattern':12s} {'cases':>9s}  {'speedup':>8s}  {'peak alloc':>10s}")
+    for row in current:
+        old = baseline.get((row["benchmark"], row["pattern"], row["cases"]))
+        if old is None:
+            continue
+        speedup = old["seconds"] / row["seconds"] if row["seconds"] else float("inf")
+        alloc = row["peak_alloc_bytes"] / old["peak_alloc_bytes"] if old["peak_alloc_bytes"] else float("nan")
+        print(f"{row['benchmark']:38s} {row['pattern']:12s} {row['cases']:>9,d}  {speedup:7.2f}x  {alloc:9.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--patterns", default=",".join(PATTERNS))
+    parser.add_argument("--benchmarks", default="", help="comma-separated subset of benchmark names")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    patterns = [pattern for pattern in args.patterns.split(",") if pattern]
+    names = [name for name in args.benchmarks.split(",") if name]
+    started = datetime.now(timezone.utc)
+    results = run_suite(sizes, patterns, names, args.repeat, args.seed)
+
+    output = args.output or os.path.join(RESULTS_DIR, started.strftime("%Y%m%dT%H%M%SZ") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "meta": {
+                "started": started.isoformat(),
+                "git_commit": git_commit(),
+                "python": platform.python_version(),
+                "pandas": pd.__version__,
+                "numpy": np.__version__,
+                "machine": platform.platform(),
+                "seed": args.seed,
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }, f, indent=2)
+    print(f"Saved: {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+from event_log_generator import generate_dataset, generate_traces
+
+# Benchmark and load-test inputs come from the seeded generator in
+# event_log_generator.py, so they follow the same breach patterns as the
+# generated datasets. Patterns are generator modes; these run by default.
+PATTERNS = ["neat", "missing", "out_of_order", "extra", "duplicates", "complex", "worst"]
+
+def make_traces(num_cases, pattern, seed=0):
+    # [(scenario, planned steps, actual steps), ...]
+    return generate_traces(num_cases, pattern, seed)
+
+def make_event_log(num_cases, pattern, seed=0):
+    """Parsed event log in upload layout: one row per planned step, as the generators write it.
+
+    Built column-wise (categorical IDs, datetime64 times) so million-case logs fit in memory.
+    """
+    return generate_dataset(num_cases, pattern, seed)
@@ -1,89 +1,87 @@
 import pandas as pd
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import CellIsRule, FormulaRule
 from openpyxl.styles import PatternFill, Font
-from openpyxl.utils.dataframe import dataframe_to_rows
+from openpyxl.utils import get_column_letter
 
-# Load master dataset
-df = pd.read_csv("dataset_master_07.08.csv")
+# Colour-coded Excel copy of the master dataset. The workbook is write-only
+# (rows stream to disk) and the colours are conditional-format rules over whole
+# columns instead of a PatternFill per cell, so memory stays flat for any size.
 
-# Get column indexes dynamically
-cols = list(df.columns)
-idx_order_no = cols.index("Order-No.")
-idx_planned_step = cols.index("Planed-Master-Order-Processing-Position-No. as an ID")
-idx_as_is_step = cols.index("As-Is-Master-Order-Processing-Position-No. as an ID")
-idx_yield_qty = cols.index("Final Yield Quantity")
-idx_scrap_qty = cols.index("Total Scrap Quantity")
-idx_time_dev = None
-if "Time_Deviation_Minutes" in cols:
-    idx_time_dev = cols.index("Time_Deviation_Minutes")
+SOURCE = "dataset_master_07.08.csv"
+TARGET = "dataset_master_07.08.xlsx"
+CHUNK_ROWS = 100_000
+
+# Order-No. prefix -> fill, one per generator mode
+MODE_FILLS = {
+    "NEAT": "C6EFCE",
+    "MIXED": "FFEB9C",
+    "MISSING": "FFC7CE",
+    "OUT_OF_ORDER": "BDD7EE",
+    "EXTRA": "F4B084",
+    "DUPLICATES": "FFD966",
+    "DELAYED": "B4C6E7",
+    "QUANTITY": "E2EFDA",
+    "COMPLEX": "D9D2E9",
+}
+
+def fill(color):
+    return PatternFill("solid", fgColor=color)
 
-# Create workbook & sheet
-wb = Workbook()
-ws = wb.active
-ws.title = "Master Dataset"
+wb = Workbook(write_only=True)
+ws = wb.create_sheet("Master Dataset")
+ws.freeze_panes = "A2"
 
-# Add header
-for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), 1):
-    ws.append(row)
-    if r_idx == 1:  # Header styling
-        for cell in ws[r_idx]:
+num_rows = 0
+cols = None
+for chunk in pd.read_csv(SOURCE, chunksize=CHUNK_ROWS):
+    if cols is None:
+        # Header styling
+        cols = list(chunk.columns)
+        header = []
+        for name in cols:
+            cell = WriteOnlyCell(ws, value=name)
             cell.font = Font(bold=True, color="FFFFFF")
-            cell.fill = PatternFill("solid", fgColor="4F81BD")
+            cell.fill = fill("4F81BD")
+            header.append(cell)
+        ws.append(header)
+    for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None):
+        ws.append(row)
+    num_rows += len(chunk)
 
-# Apply color coding
-for r_idx, row in enumerate(ws.iter_rows(min_row=2, max_row=ws.max_row), 2):
-    order_no = row[idx_order_no].value
-    yield_qty = row[idx_yield_qty].value
-    scrap_qty = row[idx_scrap_qty].value
-    planned_step = row[idx_planned_step].value
-    as_is_step = row[idx_as_is_step].value
-    time_dev = None
-    if idx_time_dev is not None:
-        try:
-            time_dev = float(row[idx_time_dev].value)
-        except:
-            pass
+# Column letters, looked up by name
+def col(name):
+    return get_column_letter(cols.index(name) + 1)
 
-    # Mode-based color for Order-No.
-    if order_no.startswith("NEAT"):
-        row[idx_order_no].fill = PatternFill("solid", fgColor="C6EFCE")
-    elif order_no.startswith("MIXED"):
-        row[idx_order_no].fill = PatternFill("solid", fgColor="FFEB9C")
-    elif order_no.startswith("MISSING"):
-        row[idx_order_no].fill = PatternFill("solid", fgColor="FFC7CE")
-    elif order_no.startswith("OUT_OF_ORDER"):
-        row[idx_order_no].fill = PatternFill("solid", fgColor="BDD7EE")
-    elif order_no.startswith("EXTRA"):
-        row[idx_order_no].fill = PatternFill("solid", fgColor="F4B084")
-    elif order_no.startswith("DUPLICATES"):
-        row[idx_order_no].fill = PatternFill("solid", fgColor="FFD966")
-    elif order_no.startswith("DELAYED"):
-        row[idx_order_no].fill = PatternFill("solid", fgColor="B4C6E7")
-    elif order_no.startswith("QUANTITY"):
-        row[idx_order_no].fill = PatternFill("solid", fgColor="E2EFDA")
-    elif order_no.startswith("COMPLEX"):
-        row[idx_order_no].fill = PatternFill("solid", fgColor="D9D2E9")
+def rows(name):
+    return f"{col(name)}2:{col(name)}{num_rows + 1}"
 
-    # Yield colors
-    if yield_qty is not None:
-        if yield_qty >= 22:
-            row[idx_yield_qty].fill = PatternFill("solid", fgColor="C6EFCE")
-        elif yield_qty < 20:
-            row[idx_yield_qty].fill = PatternFill("solid", fgColor="FFC7CE")
+order_no = col("Order-No.")
+planned_step = col("Planed-Master-Order-Processing-Position-No. as an ID")
+as_is_step = col("As-Is-Master-Order-Processing-Position-No. as an ID")
 
-    # Scrap red if >0
-    if scrap_qty and scrap_qty > 0:
-        row[idx_scrap_qty].fill = PatternFill("solid", fgColor="FFC7CE")
+# Mode-based color for Order-No.
+for prefix, color in MODE_FILLS.items():
+    ws.conditional_formatting.add(rows("Order-No."), FormulaRule(
+        formula=[f'LEFT({order_no}2,{len(prefix)})="{prefix}"'], fill=fill(color), stopIfTrue=True))
 
-    # Highlight mismatched steps
-    if planned_step != as_is_step:
-        row[idx_planned_step].fill = PatternFill("solid", fgColor="FFF2CC")
-        row[idx_as_is_step].fill = PatternFill("solid", fgColor="FFF2CC")
+# Yield colors
+ws.conditional_formatting.add(rows("Final Yield Quantity"), CellIsRule(operator="greaterThanOrEqual", formula=["22"], fill=fill("C6EFCE")))
+ws.conditional_formatting.add(rows("Final Yield Quantity"), CellIsRule(operator="lessThan", formula=["20"], fill=fill("FFC7CE")))
 
-    # Highlight time deviation
-    if time_dev and time_dev > 0:
-        row[idx_time_dev].fill = PatternFill("solid", fgColor="FCE4D6")
+# Scrap red if >0
+ws.conditional_formatting.add(rows("Total Scrap Quantity"), CellIsRule(operator="greaterThan", formula=["0"], fill=fill("FFC7CE")))
+
+# Highlight mismatched steps
+mismatch = FormulaRule(formula=[f"${planned_step}2<>${as_is_step}2"], fill=fill("FFF2CC"))
+ws.conditional_formatting.add(f"{rows('Planed-Master-Order-Processing-Position-No. as an ID')} "
+                              f"{rows('As-Is-Master-Order-Processing-Position-No. as an ID')}", mismatch)
+
+# Highlight time deviation
+if "Time_Deviation_Minutes" in cols:
+    ws.conditional_formatting.add(rows("Time_Deviation_Minutes"), CellIsRule(operator="greaterThan", formula=["0"], fill=fill("FCE4D6")))
 
 # Save Excel
-wb.save("dataset_master_07.08.xlsx")
-print("✅ Saved color-coded Excel → dataset_master_07.08.xlsx")
+wb.save(TARGET)
+print(f"✅ Saved color-coded Excel → {TARGET}")
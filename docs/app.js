@@ -1,19 +1,53 @@
 let breachResults = [];
+let analysisId = null;
+
+const API_BASE = 'https://process-mining-ui.onrender.com';
 
 const analyzeBtn = document.getElementById('analyzeBtn');
 const downloadBtn = document.getElementById('downloadBtn');
+const downloadXlsxBtn = document.getElementById('downloadXlsxBtn');
 const csvFileInput = document.getElementById('csvFile');
 const statusMessage = document.getElementById('statusMessage');
 const spinner = document.getElementById('spinner');
 
 analyzeBtn.addEventListener('click', handleAnalyzeAndDashboard);
-downloadBtn.addEventListener('click', downloadCSV);
+downloadBtn.addEventListener('click', () => downloadReport('csv'));
+downloadXlsxBtn.addEventListener('click', () => downloadReport('xlsx'));
 
 function formatNumber(value) {
     if (value === null || value === undefined || isNaN(value)) return '';
     return Number(value).toFixed(2);
 }
 
+// The lean profile leaves out fields derivable from the others; rebuild them here
+function stepList(title, steps) {
+    return `<strong>${title}:</strong><ul>` + steps.map(s => `<li>${s === null ? 'nan' : s}</li>`).join('') + "</ul>";
+}
+
+function formatDetails(breach) {
+    const parts = [];
+    if (breach.Missing_Steps.length) parts.push(stepList("Missing Steps", breach.Missing_Steps));
+    if (breach.Out_of_Order_Steps.length) parts.push(stepList("Out of Order", breach.Out_of_Order_Steps));
+    if (breach.Extra_Steps.length) parts.push(stepList("Extra Steps (unexpected)", breach.Extra_Steps));
+    if (breach.Duplicates.length) parts.push(stepList("Duplicate Steps", breach.Duplicates));
+    if (!parts.length) parts.push("<strong>No Breach</strong>");
+    parts.push(`<strong>Counts:</strong> Missing - ${breach.Missing_Steps.length} | Out-of-Order - ${breach.Out_of_Order_Steps.length} | Extra - ${breach.Extra_Steps.length} | Duplicates - ${breach.Duplicates.length}`);
+    return parts.join("<br>");
+}
+
+function withDerivedFields(breach) {
+    return {
+        ...breach,
+        Scenario_Used: breach.Derived_Scenario,
+        Case_ID: `${breach.Order_ID}_${breach.Item_ID}`,
+        Missing_Steps_Count: breach.Missing_Steps.length,
+        Out_of_Order_Steps_Count: breach.Out_of_Order_Steps.length,
+        Extra_Steps_Count: breach.Extra_Steps.length,
+        Duplicate_Steps_Count: breach.Duplicates.length,
+        Details: formatDetails(breach)
+    };
+}
+
 async function handleAnalyzeAndDashboard() {
     const file = csvFileInput.files[0];
     if (!file) {
@@ -30,7 +64,7 @@ async function handleAnalyzeAndDashboard() {
     analyzeBtn.disabled = true;
 
     try {
-        const response = await fetch('https://process-mining-ui.onrender.com/analyze-with-dashboard', {
+        const response = await fetch(`${API_BASE}/analyze-with-dashboard?profile=lean`, {
             method: 'POST',
             body: formData
         });
@@ -41,7 +75,8 @@ async function handleAnalyzeAndDashboard() {
         }
 
         const data = await response.json();
-        breachResults = data.results || [];
+        breachResults = (data.results || []).map(withDerivedFields);
+        analysisId = data.analysis_id;
 
         // Fill tables
         renderAllTables();
@@ -154,40 +189,15 @@ function renderScenarioSummary(summary) {
     });
 }
 
-function downloadCSV() {
-    if (!breachResults.length) {
+// The report is built and streamed by the server from the stored analysis
+function downloadReport(format) {
+    if (!analysisId) {
         alert("No data to download!");
         return;
     }
-
-    const header = [
-        "Order ID", "Item ID", "Customer ID", "Export Flag", "Dangerous Flag",
-        "Derived Scenario", "Scenario Used", "Planned Steps Count", "As-Is Steps Count",
-        "Planned Start", "Planned End", "Actual Start", "Actual End",
-        "Time Planned Minutes", "Time Actual Minutes", "Time Deviation Minutes",
-        "Case ID", "Breach Type", "Details", "Final Yield Quantity",
-        "Total Scrap Quantity", "Quantity Deviation Percent"
-    ];
-
-    const rows = breachResults.map(breach => [
-        breach.Order_ID, breach.Item_ID, breach.Customer_ID, breach.Export_Flag, breach.Dangerous_Flag,
-        breach.Derived_Scenario, breach.Scenario_Used, breach.Planned_Steps_Count, breach.As_Is_Steps_Count,
-        breach.Planned_Start || '', breach.Planned_End || '', breach.Actual_Start || '', breach.Actual_End || '',
-        formatNumber(breach.Time_Planned_Minutes), formatNumber(breach.Time_Actual_Minutes), formatNumber(breach.Time_Deviation_Minutes),
-        breach.Case_ID, breach.Breach_Type, breach.Details, breach.Total_Yield, breach.Total_Scrap,
-        formatNumber(breach.Quantity_Deviation_Percent)
-    ]);
-
-    let csvContent = header.join(",") + "\n";
-    rows.forEach(r => {
-        csvContent += r.map(val => `"${val}"`).join(",") + "\n";
-    });
-
-    const blob = new Blob([csvContent], { type: 'text/csv' });
-    const url = URL.createObjectURL(blob);
     const a = document.createElement('a');
-    a.href = url;
-    a.download = 'breach_report.csv';
+    a.href = `${API_BASE}/analysis/${analysisId}/export.${format}`;
+    a.download = `breach_report.${format}`;
     document.body.appendChild(a);
     a.click();
     document.body.removeChild(a);
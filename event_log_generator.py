@@ -0,0 +1,256 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from backend.utils import SCENARIO_FLAGS, SCENARIO_STEPS
+
+# Vectorized, seeded version of the dataset scripts (latest_super_stress_07.08.py,
+# "latest _dataset_08.08.py", "Edge Cases_dataset.py"). Same row layout: one row
+# per planned step, as-is columns empty when the step never happened.
+#
+#   python event_log_generator.py --mode complex --orders 1000000 --output complex.csv
+#   python event_log_generator.py --mode worst --orders 1000000 --output worst.parquet
+
+MODES = ["neat", "mixed", "missing", "out_of_order", "extra", "duplicates", "delayed",
+         "quantity", "complex", "worst", "shuffled", "missing_endpoints"]
+DELAY_MODES = ("delayed", "complex", "worst")
+QUANTITY_MODES = ("quantity", "complex", "mixed", "worst")
+
+# Cases are generated in fixed blocks, each with its own seed, so the output only
+# depends on (seed, mode, orders) and memory stays flat however many orders are asked for
+BLOCK_ORDERS = 100_000
+BASE_START = np.datetime64("2025-07-15T08:00")
+CASE_INTERVAL = np.timedelta64(60, "m")
+STEP_MINUTES = 10
+NUM_CUSTOMERS = 20
+NUM_ITEMS = 50
+FINAL_YIELD = 24
+
+# Tokens of the padded actual-step matrix: planned slot index, or one of these
+PAD = -1
+JUNK = -2
+
+SCENARIOS = list(SCENARIO_STEPS)
+STEPS = sorted({step for steps in SCENARIO_STEPS.values() for step in steps})
+MAX_STEPS = max(len(steps) for steps in SCENARIO_STEPS.values())
+WIDTH = MAX_STEPS + 3  # worst mode adds a junk step and a duplicate
+SCENARIO_LENGTHS = np.array([len(SCENARIO_STEPS[s]) for s in SCENARIOS])
+SCENARIO_STEP_CODES = np.full((len(SCENARIOS), MAX_STEPS), -1)
+for _s, _scenario in enumerate(SCENARIOS):
+    SCENARIO_STEP_CODES[_s, :SCENARIO_LENGTHS[_s]] = [STEPS.index(step) for step in SCENARIO_STEPS[_scenario]]
+
+# --- Vectorized step modifications: each edits the selected rows of the token matrix ---
+
+def _randint(rng, low, high):
+    # Uniform integers in [low, high], element-wise
+    return low + (rng.random(len(high)) * (high - low + 1)).astype(int)
+
+def _remove(tokens, lengths, rows, pos):
+    col = np.arange(WIDTH)
+    src = np.minimum(np.where(col < pos[:, None], col, col + 1), WIDTH - 1)
+    shifted = tokens[rows[:, None], src]
+    shifted[:, -1] = PAD
+    tokens[rows] = shifted
+    lengths[rows] -= 1
+
+def _insert(tokens, lengths, rows, pos, values):
+    col = np.arange(WIDTH)
+    src = np.maximum(np.where(col < pos[:, None], col, col - 1), 0)
+    shifted = tokens[rows[:, None], src]
+    shifted[np.arange(len(rows)), pos] = values
+    tokens[rows] = shifted
+    lengths[rows] += 1
+
+def missing_steps(rng, tokens, lengths, rows):
+    _remove(tokens, lengths, rows, _randint(rng, 0, lengths[rows] - 1))
+
+def out_of_order_steps(rng, tokens, lengths, rows):
+    n = lengths[rows]
+    i = _randint(rng, 0, n - 1)
+    j = _randint(rng, 0, n - 2)
+    j += j >= i
+    tokens[rows, i], tokens[rows, j] = tokens[rows, j], tokens[rows, i]
+
+def extra_steps(rng, tokens, lengths, rows):
+    pos = _randint(rng, 0, lengths[rows])
+    _insert(tokens, lengths, rows, pos, JUNK)
+    _insert(tokens, lengths, rows, pos, JUNK)
+
+def duplicate_steps(rng, tokens, lengths, rows):
+    duplicate = tokens[rows, _randint(rng, 0, lengths[rows] - 1)]
+    _insert(tokens, lengths, rows, _randint(rng, 0, lengths[rows]), duplicate)
+
+def worst_steps(rng, tokens, lengths, rows):
+    # Remove one, add a junk step, add a duplicate, rotate three positions
+    missing_steps(rng, tokens, lengths, rows)
+    _insert(tokens, lengths, rows, _randint(rng, 0, lengths[rows]), JUNK)
+    duplicate_steps(rng, tokens, lengths, rows)
+    keys = np.where(np.arange(WIDTH) < lengths[rows, None], rng.random((len(rows), WIDTH)), 2.0)
+    a, b, c = np.argsort(keys, axis=1)[:, :3].T
+    tokens[rows, a], tokens[rows, b], tokens[rows, c] = tokens[rows, c], tokens[rows, a], tokens[rows, b]
+
+def shuffled_steps(rng, tokens, lengths, rows):
+    keys = np.where(np.arange(WIDTH) < lengths[rows, None], rng.random((len(rows), WIDTH)), 2.0)
+    tokens[rows] = np.take_along_axis(tokens[rows], np.argsort(keys, axis=1), axis=1)
+
+def missing_endpoints(rng, tokens, lengths, rows):
+    last = lengths[rows] - 1
+    _remove(tokens, lengths, rows, np.where(rng.random(len(rows)) < 0.5, 0, last))
+
+MODIFIERS = {
+    "missing": missing_steps,
+    "out_of_order": out_of_order_steps,
+    "extra": extra_steps,
+    "duplicates": duplicate_steps,
+    "worst": worst_steps,
+    "shuffled": shuffled_steps,
+    "missing_endpoints": missing_endpoints,
+}
+
+def apply_mode(rng, tokens, lengths, mode):
+    num_cases = len(lengths)
+    if mode in MODIFIERS:
+        MODIFIERS[mode](rng, tokens, lengths, np.arange(num_cases))
+    elif mode == "mixed":
+        # 50% neat, 20% out of order, 15% missing, 15% extra
+        r = rng.random(num_cases)
+        for modifier, selected in ((out_of_order_steps, (r >= 0.5) & (r < 0.7)),
+                                   (missing_steps, (r >= 0.7) & (r < 0.85)),
+                                   (extra_steps, r >= 0.85)):
+            modifier(rng, tokens, lengths, np.flatnonzero(selected))
+    elif mode == "complex":
+        # One of out of order, missing, extra, duplicate per case
+        choice = rng.integers(0, 4, num_cases)
+        for k, modifier in enumerate((out_of_order_steps, missing_steps, extra_steps, duplicate_steps)):
+            modifier(rng, tokens, lengths, np.flatnonzero(choice == k))
+    elif mode not in ("neat", "delayed", "quantity"):
+        raise ValueError(f"Unknown mode '{mode}', expected one of {MODES}")
+
+def first_positions(tokens):
+    # Position of each planned slot's first occurrence in the actual sequence, -1 if absent
+    first = np.full((len(tokens), MAX_STEPS), -1)
+    rows = np.arange(len(tokens))
+    for pos in range(WIDTH - 1, -1, -1):
+        slot = tokens[:, pos]
+        present = slot >= 0
+        first[rows[present], slot[present]] = pos
+    return first
+
+def _block_traces(num_orders, mode, seed, first_order):
+    # Per-case draws of one block: scenario, customer, item and the actual-step
+    # token matrix. Returns the generator too, for the timing and quantity draws.
+    rng = np.random.default_rng([seed, first_order])
+    scenario = rng.integers(0, len(SCENARIOS), num_orders)
+    customer = rng.integers(0, NUM_CUSTOMERS, num_orders)
+    item = rng.integers(0, NUM_ITEMS, num_orders)
+
+    lengths = SCENARIO_LENGTHS[scenario].copy()
+    tokens = np.where(np.arange(WIDTH) < lengths[:, None], np.arange(WIDTH), PAD)
+    apply_mode(rng, tokens, lengths, mode)
+    return rng, scenario, customer, item, tokens, lengths
+
+def generate_block(num_orders, mode="neat", seed=0, first_order=0, order_digits=4):
+    """One block of the event log as a DataFrame, orders first_order+1 .. first_order+num_orders."""
+    rng, scenario, customer, item, tokens, lengths = _block_traces(num_orders, mode, seed, first_order)
+    slots = np.arange(WIDTH)
+    actual_pos = first_positions(tokens)
+
+    step_minutes = np.full(num_orders, STEP_MINUTES)
+    if mode in DELAY_MODES:
+        delayed = rng.random(num_orders) < 0.4
+        step_minutes[delayed] = rng.integers(15, 26, delayed.sum())
+    scrap = np.zeros(num_orders, dtype=int)
+    if mode in QUANTITY_MODES:
+        short = rng.random(num_orders) < 0.4
+        scrap[short] = FINAL_YIELD - rng.integers(15, 24, short.sum())
+
+    # Flatten the (case, planned slot) grid to rows, case-major like the scripts
+    case, slot = np.nonzero(slots[:MAX_STEPS] < SCENARIO_LENGTHS[scenario][:, None])
+    pos = actual_pos[case, slot]
+    present = pos >= 0
+    step_code = SCENARIO_STEP_CODES[scenario[case], slot]
+    step = np.timedelta64(STEP_MINUTES, "m")
+    actual_step = step_minutes[case].astype("timedelta64[m]")
+    start = BASE_START + (first_order + case) * CASE_INTERVAL
+    actual_start = np.where(present, start + pos * actual_step, np.datetime64("NaT"))
+    flags = pd.DataFrame(SCENARIO_FLAGS).T.loc[SCENARIOS].to_numpy()
+
+    order_ids = [f"ORD{i:0{order_digits}d}" for i in range(first_order + 1, first_order + num_orders + 1)]
+    return pd.DataFrame({
+        "Order-No.": pd.Categorical.from_codes(case, order_ids),
+        "Customer-No.": pd.Categorical.from_codes(customer[case], [f"CUS{i:04d}" for i in range(1, NUM_CUSTOMERS + 1)]),
+        "Item-No.": pd.Categorical.from_codes(item[case], [f"ITE{i:04d}" for i in range(1, NUM_ITEMS + 1)]),
+        "Export to not EU [1 = n, 2 = y]": flags[scenario[case], 0],
+        "Dangerous Good [1 = n, 2 = y]": flags[scenario[case], 1],
+        "Planed-Master-Scenario-No.": pd.Categorical.from_codes(scenario[case], SCENARIOS),
+        "Planed-Master-Order-Processing-Ongoing Position No.": slot + 1,
+        "Planed-Master-Order-Processing-Position-No. as an ID": pd.Categorical.from_codes(step_code, STEPS),
+        "Planed-Master-Order-Processing-Start-Time": start + slot * step,
+        "Planed-Master-Order-Processing-End-Time": start + (slot + 1) * step,
+        "As-Is-Real-Order-Processing-Ongoing Position No.": np.where(present, pos + 1, np.nan),
+        "As-Is-Master-Order-Processing-Position-No. as an ID": pd.Categorical.from_codes(np.where(present, step_code, -1), STEPS),
+        "As-Is-Real-Order-Processing-Start-Time": actual_start,
+        "As-Is-Real-Order-Processing-End-Time": actual_start + actual_step,
+        "Final Yield Quantity": FINAL_YIELD - scrap[case],
+        "Total Scrap Quantity": scrap[case],
+    })
+
+def iter_blocks(num_orders, mode="neat", seed=0):
+    order_digits = max(4, len(str(num_orders)))
+    for first_order in range(0, num_orders, BLOCK_ORDERS):
+        yield generate_block(min(BLOCK_ORDERS, num_orders - first_order), mode, seed, first_order, order_digits)
+
+def generate_dataset(num_orders=100, mode="neat", seed=0):
+    return pd.concat(iter_blocks(num_orders, mode, seed), ignore_index=True)
+
+def generate_traces(num_orders=100, mode="neat", seed=0):
+    """[(scenario, planned steps, actual steps), ...] of the cases generate_dataset writes.
+
+    Unlike the row layout, the actual steps keep junk steps (as "JUNK") and repeats.
+    """
+    traces = []
+    for first_order in range(0, num_orders, BLOCK_ORDERS):
+        _, scenario, _, _, tokens, lengths = _block_traces(min(BLOCK_ORDERS, num_orders - first_order),
+                                                           mode, seed, first_order)
+        for s, row, length in zip(scenario, tokens.tolist(), lengths.tolist()):
+            planned = SCENARIO_STEPS[SCENARIOS[s]]
+            traces.append((SCENARIOS[s], planned, [planned[t] if t >= 0 else "JUNK" for t in row[:length]]))
+    return traces
+
+def write_dataset(path, num_orders=100, mode="neat", seed=0):
+    """Stream the log to CSV or Parquet (by extension) block by block; returns the row count."""
+    rows = 0
+    if path.endswith(".parquet"):
+        # pyarrow is only needed for Parquet output
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for block in iter_blocks(num_orders, mode, seed):
+                table = pa.Table.from_pandas(block, schema=writer.schema if writer else None, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                rows += len(block)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        for i, block in enumerate(iter_blocks(num_orders, mode, seed)):
+            block.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            rows += len(block)
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic event log")
+    parser.add_argument("--mode", choices=MODES, default="neat")
+    parser.add_argument("--orders", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="CSV or .parquet path (default dataset_<mode>.csv)")
+    args = parser.parse_args()
+
+    output = args.output or f"dataset_{args.mode}.csv"
+    rows = write_dataset(output, args.orders, args.mode, args.seed)
+    print(f"Saved: {output} ({rows} rows, {os.path.getsize(output) / 1e6:.1f} MB)")
@@ -0,0 +1,59 @@
+import os
+import threading
+import time
+
+from backend import app as app_module
+from backend.admission import AdmissionController
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "test_breach_cases.csv")
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_queued_clients_are_served_round_robin():
+    controller = AdmissionController(budget_mb=10, max_queue=8, timeout=10)
+    running = controller.acquire("a", 10)
+    order, tickets = [], {}
+
+    def request(client, name):
+        tickets[name] = controller.acquire(client, 10)
+        order.append(name)
+
+    threads = []
+    for client, name in [("a", "a1"), ("a", "a2"), ("b", "b1")]:
+        threads.append(threading.Thread(target=request, args=(client, name)))
+        threads[-1].start()
+        _wait_for(lambda: controller.waiting == len(threads))
+
+    controller.release(running)
+    for expected in ["a1", "b1", "a2"]:
+        _wait_for(lambda: expected in tickets)
+        assert order[-1] == expected and controller.running == 1
+        controller.release(tickets[expected])
+    for thread in threads:
+        thread.join()
+    assert controller.stats() == {"budget_mb": 10, "in_use_mb": 0, "running": 0, "queued": 0}
+
+
+def test_full_queue_answers_429_with_retry_after(monkeypatch):
+    controller = AdmissionController(budget_mb=10, max_queue=0)
+    held = controller.acquire("other", 10)
+    monkeypatch.setattr(app_module, "admission", controller)
+
+    with open(SAMPLE, "rb") as f:
+        response = app_module.app.test_client().post("/analyze-with-dashboard",
+                                                     data={"file": (f, "log.csv")})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.get_json()["retry_after"] == int(response.headers["Retry-After"])
+
+    controller.release(held)
+    with open(SAMPLE, "rb") as f:
+        response = app_module.app.test_client().post("/analyze-with-dashboard",
+                                                     data={"file": (f, "log.csv")})
+    assert response.status_code == 200
@@ -0,0 +1,48 @@
+import pytest
+
+from backend.alignment import LOG_MOVE, MODEL_MOVE, SYNC, UNALIGNED, AlignmentCache, align
+from backend.case_results import StepVocabulary
+
+VOCABULARY = StepVocabulary(["PR01", "PR02", "PR03", "PR04"])
+MODEL = (0, 1, 2)
+
+
+def test_align_cost_fitness_and_moves():
+    perfect = align(MODEL, MODEL)
+    assert (perfect.cost, perfect.fitness) == (0, 1.0)
+    assert perfect.moves == [(SYNC, 0), (SYNC, 1), (SYNC, 2)]
+
+    # PR03 early: one log move and one model move around two synchronous ones
+    swapped = align(MODEL, (0, 2, 1))
+    assert swapped.cost == 2
+    assert swapped.fitness == pytest.approx(1 - 2 / 6)
+    assert sorted(move for move, _ in swapped.moves) == [LOG_MOVE, MODEL_MOVE, SYNC, SYNC]
+
+    skipped = align(MODEL, (0, 3), log_cost=2, model_cost=1)
+    assert skipped.cost == 2 + 2 * 1
+    assert skipped.fitness == pytest.approx(1 - 4 / (2 * 2 + 3 * 1))
+    assert align(MODEL, (3, 3, 3), max_cost=2) is UNALIGNED
+    assert align((), ()).fitness == 1.0
+
+
+def test_cache_counts_variants_that_do_not_fit():
+    cache = AlignmentCache(max_size=2)
+    common, rare, late = (0, 1, 2), (0, 2), (2, 1, 0)
+    for trace in [common, common, rare, late, late, late, common, late]:
+        assert cache.align("SCE001", MODEL, trace) == (align(MODEL, trace).cost, align(MODEL, trace).fitness)
+
+    assert cache.distinct == 3
+    assert cache.hits == 2  # only the two stored variants are served from the store
+    assert set(cache.scores) == {("SCE001", common), ("SCE001", rare)}
+    counts, errors = cache.counts.counts, cache.counts.errors
+    assert counts[("SCE001", late)] - errors[("SCE001", late)] <= 4 <= counts[("SCE001", late)]
+    assert counts[("SCE001", common)] == 3
+
+    cache.retain(1)
+    report = cache.report(VOCABULARY)
+    [variant] = report["variants"]
+    assert variant["scenario"] == "SCE001" and variant["cost"] == 4
+    assert variant["cases"] - variant["cases_error"] <= 4 <= variant["cases"]
+    assert sorted(move["step"] for move in variant["moves"]) == ["PR01", "PR01", "PR02", "PR02", "PR03"]
+    assert report["distinct_variants"] == 3 and report["cache_hits"] == 2
+    assert cache.report(VOCABULARY, scenario="SCE002")["variants"] == []
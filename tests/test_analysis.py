@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.analysis import aggregate_case_headers
+from backend.uploads import prepare_event_log
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "test_breach_cases.csv")
+
+
+@pytest.fixture(scope="module")
+def log():
+    df = pd.read_csv(SAMPLE)
+    # The first case ends before it starts, which safe_duration blanks
+    first_case = df["Order-No."] == df.loc[0, "Order-No."]
+    df.loc[first_case, "As-Is-Real-Order-Processing-End-Time"] = "2025-08-01 00:00:00"
+    return prepare_event_log(df, {"date_formats": {}})
+
+
+def _minutes(start, end):
+    minutes = (end - start).total_seconds() / 60
+    return minutes if minutes >= 0 else np.nan
+
+
+def test_case_headers_match_per_case_loop(log):
+    headers = aggregate_case_headers(log).set_index(["Order_ID", "Item_ID"])
+    cases = list(log.groupby(["Order-No.", "Item-No."], sort=True, observed=True))
+    assert list(headers.index) == [key for key, _ in cases]
+
+    for key, case in cases:
+        row = headers.loc[key]
+        first = case.iloc[0]
+        planned = _minutes(case["Planed-Master-Order-Processing-Start-Time"].min(),
+                           case["Planed-Master-Order-Processing-End-Time"].max())
+        actual = _minutes(case["As-Is-Real-Order-Processing-Start-Time"].min(),
+                          case["As-Is-Real-Order-Processing-End-Time"].max())
+        assert row["Customer_ID"] == first["Customer-No."]
+        assert row["Derived_Scenario"] == first["Planed-Master-Scenario-No."]
+        assert row["Export_Flag"] == first["Export to not EU [1 = n, 2 = y]"]
+        assert row["Total_Yield"] == case["Final Yield Quantity"].sum()
+        assert row["Total_Scrap"] == case["Total Scrap Quantity"].sum()
+        np.testing.assert_equal(row["Time_Planned_Minutes"], planned)
+        np.testing.assert_equal(row["Time_Actual_Minutes"], actual)
+        np.testing.assert_equal(row["Time_Deviation_Minutes"], actual - planned)
+
+
+def test_negative_span_is_blank(log):
+    headers = aggregate_case_headers(log)
+    first_case = headers.iloc[0]
+    assert np.isnan(first_case["Time_Actual_Minutes"])
+    assert np.isnan(first_case["Time_Deviation_Minutes"])
@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.analysis import analyze_cases
+from backend.anomaly import OUTLIER_Z_THRESHOLD, robust_scale, robust_z, score_outliers
+from backend.performance import StepPerformance, TDigest
+from backend.uploads import prepare_event_log
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "test_breach_cases.csv")
+AS_IS_STEP = "As-Is-Master-Order-Processing-Position-No. as an ID"
+AS_IS_END = "As-Is-Real-Order-Processing-End-Time"
+
+
+def test_robust_z_is_not_dragged_by_the_outlier():
+    values = np.r_[np.random.default_rng(0).normal(100, 10, 999), 1000.0]
+    median, scale = robust_scale(TDigest().update(values))
+    assert median == pytest.approx(100, abs=1.5)
+    assert scale == pytest.approx(10, rel=0.1)
+    z = robust_z(values, median, scale)
+    assert np.argmax(np.abs(z)) == 999 and z[999] > 80
+    assert np.abs(z[:999]).max() < 5
+
+
+def test_planted_slow_step_ranks_its_case_first():
+    df = pd.read_csv(SAMPLE)
+    # Every step of the sample takes 10 minutes; make one of ORD0005's take 10 hours
+    row = df.index[(df["Order-No."] == "ORD0005") & df[AS_IS_STEP].notna()][1]
+    df.loc[row, AS_IS_END] = str(pd.Timestamp(df.loc[row, AS_IS_END]) + pd.Timedelta(minutes=590))
+    df = prepare_event_log(df, {"date_formats": {}})
+    results = analyze_cases(df)
+    ranking = score_outliers(results, df, StepPerformance().update(df))
+
+    top = results.frame.iloc[ranking.top(1)].iloc[0]
+    assert top["Order_ID"] == "ORD0005"
+    assert top["Outlier_Step"] == df.loc[row, AS_IS_STEP]
+    assert top["Step_Duration_Z"] > OUTLIER_Z_THRESHOLD
+    assert top["Anomaly_Score"] == results.frame["Anomaly_Score"].max()
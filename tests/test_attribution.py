@@ -0,0 +1,52 @@
+import math
+
+import pandas as pd
+import pytest
+
+from backend.attribution import ANY_BREACH, BreachAttribution
+
+
+def _cases(table):
+    # {(flag, breach type): cases} -> one row per case
+    return pd.DataFrame([{"Export_Flag": flag, "Breach_Type": breach}
+                         for (flag, breach), n in table.items() for _ in range(n)])
+
+
+def test_chi_square_and_lift_on_a_known_table():
+    table = {(1, "None"): 30, (1, "Missing"): 10, (2, "None"): 10, (2, "Missing"): 30}
+    cases = _cases(table)
+    attribution = BreachAttribution(["Export_Flag"])
+    for chunk in (cases.iloc[::2], cases.iloc[1::2]):
+        attribution.update(chunk)
+
+    # Every expected count is 20: chi2 = 4 * 10^2 / 20
+    test = attribution.test("Export_Flag")
+    assert test["cases"] == 80 and test["dof"] == 1
+    assert test["chi2"] == pytest.approx(20)
+    assert test["p_value"] == pytest.approx(math.erfc(math.sqrt(10)))
+    assert test["cramers_v"] == pytest.approx(0.5)
+
+    top, bottom = attribution.ranking("Export_Flag", "Missing")
+    assert (top["value"], top["cases"], top["value_cases"]) == (2, 30, 40)
+    assert (top["rate"], top["base_rate"], top["lift"]) == (0.75, 0.5, 1.5)
+    assert top["chi2"] == pytest.approx(20)
+    assert bottom["value"] == 1 and bottom["lift"] == pytest.approx(0.5)
+    # With one breach type, "any breach" is that type
+    assert attribution.ranking("Export_Flag", ANY_BREACH) == [
+        dict(cell, breach_type=ANY_BREACH) for cell in attribution.ranking("Export_Flag", "Missing")]
+
+
+def test_empty_and_filtered_results():
+    attribution = BreachAttribution(["Export_Flag"]).update(pd.DataFrame(columns=["Export_Flag", "Breach_Type"]))
+    report = attribution.report()
+    assert report["cells"] == []
+    assert report["tests"] == [{"attribute": "Export_Flag", "cases": 0, "values": 0, "breach_types": 0}]
+
+    attribution.update(_cases({(1, "None"): 3, (2, "Missing"): 4}))
+    assert attribution.ranking(breach_type="Missing") == []  # 4 cases < ATTRIBUTION_MIN_CASES
+    assert len(attribution.ranking(breach_type="Missing", min_cases=1)) == 1
+    assert "chi2" in attribution.test("Export_Flag")
+    with pytest.raises(ValueError):
+        attribution.ranking("Customer_ID")
+    with pytest.raises(ValueError):
+        attribution.ranking(by="odds")
@@ -0,0 +1,74 @@
+import os
+
+import pandas as pd
+import pytest
+
+from backend.analysis import analyze_cases
+from backend.app import app
+from backend.case_results import DERIVED_FIELDS, RESULT_FIELDS, STEP_COUNT_FIELDS, select_fields
+from backend.uploads import prepare_event_log
+from backend.utils import SCENARIO_STEPS, detect_breaches
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "test_breach_cases.csv")
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return pd.read_csv(SAMPLE)
+
+
+@pytest.fixture(scope="module")
+def results(raw):
+    return analyze_cases(prepare_event_log(raw.copy(), {"date_formats": {}}))
+
+
+def test_records_round_trip_step_lists(raw, results):
+    records = results.to_records()
+    assert len(records) == len(results) == raw.groupby(["Order-No.", "Item-No."]).ngroups
+
+    for record in records:
+        case = raw[(raw["Order-No."] == record["Order_ID"]) & (raw["Item-No."] == record["Item_ID"])]
+        actual = case.sort_values("As-Is-Real-Order-Processing-Ongoing Position No.", kind="stable")
+        actual = [None if pd.isna(s) else s for s in actual["As-Is-Master-Order-Processing-Position-No. as an ID"]]
+        missing, out_of_order, extra, duplicates = detect_breaches(SCENARIO_STEPS[record["Derived_Scenario"]], actual)
+        assert record["Missing_Steps"] == missing
+        assert record["Out_of_Order_Steps"] == out_of_order
+        assert record["Extra_Steps"] == extra
+        assert record["Duplicates"] == duplicates
+        for field, count_field in STEP_COUNT_FIELDS.items():
+            assert record[count_field] == len(record[field])
+        assert record["Case_ID"] == f"{record['Order_ID']}_{record['Item_ID']}"
+
+
+def test_batches_and_field_subsets_agree(results):
+    records = results.to_records()
+    pd.testing.assert_frame_equal(pd.DataFrame(results.iter_records(batch_size=7)), pd.DataFrame(records))
+    subset = results.to_records(["Order_ID", "Missing_Steps", "Breach_Type"])
+    assert subset == [{k: r[k] for k in ("Order_ID", "Missing_Steps", "Breach_Type")} for r in records]
+
+
+def test_digest_is_content_hash(raw, results):
+    again = analyze_cases(prepare_event_log(raw.copy(), {"date_formats": {}}))
+    assert again.digest() == results.digest()
+    changed = raw.copy()
+    changed.loc[0, "Total Scrap Quantity"] += 1
+    assert analyze_cases(prepare_event_log(changed, {"date_formats": {}})).digest() != results.digest()
+
+
+def _analyze(query):
+    with open(SAMPLE, "rb") as f:
+        return app.test_client().post(f"/analyze-with-dashboard{query}", data={"file": (f, "log.csv")})
+
+
+def test_lean_profile_and_sparse_fields():
+    assert select_fields("lean") == [field for field in RESULT_FIELDS if field not in DERIVED_FIELDS]
+    assert select_fields("lean", ["Fitness", "Order_ID"]) == ["Order_ID", "Fitness"]
+    with pytest.raises(ValueError):
+        select_fields("slim")
+
+    full = _analyze("").get_json()["results"]
+    lean = _analyze("?profile=lean").get_json()["results"]
+    assert lean == [{field: record[field] for field in select_fields("lean")} for record in full]
+    sparse = _analyze("?fields=Order_ID,Breach_Type").get_json()["results"]
+    assert sparse == [{"Order_ID": r["Order_ID"], "Breach_Type": r["Breach_Type"]} for r in full]
+    assert _analyze("?fields=Order_ID,Nope").status_code == 400
@@ -0,0 +1,44 @@
+import io
+import os
+
+import pandas as pd
+
+from backend.analysis import analyze_cases
+from backend.app import app
+from backend.compare import COMPARE_FIELDS, RESULT_KEYS, analyze_changed_cases, case_input_hashes
+from backend.uploads import prepare_event_log
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "test_breach_cases.csv")
+
+
+def _current_log():
+    # The sample with its cases in reverse order and one case's scrap changed
+    df = pd.read_csv(SAMPLE)
+    df = pd.concat([case for _, case in reversed(list(df.groupby("Order-No.", sort=False)))], ignore_index=True)
+    df.loc[df["Order-No."] == "ORD0007", "Total Scrap Quantity"] += 3
+    return df
+
+
+def test_unchanged_cases_are_reused_by_input_hash():
+    baseline = prepare_event_log(pd.read_csv(SAMPLE), {"date_formats": {}})
+    current = prepare_event_log(_current_log(), {"date_formats": {}})
+
+    frame, hashes, stats = analyze_changed_cases(current, case_input_hashes(baseline), analyze_cases(baseline).frame)
+    assert stats == {"reused_cases": 39, "analysed_cases": 1}
+    expected = analyze_cases(current).frame[RESULT_KEYS + COMPARE_FIELDS]
+    pd.testing.assert_frame_equal(
+        frame.sort_values(RESULT_KEYS, ignore_index=True),
+        expected.astype({key: object for key in RESULT_KEYS}).sort_values(RESULT_KEYS, ignore_index=True))
+
+
+def test_compare_endpoint_reports_the_changed_case():
+    client = app.test_client()
+    with open(SAMPLE, "rb") as f:
+        baseline_id = client.post("/analyze-with-dashboard", data={"file": (f, "log.csv")}).get_json()["analysis_id"]
+    payload = io.BytesIO(_current_log().to_csv(index=False).encode())
+    report = client.post("/compare", data={"baseline_id": baseline_id, "current": (payload, "current.csv")}).get_json()
+
+    assert (report["reused_cases"], report["analysed_cases"]) == (39, 1)
+    assert report["cases"]["changed"] == 1 and report["cases"]["unchanged"] == 39
+    [case] = report["changed_cases"]
+    assert case["Order_ID"] == "ORD0007" and "Total_Scrap" in case["changes"]
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.analysis import analyze_cases
+from backend.cube import build_breach_cube, query_cube
+from backend.uploads import prepare_event_log
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "test_breach_cases.csv")
+EXPORT_FLAG = "Export to not EU [1 = n, 2 = y]"
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return analyze_cases(prepare_event_log(pd.read_csv(SAMPLE), {"date_formats": {}})).frame
+
+
+def test_roll_up_matches_case_results(frame):
+    cube = build_breach_cube(frame)
+    total = query_cube(cube)
+    assert total["Num_Cases"].item() == len(frame)
+    assert total["Num_Breaches"].item() == (frame["Breach_Type"] != "None").sum()
+
+    by_scenario = query_cube(cube, group_by=["Derived_Scenario"]).set_index("Derived_Scenario")
+    expected = frame.groupby(frame["Derived_Scenario"].astype(object))["Order_ID"].size()
+    assert by_scenario["Num_Cases"].to_dict() == expected.to_dict()
+
+
+def test_filters_take_string_values(frame):
+    cube = build_breach_cube(frame)
+    scenario = str(frame["Derived_Scenario"].iloc[0])
+    sliced = query_cube(cube, group_by=["Breach_Type"], filters={"Derived_Scenario": [scenario]})
+    cases = frame[frame["Derived_Scenario"].astype(str) == scenario]
+    assert sliced["Num_Cases"].sum() == len(cases)
+    flag = query_cube(cube, filters={"Export_Flag": ["2"]})["Num_Cases"].item()
+    assert flag == (frame["Export_Flag"] == 2).sum()
+
+    with pytest.raises(ValueError):
+        query_cube(cube, group_by=["No_Such_Dimension"])
+
+
+def test_float_flags_are_labelled_like_int_flags():
+    # A NaN in a flag column makes it float; its labels must still be "1"/"2"
+    df = pd.read_csv(SAMPLE)
+    first_row = df.groupby(["Order-No.", "Item-No."]).head(1).index[0]
+    df.loc[first_row, EXPORT_FLAG] = np.nan
+    frame = analyze_cases(prepare_event_log(df, {"date_formats": {}})).frame
+    assert frame["Export_Flag"].dtype == float
+
+    labels = set(build_breach_cube(frame)["Export_Flag"].dropna().astype(str))
+    assert labels <= {"1", "2"}
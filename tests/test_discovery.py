@@ -0,0 +1,33 @@
+import os
+from collections import Counter
+
+import pandas as pd
+
+from backend.discovery import AS_IS_POSITION, AS_IS_STEP, END, START, build_dfg, dfg_report
+from backend.uploads import prepare_event_log
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "test_breach_cases.csv")
+
+
+def test_dfg_edge_counts_on_a_tiny_log():
+    df = pd.read_csv(SAMPLE)
+    df = df[df["Order-No."].isin(df["Order-No."].unique()[:3])].copy()
+    # Run the first case backwards and drop a step from the second
+    first, second = df["Order-No."].unique()[:2]
+    rows = df["Order-No."] == first
+    df.loc[rows, AS_IS_POSITION] = df.loc[rows, AS_IS_POSITION].max() + 1 - df.loc[rows, AS_IS_POSITION]
+    df.loc[df.index[df["Order-No."] == second][1], AS_IS_STEP] = None
+
+    expected = Counter()
+    for _, case in df.dropna(subset=[AS_IS_STEP]).groupby(["Order-No.", "Item-No."]):
+        trace = [START, *case.sort_values(AS_IS_POSITION)[AS_IS_STEP], END]
+        expected.update(zip(trace, trace[1:]))
+
+    dfg = build_dfg(prepare_event_log(df, {"date_formats": {}}))
+    report = dfg_report(dfg)
+    assert report["cases"] == 3
+    assert {(e["Source"], e["Target"]): e["Count"] for e in report["edges"]} == expected
+    steps = Counter(df[AS_IS_STEP].dropna())
+    assert {node["Step"]: node["Count"] for node in report["nodes"]} == steps
+    frequent = dfg_report(dfg, min_count=2)["edges"]
+    assert {(e["Source"], e["Target"]) for e in frequent} == {edge for edge, n in expected.items() if n >= 2}
@@ -0,0 +1,38 @@
+import os
+
+import pandas as pd
+
+from backend.analysis import analyze_cases
+from backend.encoding import REFERENCE_STEPS, STEP_ID_COLUMNS, encode_event_log
+from backend.uploads import prepare_event_log
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "test_breach_cases.csv")
+PLANNED, AS_IS = STEP_ID_COLUMNS
+
+
+def _with_stray_step():
+    # An as-is step the plan lacks, sorting before the reference IDs
+    df = pd.read_csv(SAMPLE)
+    row = df.iloc[[0]].assign(**{AS_IS: "JUNK123"})
+    return pd.concat([df, row], ignore_index=True)
+
+
+def test_categorical_step_columns_are_recoded():
+    df = _with_stray_step()
+    for col in STEP_ID_COLUMNS:
+        df[col] = df[col].astype("category")
+    encoded = encode_event_log(df.copy())
+
+    for col in STEP_ID_COLUMNS:
+        categories = encoded[col].cat.categories.tolist()
+        assert categories[:len(REFERENCE_STEPS)] == REFERENCE_STEPS
+        assert encoded[col].astype(object).tolist() == df[col].astype(object).tolist()
+    assert encoded[PLANNED].cat.categories.equals(encoded[AS_IS].cat.categories)
+
+
+def test_case_results_do_not_depend_on_input_dtype():
+    df = _with_stray_step()
+    categorical = df.astype({col: "category" for col in STEP_ID_COLUMNS})
+    expected = analyze_cases(prepare_event_log(df, {"date_formats": {}})).frame
+    result = analyze_cases(prepare_event_log(categorical, {"date_formats": {}})).frame
+    pd.testing.assert_frame_equal(result, expected)
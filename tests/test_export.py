@@ -0,0 +1,31 @@
+import io
+import os
+
+from openpyxl import load_workbook
+
+from backend.app import app
+from backend.export import XLSX_COLUMNS
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "test_breach_cases.csv")
+
+
+def test_xlsx_export_has_one_row_per_case():
+    client = app.test_client()
+    with open(SAMPLE, "rb") as f:
+        analysis_id = client.post("/analyze-with-dashboard", data={"file": (f, "log.csv")}).get_json()["analysis_id"]
+    records = client.get(f"/analysis/{analysis_id}/results").get_json()["results"]
+
+    response = client.get(f"/analysis/{analysis_id}/export.xlsx")
+    assert response.status_code == 200
+    sheet = load_workbook(io.BytesIO(response.data), read_only=True)["Breach Report"]
+    header, *rows = sheet.iter_rows(values_only=True)
+    assert list(header) == [title for title, _ in XLSX_COLUMNS]
+    assert len(rows) == len(records) == 40
+
+    fields = [field for _, field in XLSX_COLUMNS]
+    for row, record in zip(rows, records):
+        cells = dict(zip(fields, row))
+        assert cells["Order_ID"] == record["Order_ID"]
+        assert cells["Breach_Type"] == record["Breach_Type"]
+        assert cells["Missing_Steps"] == (", ".join(record["Missing_Steps"]) or None)
+        assert cells["Time_Deviation_Minutes"] == round(record["Time_Deviation_Minutes"], 2)
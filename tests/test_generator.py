@@ -0,0 +1,24 @@
+import pandas as pd
+
+import event_log_generator
+from event_log_generator import generate_block, generate_dataset, generate_traces
+
+
+def test_same_seed_same_log():
+    first = generate_dataset(60, "worst", seed=7)
+    pd.testing.assert_frame_equal(generate_dataset(60, "worst", seed=7), first)
+    assert generate_traces(60, "worst", seed=7) == generate_traces(60, "worst", seed=7)
+    assert not generate_dataset(60, "worst", seed=8).equals(first)
+
+
+def test_blocks_do_not_depend_on_each_other(monkeypatch):
+    monkeypatch.setattr(event_log_generator, "BLOCK_ORDERS", 25)
+    log = generate_dataset(60, "complex", seed=3)
+
+    # Each block seeds from (seed, first order), so it can be generated alone
+    third = generate_block(10, "complex", seed=3, first_order=50)
+    rows = log[log["Order-No."].astype(str) >= "ORD0051"].reset_index(drop=True)
+    pd.testing.assert_frame_equal(rows.astype(object), third.astype(object))
+    assert log["Order-No."].nunique() == 60
+    assert [scenario for scenario, _, _ in generate_traces(60, "complex", seed=3)] \
+        == log.drop_duplicates("Order-No.")["Planed-Master-Scenario-No."].astype(str).tolist()
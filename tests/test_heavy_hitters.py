@@ -0,0 +1,66 @@
+import random
+from collections import Counter
+
+from backend.heavy_hitters import SpaceSaving
+
+
+def _stream(seed, n=5000):
+    # Zipf-like keys: a few heavy ones and a long tail
+    rng = random.Random(seed)
+    return [f"k{min(int(rng.paretovariate(1.0)), 500)}" for _ in range(n)]
+
+
+def _summary(keys, capacity):
+    summary = SpaceSaving(capacity)
+    for key in keys:
+        summary.update(key)
+    return summary
+
+
+def _assert_bounds(summary, exact):
+    for key, count in summary.counts.items():
+        # Over-estimate by at most the key's error
+        assert exact[key] <= count <= exact[key] + summary.errors[key]
+    for key, count in exact.items():
+        if key not in summary.counts:
+            assert count <= summary.floor()
+
+
+def test_update_bounds_and_top():
+    keys = _stream(1)
+    exact = Counter(keys)
+    summary = _summary(keys, capacity=20)
+    assert summary.total == len(keys)
+    _assert_bounds(summary, exact)
+
+    top = summary.top(3)
+    assert [entry["key"] for entry in top] == [key for key, _ in exact.most_common(3)]
+    assert all(entry["guaranteed_count"] <= exact[entry["key"]] <= entry["count"] for entry in top)
+
+
+def test_merge_keeps_error_bounds():
+    left, right = _stream(2), _stream(3)
+    exact = Counter(left) + Counter(right)
+    merged = _summary(left, capacity=20).merge(_summary(right, capacity=20))
+    assert merged.total == len(left) + len(right)
+    assert len(merged.counts) <= 20
+    _assert_bounds(merged, exact)
+    assert merged.top(1)[0]["key"] == exact.most_common(1)[0][0]
+
+
+def test_small_streams_are_exact():
+    summary = _summary(["a", "b", "a", "c", "a", "b"], capacity=10)
+    assert summary.top(2) == [
+        {"key": "a", "count": 3, "error": 0, "guaranteed_count": 3},
+        {"key": "b", "count": 2, "error": 0, "guaranteed_count": 2},
+    ]
+    assert summary.floor() == 0
+
+
+def test_keys_need_not_be_orderable():
+    # Alignment variants are (scenario, trace) and a case may have no scenario
+    summary = SpaceSaving(2)
+    for key in [("SCE001", (1, 2)), (None, (1, 2)), (float("nan"), (3,)), (None, (1, 2)), (None, (1, 2))]:
+        summary.update(key)
+    assert summary.total == 5
+    assert summary.top(1)[0]["key"] == (None, (1, 2))
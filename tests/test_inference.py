@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from backend.encoding import STEP_ID_COLUMNS
+from backend.inference import infer_scenarios, score_scenarios
+from backend.uploads import prepare_event_log
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "test_breach_cases.csv")
+
+
+def _load(df):
+    return prepare_event_log(df, {"date_formats": {}})
+
+
+def test_rows_without_case_keys_are_ignored():
+    df = pd.read_csv(SAMPLE)
+    expected = infer_scenarios(_load(df.copy()))
+    for key in ("Order-No.", "Item-No."):
+        # A stray row, with the flags of another scenario, that belongs to no case
+        blank = df.iloc[[0]].assign(**{key: np.nan, "Export to not EU [1 = n, 2 = y]": 2})
+        result = infer_scenarios(_load(pd.concat([blank, df], ignore_index=True)))
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_scores_do_not_depend_on_step_code_order():
+    log = _load(pd.read_csv(SAMPLE))
+    expected = score_scenarios(log)
+    for col in STEP_ID_COLUMNS:
+        log[col] = log[col].cat.reorder_categories(log[col].cat.categories[::-1])
+    np.testing.assert_array_equal(score_scenarios(log), expected)
@@ -0,0 +1,42 @@
+import os
+
+from backend import app as app_module
+from backend.instrumentation import PeakRssTracker, reset_peak_rss
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "test_breach_cases.csv")
+
+
+def test_peak_rss_only_for_requests_that_ran_alone(monkeypatch):
+    monkeypatch.setattr("backend.instrumentation.reset_peak_rss", lambda: True)
+    tracker = PeakRssTracker()
+
+    alone = tracker.begin()
+    assert tracker.end(alone) > 0
+    assert tracker.end(alone) is None
+
+    # The second request's start ends the first one's exclusive window too
+    first = tracker.begin()
+    second = tracker.begin()
+    assert tracker.end(first) is None
+    later = tracker.begin()
+    assert tracker.end(second) is None
+    assert tracker.end(later) is None
+    assert tracker.end(tracker.begin()) > 0
+
+
+def test_overlapping_analyses_send_no_peak_header(monkeypatch):
+    tracker = PeakRssTracker()
+    monkeypatch.setattr(app_module, "peak_rss", tracker)
+    client = app_module.app.test_client()
+
+    def analyze():
+        with open(SAMPLE, "rb") as f:
+            return client.post("/analyze-with-dashboard", data={"file": (f, "log.csv")})
+
+    if reset_peak_rss():
+        assert float(analyze().headers["X-Peak-RSS-MB"]) > 0
+    other = tracker.begin()  # e.g. a comparison still running in another thread
+    response = analyze()
+    tracker.end(other)
+    assert response.status_code == 200
+    assert "X-Peak-RSS-MB" not in response.headers
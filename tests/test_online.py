@@ -0,0 +1,63 @@
+import pytest
+
+from backend.app import app, online_conformance
+from backend.online import OnlineConformance
+
+
+def test_spill_with_numeric_ids(tmp_path):
+    conformance = OnlineConformance(max_active_cases=1, spill_path=str(tmp_path / "cases"))
+    first = conformance.ingest({"order_id": 1, "item_id": 2, "scenario": "SCE001", "step": "PR0001"})
+    conformance.ingest({"order_id": 3, "item_id": 4, "scenario": "SCE001", "step": "PR0001"})
+    assert conformance.stats() == {"active_cases": 1, "spilled_cases": 1}
+
+    # Numeric case_id and the URL form of the same ID find the spilled case
+    assert first["case_id"] == "1_2"
+    assert conformance.case_state("1_2")["started_steps"] == ["PR0001"]
+    result = conformance.ingest({"case_id": 7, "scenario": "SCE001", "step": "PR0001"})
+    assert result["case_id"] == "7"
+
+
+@pytest.mark.parametrize("event", [
+    {"case_id": "C1", "scenario": "SCE001", "step": ["PR0001"]},
+    {"case_id": "C1", "scenario": ["SCE001"], "step": "PR0001"},
+    ["C1", "SCE001", "PR0001"],
+    {"order_id": "ORD1", "scenario": "SCE001", "step": "PR0001"},
+    {"scenario": "SCE001", "step": "PR0001"},
+    {"case_id": "C1", "scenario": "SCE001"},
+])
+def test_malformed_events_are_value_errors(tmp_path, event):
+    conformance = OnlineConformance(spill_path=str(tmp_path / "cases"))
+    with pytest.raises(ValueError):
+        conformance.ingest(event)
+
+
+def test_numeric_step_zero_is_a_step(tmp_path):
+    conformance = OnlineConformance(spill_path=str(tmp_path / "cases"))
+    result = conformance.ingest({"case_id": "C1", "scenario": "SCE001", "step": 0})
+    assert result["issues"] == [{"type": "extra", "steps": [0]}]
+
+
+def test_invalid_batch_changes_nothing(tmp_path):
+    conformance = OnlineConformance(spill_path=str(tmp_path / "cases"))
+    batch = [
+        {"case_id": "C1", "scenario": "SCE001", "step": "PR0001"},
+        {"case_id": "C2", "step": "PR0001"},  # new case without a scenario
+    ]
+    with pytest.raises(ValueError):
+        conformance.ingest_batch(batch)
+    assert conformance.case_state("C1") is None
+
+    # Fixed and retried, each event is applied once
+    batch[1]["scenario"] = "SCE001"
+    results = conformance.ingest_batch(batch + [{"case_id": "C1", "step": "PR0001"}])
+    assert [r["issues"] for r in results] == [[], [], [{"type": "duplicate", "steps": ["PR0001"]}]]
+
+
+def test_events_endpoint_rejects_whole_batch():
+    client = app.test_client()
+    response = client.post("/events", json=[
+        {"case_id": "batch-test", "scenario": "SCE001", "step": "PR0001"},
+        {"case_id": "batch-test", "step": ["PR0002"]},
+    ])
+    assert response.status_code == 400
+    assert online_conformance.case_state("batch-test") is None
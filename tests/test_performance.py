@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from backend.performance import PERFORMANCE_QUANTILES, TDigest
+
+
+def test_merged_digest_quantiles_match_numpy():
+    values = np.random.default_rng(1).lognormal(3, 1, 100_000)  # skewed, like step durations
+    digest = TDigest()
+    for chunk in np.array_split(values, 20):
+        digest.merge(TDigest().update(chunk))
+
+    quantiles = [0.01, 0.1, *PERFORMANCE_QUANTILES]
+    np.testing.assert_allclose(digest.quantile(quantiles), np.percentile(values, np.multiply(quantiles, 100)),
+                               rtol=0.02)
+    # In the far tail the values are sparse: check the rank instead
+    for q in (0.001, 0.999):
+        assert abs((values <= digest.quantile(q)).mean() - q) < 0.001
+    assert len(digest.means) <= digest.compression / 2
+
+    summary = digest.summary()
+    assert summary["count"] == len(values)
+    assert summary["mean"] == pytest.approx(values.mean())
+    assert (summary["min"], summary["max"]) == (values.min(), values.max())
+    assert TDigest().summary() == {"count": 0}
@@ -0,0 +1,53 @@
+import io
+import os
+
+import pandas as pd
+
+from backend.app import admission, app
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "test_breach_cases.csv")
+
+
+def _preview():
+    with open(SAMPLE, "rb") as f:
+        return app.test_client().post("/analyze-with-dashboard?preview=1&sample_size=3",
+                                      data={"file": (f, "log.csv")})
+
+
+def test_preview_samples_cases_per_scenario():
+    response = _preview()
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["preview"] and body["total_cases"] == 40
+    assert all(s["sampled_cases"] <= 3 for s in body["scenarios"])
+    assert admission.running == 0
+
+
+def test_preview_goes_through_admission(monkeypatch):
+    monkeypatch.setattr(admission, "max_queue", 0)
+    held = admission.acquire("other-client", admission.budget_mb)
+    try:
+        response = _preview()
+    finally:
+        admission.release(held)
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+
+def _preview_csv(text):
+    payload = io.BytesIO(text.encode())
+    response = app.test_client().post("/analyze-with-dashboard?preview=1&sample_size=3&seed=7",
+                                      data={"file": (payload, "log.csv")})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_quoted_newlines_and_blank_lines_do_not_shift_rows():
+    df = pd.read_csv(SAMPLE)
+    expected = _preview_csv(df.to_csv(index=False))
+
+    # A multi-line note early in the file, and a blank line after the header
+    noted = df.assign(Note="").astype({"Note": object})
+    noted.loc[2, "Note"] = "first line\nsecond line"
+    header, body = noted.to_csv(index=False).split("\n", 1)
+    assert _preview_csv(header + "\n\n" + body) == expected
@@ -0,0 +1,35 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from backend.app import app
+from backend.quality import profile_event_log
+from backend.uploads import prepare_event_log
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "test_breach_cases.csv")
+
+
+def test_blank_case_key_rows_are_reported_not_profiled():
+    df = pd.read_csv(SAMPLE)
+    expected = profile_event_log(prepare_event_log(df.copy(), {"date_formats": {}}))
+    blank = pd.concat([df, df.iloc[[0]].assign(**{"Order-No.": np.nan})], ignore_index=True)
+    report = profile_event_log(prepare_event_log(blank, {"date_formats": {}}))
+
+    assert report["rows"] == len(df) + 1
+    assert report["missing_case_keys"] == {"rows": 1, "Order-No.": 1, "Item-No.": 0}
+    assert report["null_rates"]["Order-No."] == 1 / (len(df) + 1)
+    for finding in ("cases", "attribute_conflicts", "negative_durations", "planned_steps"):
+        assert report[finding] == expected[finding]
+
+
+def test_analysis_with_blank_case_key_succeeds():
+    df = pd.read_csv(SAMPLE)
+    blank = pd.concat([df, df.iloc[[0]].assign(**{"Item-No.": np.nan})], ignore_index=True)
+    payload = io.BytesIO(blank.to_csv(index=False).encode())
+    response = app.test_client().post("/analyze-with-dashboard", data={"file": (payload, "log.csv")})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert len(body["results"]) == 40
+    assert body["data_quality"]["missing_case_keys"]["rows"] == 1
@@ -0,0 +1,31 @@
+import gzip
+import json
+import os
+
+from backend.app import app
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "test_breach_cases.csv")
+
+
+def test_results_revalidate_by_etag_and_negotiate_gzip():
+    client = app.test_client()
+    with open(SAMPLE, "rb") as f:
+        analysis_id = client.post("/analyze-with-dashboard", data={"file": (f, "log.csv")}).get_json()["analysis_id"]
+    url = f"/analysis/{analysis_id}/results"
+
+    plain = client.get(url)
+    assert plain.status_code == 200 and "Content-Encoding" not in plain.headers
+    assert "Accept-Encoding" in plain.headers["Vary"]
+    etag = plain.headers["ETag"]
+
+    packed = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert packed.headers["ETag"] == etag[:-1] + '-gzip"'
+    assert json.loads(gzip.decompress(packed.data)) == plain.get_json()
+
+    # Either representation's tag revalidates, without a body
+    for tag in (etag, packed.headers["ETag"]):
+        cached = client.get(url, headers={"If-None-Match": tag, "Accept-Encoding": "gzip"})
+        assert cached.status_code == 304 and cached.data == b""
+        assert cached.headers["ETag"] == tag
+    assert client.get(url + "?profile=lean", headers={"If-None-Match": etag}).status_code == 200
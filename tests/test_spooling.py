@@ -0,0 +1,21 @@
+import io
+import os
+
+import pytest
+from flask import request
+
+from backend import uploads
+from backend.app import app
+from backend.uploads import spooled_path
+
+
+@pytest.mark.parametrize("size", [10, 1 << 20])
+def test_uploads_are_spooled_to_disk(tmp_path, monkeypatch, size):
+    # Werkzeug would keep the small one in memory; every upload goes to a temp file
+    monkeypatch.setattr(uploads, "UPLOAD_SPOOL_DIR", str(tmp_path))
+    payload = b"x" * size
+    with app.test_request_context("/", method="POST", data={"file": (io.BytesIO(payload), "log.csv")}):
+        path = spooled_path(request.files["file"])
+        assert path is not None and os.path.dirname(path) == str(tmp_path)
+        with open(path, "rb") as f:
+            assert f.read() == payload
@@ -0,0 +1,14 @@
+from backend import store
+
+
+def test_least_recently_used_analysis_is_evicted(monkeypatch):
+    monkeypatch.setattr(store, "MAX_STORED_ANALYSES", 2)
+    monkeypatch.setattr(store, "_analyses", store.OrderedDict())
+    first = store.save_analysis({"n": 1})
+    second = store.save_analysis({"n": 2})
+    assert store.get_analysis(first) == {"n": 1}  # now the most recently used
+
+    third = store.save_analysis({"n": 3})
+    assert store.get_analysis(second) is None
+    assert store.get_analysis(first) == {"n": 1}
+    assert store.get_analysis(third) == {"n": 3}
@@ -0,0 +1,46 @@
+import io
+import os
+
+import pandas as pd
+from werkzeug.datastructures import FileStorage
+
+from backend.analysis import analyze_cases
+from backend.encoding import STEP_ID_COLUMNS
+from backend.uploads import load_event_log, prepare_event_log
+from backend.validation import sniff_upload, validate_sample
+
+SAMPLE = os.path.join(os.path.dirname(__file__), os.pardir, "test_breach_cases.csv")
+
+
+def _upload(df):
+    return FileStorage(io.BytesIO(df.to_csv(index=False).encode()), filename="log.csv")
+
+
+def test_upload_with_stray_step_matches_plain_parse():
+    # An as-is step the plan lacks, sorting before the reference IDs
+    df = pd.read_csv(SAMPLE)
+    df = pd.concat([df, df.iloc[[0]].assign(**{STEP_ID_COLUMNS[1]: "JUNK123"})], ignore_index=True)
+    file = _upload(df)
+    problems, hints = validate_sample(sniff_upload(file.stream, file.filename))
+
+    loaded = load_event_log(file, file.filename, hints)
+    expected = analyze_cases(prepare_event_log(df, {"date_formats": {}})).frame
+    pd.testing.assert_frame_equal(analyze_cases(loaded).frame, expected)
+
+
+def test_timestamp_format_change_after_sample_is_parsed():
+    df = pd.read_csv(SAMPLE)
+    column = "As-Is-Real-Order-Processing-Start-Time"
+    expected = pd.to_datetime(df[column])
+    # Past the sniffed rows the log switches format
+    late = df.index >= 300
+    df.loc[late, column] = expected[late].dt.strftime("%Y/%m/%d %H:%M")
+    df.loc[len(df) - 1, column] = "not a time"
+    file = _upload(df)
+    problems, hints = validate_sample(sniff_upload(file.stream, file.filename))
+    assert hints["date_formats"][column] == "%Y-%m-%d %H:%M:%S"
+
+    loaded = load_event_log(file, file.filename, hints)
+    pd.testing.assert_series_equal(loaded[column].iloc[:-1], expected.iloc[:-1], check_names=False)
+    assert pd.isna(loaded[column].iloc[-1])
+    assert loaded.attrs["coerced_values"] == {column: 1}